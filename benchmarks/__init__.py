@@ -0,0 +1,5 @@
+"""
+Benchmark scripts for Obsidian Concierge.
+
+Each module can be run directly, e.g. ``python -m benchmarks.bench_parser``.
+"""
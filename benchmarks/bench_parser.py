@@ -0,0 +1,95 @@
+"""
+Note parser micro-benchmark.
+
+Parses a synthetic corpus of Obsidian notes on a single core and reports
+notes and megabytes per second.
+
+Usage:
+    python -m benchmarks.bench_parser [--notes 5000] [--repeat 3]
+"""
+
+import argparse
+import random
+import time
+from typing import List
+
+from obsidian_concierge.indexer.parser import parse_note
+
+WORDS = (
+    "vault note project meeting design backend review plan idea research "
+    "api database search index query draft summary follow-up decision risk"
+).split()
+
+
+def make_note(rng: random.Random) -> str:
+    """
+    Generate a synthetic note with frontmatter, tags, links and code.
+
+    Args:
+        rng: Random number generator
+
+    Returns:
+        Note text
+    """
+    lines = [
+        "---",
+        f"title: {rng.choice(WORDS).title()} {rng.randint(1, 999)}",
+        f"tags: [{rng.choice(WORDS)}, {rng.choice(WORDS)}]",
+        "status: active",
+        "---",
+        f"# {rng.choice(WORDS).title()}",
+    ]
+    for _ in range(rng.randint(5, 40)):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(8, 25))]
+        roll = rng.random()
+        if roll < 0.2:
+            words.append(f"#{rng.choice(WORDS)}/{rng.choice(WORDS)}")
+        elif roll < 0.4:
+            words.append(f"[[{rng.choice(WORDS).title()} Note|{rng.choice(WORDS)}]]")
+        elif roll < 0.45:
+            words.append(f"![[image-{rng.randint(1, 50)}.png]]")
+        elif roll < 0.5:
+            lines += ["```python", "# not a heading #nottag", "print('x')", "```"]
+        lines.append(" ".join(words))
+        if rng.random() < 0.15:
+            lines.append(f"## {rng.choice(WORDS).title()}")
+    return "\n".join(lines) + "\n"
+
+
+def run(notes: List[str], repeat: int) -> None:
+    """
+    Time parsing the corpus and print throughput.
+
+    Args:
+        notes: Note texts
+        repeat: Number of timed passes; the best pass is reported
+    """
+    total_bytes = sum(len(note.encode("utf-8")) for note in notes)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for note in notes:
+            parse_note(note)
+        best = min(best, time.perf_counter() - start)
+
+    print(f"notes:        {len(notes)}")
+    print(f"corpus:       {total_bytes / 1e6:.2f} MB")
+    print(f"best pass:    {best:.3f} s")
+    print(f"notes/s/core: {len(notes) / best:,.0f}")
+    print(f"MB/s/core:    {total_bytes / 1e6 / best:.1f}")
+
+
+def main() -> None:
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=5000, help="Number of notes to parse")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed passes")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    run([make_note(rng) for _ in range(args.notes)], args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Vector quantization benchmark.
+
+Stores a synthetic clustered corpus of embeddings in the numpy vector store
+once per quantization mode (float32, float16, int8) and reports the memory of
+the scanned vectors, recall@10 against exact float32 search and query latency.
+
+Usage:
+    python -m benchmarks.bench_quantization [--vectors 200000] [--dim 384] [--queries 200]
+"""
+
+import argparse
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from obsidian_concierge.repository.numpy_store import LocalCollection
+
+MODES: List[Optional[str]] = [None, "float16", "int8"]
+
+
+def make_corpus(rng: np.random.Generator, vectors: int, dim: int, clusters: int) -> np.ndarray:
+    """
+    Generate embeddings grouped around random topics, like chunks of notes.
+
+    Args:
+        rng: Random number generator
+        vectors: Number of vectors
+        dim: Vector dimension
+        clusters: Number of topics
+
+    Returns:
+        float32 matrix with one vector per row
+    """
+    centers = rng.normal(size=(clusters, dim))
+    data = centers[rng.integers(0, clusters, size=vectors)] + rng.normal(scale=0.6, size=(vectors, dim))
+    return data.astype(np.float32)
+
+
+def run(corpus: np.ndarray, queries: np.ndarray, space: str, block_size: int) -> None:
+    """
+    Query the corpus in every mode and print one line per mode.
+
+    Args:
+        corpus: Stored vectors
+        queries: Query vectors
+        space: Distance function
+        block_size: Vectors scored per matrix product
+    """
+    ids = [str(i) for i in range(len(corpus))]
+    truth: Optional[List[List[str]]] = None
+
+    print(f"vectors: {len(corpus)}  dim: {corpus.shape[1]}  queries: {len(queries)}  space: {space}")
+    print(f"{'mode':<8} {'memory MB':>10} {'recall@10':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for mode in MODES:
+        collection = LocalCollection(mode or "float32", space=space, block_size=block_size, quantization=mode)
+        collection.add(ids=ids, embeddings=corpus, documents=[""] * len(corpus))
+        # The first query builds norms and quantized vectors; keep it untimed
+        collection.query(query_embeddings=queries[:1], n_results=10, include=[])
+
+        results = []
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            results.append(collection.query(query_embeddings=[query], n_results=10, include=[])["ids"][0])
+            latencies.append((time.perf_counter() - start) * 1000)
+        if truth is None:
+            truth = results
+        recall = np.mean([len(set(found) & set(exact)) / 10 for found, exact in zip(results, truth)])
+
+        memory = sum(collection.memory_usage().values()) / 1e6
+        print(
+            f"{mode or 'float32':<8} {memory:>10.1f} {recall:>10.3f} "
+            f"{np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 95):>8.2f}"
+        )
+        del collection
+
+
+def main() -> None:
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--vectors", type=int, default=200_000, help="Number of stored vectors")
+    parser.add_argument("--dim", type=int, default=384, help="Vector dimension")
+    parser.add_argument("--queries", type=int, default=200, help="Number of timed queries")
+    parser.add_argument("--clusters", type=int, default=500, help="Number of topics in the corpus")
+    parser.add_argument("--space", default="l2", choices=["l2", "cosine", "ip"], help="Distance function")
+    parser.add_argument("--block-size", type=int, default=16384, help="Vectors scored per matrix product")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    corpus = make_corpus(rng, args.vectors, args.dim, args.clusters)
+    # Queries near stored vectors, as for questions about existing notes
+    queries = corpus[rng.integers(0, len(corpus), size=args.queries)]
+    queries = queries + rng.normal(scale=0.3, size=queries.shape).astype(np.float32)
+    run(corpus, queries, args.space, args.block_size)
+
+
+if __name__ == "__main__":
+    main()
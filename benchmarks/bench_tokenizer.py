@@ -0,0 +1,164 @@
+"""
+Lexical tokenizer throughput benchmark.
+
+Generates a synthetic corpus of notes mixing Japanese sentences (kanji,
+hiragana, full- and half-width katakana) with English words, full-width
+Latin text and numbers, then reports the throughput of each tokenizer stage
+and of building the lexical index from the corpus.
+
+Usage:
+    python -m benchmarks.bench_tokenizer [--notes 5000] [--chars 2000] [--repeat 3]
+"""
+
+import argparse
+import random
+import re
+import time
+import unicodedata
+from typing import Callable, List
+
+from obsidian_concierge.repository.chroma import Document
+from obsidian_concierge.repository.lexical_index import LexicalIndex
+from obsidian_concierge.repository.tokenizer import normalize, tokenize
+
+HIRAGANA = [chr(code) for code in range(0x3041, 0x3094)]
+KATAKANA = [chr(code) for code in range(0x30A1, 0x30F5)]
+KANJI = [chr(code) for code in range(0x4E00, 0x4E00 + 2000)]
+ENGLISH = ["project", "meeting", "python", "release", "notes", "draft", "review", "api", "cache", "index"]
+PUNCTUATION = ["。", "、", "！", "？", " ", "\n"]
+# Full-width to half-width katakana, for the letters that have a single
+# half-width form
+HALF_WIDTH = {
+    ord(unicodedata.normalize("NFKC", chr(code))): chr(code)
+    for code in range(0xFF66, 0xFF9E)
+    if len(unicodedata.normalize("NFKC", chr(code))) == 1
+}
+
+# Word tokens only, as a lower bound for the cost of tokenizing
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def _full_width(text: str) -> str:
+    """Convert ASCII letters and digits to their full-width forms."""
+    return "".join(chr(ord(char) + 0xFEE0) if char.isalnum() else char for char in text)
+
+
+def make_corpus(rng: random.Random, notes: int, chars: int) -> List[str]:
+    """
+    Generate notes of mixed Japanese and Latin text.
+
+    Args:
+        rng: Random number generator
+        notes: Number of notes
+        chars: Approximate number of characters per note
+
+    Returns:
+        Note texts
+    """
+    # A fixed vocabulary, so that terms repeat across notes as in a real vault
+    kanji_words = ["".join(rng.choices(KANJI, k=rng.randint(1, 3))) for _ in range(3000)]
+    katakana_words = ["".join(rng.choices(KATAKANA, k=rng.randint(2, 5))) for _ in range(500)]
+    corpus = []
+    for _ in range(notes):
+        parts: List[str] = []
+        length = 0
+        while length < chars:
+            kind = rng.random()
+            if kind < 0.45:
+                part = rng.choice(kanji_words) + "".join(rng.choices(HIRAGANA, k=rng.randint(1, 2)))
+            elif kind < 0.6:
+                part = rng.choice(katakana_words)
+            elif kind < 0.65:
+                # Half-width katakana, as pasted from older documents
+                part = rng.choice(katakana_words).translate(HALF_WIDTH)
+            elif kind < 0.85:
+                part = f" {rng.choice(ENGLISH)} "
+            elif kind < 0.92:
+                part = _full_width(rng.choice(ENGLISH))
+            else:
+                part = f" {rng.randint(0, 9999)} "
+            if rng.random() < 0.2:
+                part += rng.choice(PUNCTUATION)
+            parts.append(part)
+            length += len(part)
+        corpus.append("".join(parts))
+    return corpus
+
+
+def measure(corpus: List[str], fn: Callable[[str], object], repeat: int) -> float:
+    """
+    Time a function over the whole corpus.
+
+    Args:
+        corpus: Texts
+        fn: Function called on every text
+        repeat: Number of runs; the fastest is kept
+
+    Returns:
+        Seconds of the fastest run
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in corpus:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(corpus: List[str], repeat: int) -> None:
+    """
+    Benchmark the tokenizer stages and index building, printing one line each.
+
+    Args:
+        corpus: Note texts
+        repeat: Number of runs per measurement
+    """
+    chars = sum(len(text) for text in corpus)
+    megabytes = sum(len(text.encode("utf-8")) for text in corpus) / 1e6
+    print(f"notes: {len(corpus)}  characters: {chars}  UTF-8 MB: {megabytes:.1f}")
+    print(f"{'stage':<14} {'seconds':>8} {'MB/s':>8} {'Mchars/s':>9} {'tokens':>10}")
+
+    stages = [
+        ("word split", lambda text: WORD_PATTERN.findall(text.lower())),
+        ("normalize", normalize),
+        ("tokenize", tokenize),
+    ]
+    for name, fn in stages:
+        seconds = measure(corpus, fn, repeat)
+        tokens = sum(len(fn(text)) for text in corpus) if name != "normalize" else 0
+        print(
+            f"{name:<14} {seconds:>8.3f} {megabytes / seconds:>8.1f} "
+            f"{chars / seconds / 1e6:>9.2f} {tokens or '-':>10}"
+        )
+
+    documents = [
+        Document(id=f"n{i}#0", content=text, metadata={"parent_id": f"n{i}"})
+        for i, text in enumerate(corpus)
+    ]
+    start = time.perf_counter()
+    index = LexicalIndex()
+    index.add_documents(documents)
+    index.merge()
+    seconds = time.perf_counter() - start
+    print(
+        f"{'index build':<14} {seconds:>8.3f} {megabytes / seconds:>8.1f} "
+        f"{chars / seconds / 1e6:>9.2f} {index.stats()['postings']:>10}"
+    )
+
+
+def main() -> None:
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=5000, help="Number of notes in the corpus")
+    parser.add_argument("--chars", type=int, default=2000, help="Approximate characters per note")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the fastest is kept")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    corpus = make_corpus(random.Random(args.seed), args.notes, args.chars)
+    run(corpus, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
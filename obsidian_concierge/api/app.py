@@ -4,16 +4,34 @@ Main FastAPI application for Obsidian Concierge.
 This module sets up the FastAPI application with middleware and routes.
 """
 
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .routes import router
+from ..utils.config import config
+from .routes import create_watcher, router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Run the vault watcher for the lifetime of the server when enabled."""
+    watcher = create_watcher() if config.VAULT_WATCH_ENABLED else None
+    if watcher is not None:
+        watcher.start()
+    try:
+        yield
+    finally:
+        if watcher is not None:
+            watcher.stop()
 
 # Create FastAPI app
 app = FastAPI(
     title="Obsidian Concierge",
     description="API for searching and querying Obsidian vault content",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
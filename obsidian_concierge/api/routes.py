@@ -1,25 +1,118 @@
 """
 API routes for Obsidian Concierge.
 
-This module defines the API endpoints for search and Q&A functionality.
+This module defines the API endpoints for search, Q&A and indexing functionality.
 """
 
-from typing import List, Optional
+from typing import List, Literal, Optional
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel, Field
 
-from ..services.search import SearchService
+from ..services.search import SearchResultCache, SearchService
 from ..services.qa import QAService
-from ..repository.chroma import ChromaRepository
+from ..services.indexing import IndexJobManager, JobConflictError
+from ..services.related import RelatedNotesService
+from ..indexer.manifest import FileManifest
+from ..indexer.vault_indexer import VaultIndexer
+from ..indexer.watcher import VaultWatcher
+from ..llm.embeddings import OllamaEmbeddingFunction
+from ..repository.chroma import ChromaRepository, SearchQuery
+from ..repository.embedding_cache import EmbeddingCache
+from ..repository.executor import RepositoryExecutor
+from ..repository.lexical_index import LexicalIndex
+from ..repository.numpy_store import NumpyRepository
+from ..repository.query_cache import QueryEmbeddingCache
+from ..utils.config import config
 
 # Initialize router
 router = APIRouter()
 
 # Initialize services
-repo = ChromaRepository(collection_name="obsidian_vault")
-search_service = SearchService(repo)
+embedding_function = None
+if config.EMBEDDING_PROVIDER == "ollama":
+    embedding_function = OllamaEmbeddingFunction(
+        url=config.OLLAMA_BASE_URL,
+        model_name=config.OLLAMA_EMBED_MODEL,
+        max_batch_size=config.OLLAMA_EMBED_BATCH_SIZE,
+        max_batch_chars=config.OLLAMA_EMBED_BATCH_CHARS,
+        concurrency=config.OLLAMA_EMBED_CONCURRENCY,
+        timeout=config.OLLAMA_EMBED_TIMEOUT
+    )
+repository_options = dict(
+    collection_name="obsidian_vault",
+    embedding_function=embedding_function,
+    embedding_cache=EmbeddingCache(
+        config.EMBEDDING_CACHE_PATH,
+        max_entries=config.EMBEDDING_CACHE_MAX_ENTRIES,
+        max_bytes=config.EMBEDDING_CACHE_MAX_BYTES
+    ),
+    executor=RepositoryExecutor(max_workers=config.CHROMA_MAX_CONCURRENCY),
+    query_cache=QueryEmbeddingCache(
+        max_entries=config.QUERY_CACHE_MAX_ENTRIES,
+        max_bytes=config.QUERY_CACHE_MAX_BYTES,
+        ttl=config.QUERY_CACHE_TTL
+    )
+)
+if config.VECTOR_BACKEND == "numpy":
+    repo: ChromaRepository = NumpyRepository(
+        persist_directory=config.NUMPY_STORE_DIR,
+        block_size=config.NUMPY_STORE_BLOCK_SIZE,
+        ivf_lists=config.NUMPY_STORE_IVF_LISTS,
+        ivf_probes=config.NUMPY_STORE_IVF_PROBES,
+        quantization=config.NUMPY_STORE_QUANTIZATION,
+        **repository_options
+    )
+else:
+    repo = ChromaRepository(**repository_options)
+related_notes = RelatedNotesService(
+    repo,
+    graph_path=config.RELATED_NOTES_PATH,
+    k=config.RELATED_NOTES_K,
+    block_size=config.RELATED_NOTES_BLOCK_SIZE,
+    min_interval=config.RELATED_NOTES_SYNC_INTERVAL
+)
+lexical_index = LexicalIndex.load(
+    config.LEXICAL_INDEX_PATH, k1=config.LEXICAL_BM25_K1, b=config.LEXICAL_BM25_B
+) or LexicalIndex(k1=config.LEXICAL_BM25_K1, b=config.LEXICAL_BM25_B)
+search_service = SearchService(
+    repo,
+    result_cache=SearchResultCache(max_entries=config.SEARCH_CACHE_MAX_ENTRIES),
+    related=related_notes,
+    lexical=lexical_index,
+    rrf_k=config.SEARCH_RRF_K
+)
 qa_service = QAService(repo)
 
+
+def _create_indexer() -> VaultIndexer:
+    """Create the indexer used by background index jobs."""
+    return VaultIndexer(
+        config.VAULT_PATH,
+        repo,
+        manifest_path=config.VAULT_MANIFEST_PATH,
+        checkpoint_path=config.VAULT_INDEX_CHECKPOINT_PATH,
+        lexical_index=lexical_index,
+        lexical_index_path=config.LEXICAL_INDEX_PATH
+    )
+
+
+index_jobs = IndexJobManager(_create_indexer)
+
+
+def create_watcher() -> VaultWatcher:
+    """Create the watcher keeping the index up to date while the server runs.
+    
+    The watcher shares the write lock of the index jobs, so that a job and a
+    watcher flush never write the manifest at the same time.
+    """
+    return VaultWatcher(_create_indexer(), write_lock=index_jobs.write_lock)
+
+def _count_indexed_files() -> int:
+    """Count the files recorded in the manifest."""
+    manifest = FileManifest(config.VAULT_MANIFEST_PATH)
+    manifest.load()
+    return len(manifest)
+
 # Health check endpoint
 @router.get("/health")
 async def health_check():
@@ -31,12 +124,36 @@ class SearchRequest(BaseModel):
     query: str = Field(..., description="Search query string")
     limit: Optional[int] = Field(10, description="Maximum number of results to return")
     filters: Optional[dict] = Field(None, description="Optional filters to apply")
+    include_content: bool = Field(
+        True,
+        description="Return the content of each hit; otherwise only metadata, "
+                    "including the stored excerpt, is returned"
+    )
+    mode: Literal["vector", "lexical", "hybrid"] = Field(
+        "vector",
+        description="Ranking: vector similarity (score is a distance, lower is better), "
+                    "BM25 over the inverted index without embedding the query, or both "
+                    "fused by reciprocal rank (scores are higher-is-better)"
+    )
 
 class SearchResponse(BaseModel):
     """Search response model."""
     results: List[dict] = Field(..., description="List of search results")
     total: int = Field(..., description="Total number of results found")
 
+class BatchSearchRequest(BaseModel):
+    """Batch search request model."""
+    queries: List[SearchRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=config.SEARCH_BATCH_MAX_QUERIES,
+        description="Searches to run, each with its own limit and filters"
+    )
+
+class BatchSearchResponse(BaseModel):
+    """Batch search response model."""
+    results: List[SearchResponse] = Field(..., description="Results of each search, in request order")
+
 class QuestionRequest(BaseModel):
     """Question request model."""
     question: str = Field(..., description="Question to answer")
@@ -67,7 +184,9 @@ async def search(request: SearchRequest) -> SearchResponse:
         results = await search_service.search(
             query=request.query,
             limit=request.limit,
-            filters=request.filters
+            filters=request.filters,
+            include_content=request.include_content,
+            mode=request.mode
         )
         return SearchResponse(
             results=results,
@@ -79,6 +198,71 @@ async def search(request: SearchRequest) -> SearchResponse:
             detail=f"Search failed: {str(e)}"
         )
 
+@router.post("/search/batch", response_model=BatchSearchResponse)
+async def search_batch(request: BatchSearchRequest) -> BatchSearchResponse:
+    """
+    Run several searches with one embedding batch and vector query.
+    
+    Lexical and hybrid searches of the batch read the inverted index; the
+    vector part of vector and hybrid searches shares the batched query.
+    
+    Args:
+        request: BatchSearchRequest object containing the searches
+        
+    Returns:
+        BatchSearchResponse object containing the results of each search
+        
+    Raises:
+        HTTPException: If search fails
+    """
+    try:
+        batch_results = await search_service.search_batch([
+            SearchQuery(
+                query=query.query,
+                limit=query.limit,
+                filters=query.filters,
+                include_content=query.include_content,
+                mode=query.mode
+            )
+            for query in request.queries
+        ])
+        return BatchSearchResponse(
+            results=[
+                SearchResponse(results=results, total=len(results))
+                for results in batch_results
+            ]
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Batch search failed: {str(e)}"
+        )
+
+class DocumentResponse(BaseModel):
+    """Document response model."""
+    id: str = Field(..., description="Document ID")
+    content: str = Field(..., description="Document content")
+    metadata: dict = Field(..., description="Document metadata")
+
+@router.get("/documents/{document_id}", response_model=DocumentResponse)
+async def get_document(document_id: str) -> DocumentResponse:
+    """
+    Fetch the content of a document, e.g. a hit of a search without content.
+    
+    Args:
+        document_id: Document ID
+        
+    Returns:
+        DocumentResponse object containing the content and metadata
+        
+    Raises:
+        HTTPException: If the document does not exist
+    """
+    document = await repo.executor.run(repo.get_document, document_id)
+    if document is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown document: {document_id}")
+    return DocumentResponse(id=document.id, content=document.content, metadata=document.metadata)
+
 @router.post("/ask", response_model=QuestionResponse)
 async def ask(request: QuestionRequest) -> QuestionResponse:
     """
@@ -108,4 +292,114 @@ async def ask(request: QuestionRequest) -> QuestionResponse:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Question answering failed: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+
+class IndexRequest(BaseModel):
+    """Index request model."""
+    force: bool = Field(False, description="Re-index every file instead of only changed files")
+    resume: bool = Field(True, description="Continue an interrupted indexing run if one exists")
+
+class IndexJobResponse(BaseModel):
+    """Index job response model."""
+    job_id: str = Field(..., description="Job identifier")
+    full: bool = Field(..., description="Whether every file is re-indexed")
+    status: str = Field(..., description="Job status")
+    created_at: float = Field(..., description="Creation time (UNIX timestamp)")
+    started_at: Optional[float] = Field(None, description="Start time (UNIX timestamp)")
+    finished_at: Optional[float] = Field(None, description="End time (UNIX timestamp)")
+    error: Optional[str] = Field(None, description="Error message of a failed job")
+    counts: Optional[dict] = Field(None, description="Added, updated, renamed, deleted and unchanged files")
+    progress: dict = Field(..., description="Files scanned/parsed/written, throughput and ETA")
+
+@router.post("/index", response_model=IndexJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def start_index(request: IndexRequest) -> IndexJobResponse:
+    """
+    Start indexing the vault in the background.
+    
+    Args:
+        request: IndexRequest object containing indexing options
+        
+    Returns:
+        IndexJobResponse object describing the started job
+        
+    Raises:
+        HTTPException: If another index job is already running
+    """
+    try:
+        job = index_jobs.start(full=request.force, resume=request.resume)
+    except JobConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Index job {e.job.id} is already {e.job.status.value}"
+        )
+    return IndexJobResponse(**job.to_dict())
+
+@router.get("/index/{job_id}", response_model=IndexJobResponse)
+async def get_index_job(job_id: str) -> IndexJobResponse:
+    """
+    Get the status and progress of an index job.
+    
+    Args:
+        job_id: Job identifier
+        
+    Returns:
+        IndexJobResponse object describing the job
+        
+    Raises:
+        HTTPException: If the job is unknown
+    """
+    job = index_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown index job: {job_id}")
+    return IndexJobResponse(**job.to_dict())
+
+@router.delete("/index/{job_id}", response_model=IndexJobResponse)
+async def cancel_index_job(job_id: str) -> IndexJobResponse:
+    """
+    Cancel an index job.
+    
+    Args:
+        job_id: Job identifier
+        
+    Returns:
+        IndexJobResponse object describing the job
+        
+    Raises:
+        HTTPException: If the job is unknown
+    """
+    try:
+        job = index_jobs.cancel(job_id)
+    except KeyError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown index job: {job_id}")
+    return IndexJobResponse(**job.to_dict())
+
+@router.get("/stats")
+async def get_stats() -> dict:
+    """
+    Get vault and index statistics.
+    
+    Returns:
+        Indexed file and document counts, the latest index job, repository
+        thread pool metrics, embedding, query and search result cache
+        statistics and the state of the related-notes graph and lexical index
+    """
+    jobs = index_jobs.jobs()
+    stats = {
+        # Reading the manifest is file I/O, kept off the event loop
+        "indexed_files": await repo.executor.run(_count_indexed_files),
+        "documents": await repo.count(),
+        "index_job": jobs[0].to_dict() if jobs else None,
+        "repository": {**repo.executor.stats(), "backend": config.VECTOR_BACKEND}
+    }
+    if repo.embedding_cache is not None:
+        stats["embedding_cache"] = repo.embedding_cache.stats()
+    if repo.query_cache is not None:
+        stats["query_cache"] = repo.query_cache.stats()
+    if search_service.result_cache is not None:
+        stats["search_cache"] = {
+            **search_service.result_cache.stats(),
+            "generation": repo.generation
+        }
+    stats["related_notes"] = related_notes.stats()
+    stats["lexical_index"] = lexical_index.stats()
+    return stats
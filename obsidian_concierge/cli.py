@@ -92,13 +92,30 @@ class ObsidianConciergeClient:
                 sys.exit(1)
 
     # Vault管理コマンド
-    async def index_vault(self, force: bool = False) -> None:
+    async def index_vault(self, force: bool = False, poll_interval: float = 1.0) -> None:
         """Vaultのインデックスを作成/更新します"""
         console.print("Indexing vault...", style="yellow")
         data = {"force": force}
-        result = await self._make_request("POST", "/api/v1/index", data)
-        console.print("Vault indexed successfully!", style="green")
-        console.print(result)
+        job = await self._make_request("POST", "/api/v1/index", data)
+        
+        # インデックス作成はバックグラウンドジョブなので完了までポーリングする
+        with console.status("Indexing...") as status:
+            while job["status"] in ("pending", "running"):
+                await asyncio.sleep(poll_interval)
+                job = await self._make_request("GET", f"/api/v1/index/{job['job_id']}")
+                progress = job["progress"]
+                eta = progress.get("eta_seconds")
+                status.update(
+                    f"Indexing... {progress['files_written']} files written, "
+                    f"{progress['files_per_sec']} files/s"
+                    + (f", ETA {eta:.0f}s" if eta is not None else "")
+                )
+        
+        if job["status"] == "completed":
+            console.print("Vault indexed successfully!", style="green")
+        else:
+            console.print(f"Indexing {job['status']}: {job.get('error') or ''}", style="red")
+        console.print(job)
 
     async def get_vault_stats(self) -> None:
         """Vaultの統計情報を取得します"""
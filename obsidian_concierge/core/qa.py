@@ -8,7 +8,7 @@ from typing import List, Optional, Dict, Any
 import logging
 from pydantic import BaseModel
 
-from ..db.chroma import ChromaRepository
+from ..repository.chroma import ChromaRepository, collapse_chunks
 from ..llm.ollama import OllamaClient
 
 logger = logging.getLogger(__name__)
@@ -62,7 +62,7 @@ class QAService:
         
         try:
             # Search for relevant documents
-            documents = self.repository.query(
+            documents = await self.repository.aquery(
                 query_text=question,
                 n_results=max_context_items
             )
@@ -96,12 +96,12 @@ class QAService:
                 temperature=temperature
             )
             
-            # Prepare sources
+            # Prepare sources, one per note even if several of its chunks were used
             sources = []
-            for doc in documents:
+            for doc in collapse_chunks(documents, lambda doc: doc.metadata):
                 title = doc.metadata.get("title", doc.metadata.get("filename", "Untitled"))
                 source = Source(
-                    id=doc.id,
+                    id=doc.metadata.get("parent_id", doc.id),
                     title=title,
                     path=doc.metadata.get("path", "")
                 )
@@ -8,7 +8,8 @@ from typing import List, Optional, Dict, Any
 import logging
 from pydantic import BaseModel
 
-from ..db.chroma import ChromaRepository, Document
+from ..repository.chroma import (CHUNK_OVERFETCH, EXCERPT_KEY, ChromaRepository, Document,
+                                 collapse_chunks, make_excerpt)
 
 logger = logging.getLogger(__name__)
 
@@ -51,26 +52,35 @@ class SearchService:
         
         try:
             # Convert filters to ChromaDB format
-            where_condition = self._convert_filters(filters) if filters else None
+            where_condition = (self._convert_filters(filters) or None) if filters else None
             
-            # Execute search
-            documents = self.repository.query(
+            # Execute search, fetching extra chunk hits and collapsing them
+            # back to one hit per note. Only metadata is fetched; results
+            # show the excerpt stored at index time.
+            documents = await self.repository.aquery(
                 query_text=query,
-                n_results=limit,
-                where=where_condition
+                n_results=limit * CHUNK_OVERFETCH,
+                where=where_condition,
+                include_content=False
             )
+            documents = collapse_chunks(documents, lambda doc: doc.metadata, limit)
+            
+            # Documents indexed before excerpts were stored need their content
+            missing = [doc.id for doc in documents if EXCERPT_KEY not in doc.metadata]
+            contents = await self.repository.afetch_content(missing) if missing else {}
             
             # Convert to search results
             results = []
             for doc in documents:
-                # Create excerpt (first 200 characters)
-                excerpt = doc.content[:200] + "..." if len(doc.content) > 200 else doc.content
+                excerpt = doc.metadata.get(EXCERPT_KEY)
+                if excerpt is None:
+                    excerpt = make_excerpt(contents.get(doc.id) or "")
                 
                 # Get title from metadata or use filename
                 title = doc.metadata.get("title", doc.metadata.get("filename", "Untitled"))
                 
                 result = SearchResult(
-                    id=doc.id,
+                    id=doc.metadata.get("parent_id", doc.id),
                     title=title,
                     path=doc.metadata.get("path", ""),
                     excerpt=excerpt,
@@ -94,29 +104,39 @@ class SearchService:
         Returns:
             ChromaDB compatible where conditions
         """
-        where = {}
+        conditions: List[Dict[str, Any]] = []
         
-        # Handle tag filters
-        if "tags" in filters:
-            tags = filters["tags"]
-            if isinstance(tags, str):
-                tags = [tags]
-            where["tags"] = {"$in": tags}
+        # Handle tag and alias filters; both are stored as list metadata, so
+        # a note matches if it contains any of the requested values
+        for key in ("tags", "aliases"):
+            if key in filters:
+                values = filters[key]
+                if isinstance(values, str):
+                    values = [values]
+                values = [value.lstrip("#") if key == "tags" else value for value in values]
+                matches = [{key: {"$contains": value}} for value in values]
+                if len(matches) == 1:
+                    conditions.append(matches[0])
+                elif matches:
+                    conditions.append({"$or": matches})
         
         # Handle folder filters
         if "folder" in filters:
             folder = filters["folder"]
-            where["path"] = {"$contains": folder}
+            conditions.append({"path": {"$contains": folder}})
         
         # Handle date filters
         if "created_after" in filters:
-            where["created_at"] = {"$gte": filters["created_after"]}
+            conditions.append({"created_at": {"$gte": filters["created_after"]}})
         if "created_before" in filters:
-            where["created_at"] = {"$lte": filters["created_before"]}
+            conditions.append({"created_at": {"$lte": filters["created_before"]}})
         
         # Pass through any other metadata filters
         for key, value in filters.items():
-            if key not in ["tags", "folder", "created_after", "created_before"]:
-                where[key] = value
+            if key not in ["tags", "aliases", "folder", "created_after", "created_before"]:
+                conditions.append({key: value})
         
-        return where 
\ No newline at end of file
+        # ChromaDB requires multiple conditions to be combined explicitly
+        if len(conditions) > 1:
+            return {"$and": conditions}
+        return conditions[0] if conditions else {} 
\ No newline at end of file
@@ -0,0 +1,205 @@
+"""
+Adaptive write batching.
+
+This module sizes repository write batches by content bytes and estimated
+tokens instead of a fixed document count, and tunes the byte budget from the
+observed throughput of each batch so that indexing settles on the most
+efficient batch size the embedder allows.
+"""
+
+import threading
+from typing import Iterator, List, Optional, Sequence
+
+from ..repository.chroma import Document
+from ..utils.logging import logger
+
+# Rough number of UTF-8 bytes per token for budgeting purposes
+BYTES_PER_TOKEN = 4
+
+
+def document_bytes(document: Document) -> int:
+    """
+    Get the UTF-8 size of a document's content.
+
+    Args:
+        document: Document to measure
+
+    Returns:
+        Size in bytes
+    """
+    return len(document.content.encode("utf-8"))
+
+
+def estimate_tokens(nbytes: int) -> int:
+    """
+    Estimate the number of tokens of a text from its size.
+
+    Args:
+        nbytes: UTF-8 size of the text
+
+    Returns:
+        Estimated token count
+    """
+    return (nbytes + BYTES_PER_TOKEN - 1) // BYTES_PER_TOKEN
+
+
+class AdaptiveBatchSizer:
+    """Byte-budgeted batch sizing tuned by hill climbing on throughput.
+
+    After each representative batch the budget moves by a multiplicative
+    step. While throughput (bytes per second) stays close to the best seen
+    since the last turn the budget keeps moving in the same direction; when
+    it falls clearly below, the direction reverses and the step shrinks, so
+    the budget oscillates ever closer around the fastest size. The budget
+    never leaves ``[min_bytes, max_bytes]``, and a batch never exceeds
+    ``max_bytes``, ``max_tokens`` or ``max_count``.
+    """
+
+    def __init__(
+        self,
+        initial_bytes: int = 262_144,
+        min_bytes: int = 16_384,
+        max_bytes: int = 4_194_304,
+        max_count: int = 100,
+        max_tokens: Optional[int] = None,
+        max_latency: Optional[float] = None,
+        step: float = 1.5,
+        tolerance: float = 0.05
+    ):
+        """
+        Initialize the sizer.
+
+        Args:
+            initial_bytes: Starting byte budget per batch
+            min_bytes: Smallest byte budget the sizer may choose
+            max_bytes: Hard limit on the bytes of a single write request
+            max_count: Hard limit on the documents of a single write request
+            max_tokens: Optional hard limit on the estimated tokens of a
+                single write request
+            max_latency: Optional seconds a batch may take; slower batches
+                always shrink the budget
+            step: Initial multiplicative step of the budget
+            tolerance: Relative throughput drop treated as noise
+
+        Raises:
+            ValueError: If the limits are inconsistent
+        """
+        if min_bytes < 1 or max_bytes < min_bytes:
+            raise ValueError("byte limits must satisfy 1 <= min_bytes <= max_bytes")
+        if max_count < 1:
+            raise ValueError("max_count must be at least 1")
+        if step <= 1.0:
+            raise ValueError("step must be greater than 1")
+
+        self.min_bytes = min_bytes
+        self.max_bytes = max_bytes
+        self.max_count = max_count
+        self.max_tokens = max_tokens
+        self.max_latency = max_latency
+        self.tolerance = tolerance
+        self.budget_bytes = min(max(initial_bytes, min_bytes), max_bytes)
+        self._step = step
+        self._min_step = 1.0 + (step - 1.0) / 8
+        self._direction = 1
+        self._best_throughput: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _over_limit(self, count: int, nbytes: int, limit_bytes: int) -> bool:
+        """Check whether a batch reaches a byte, token or count limit."""
+        if count >= self.max_count or nbytes >= limit_bytes:
+            return True
+        return self.max_tokens is not None and estimate_tokens(nbytes) >= self.max_tokens
+
+    def is_full(self, count: int, nbytes: int) -> bool:
+        """
+        Check whether a batch should be written.
+
+        Args:
+            count: Number of documents in the batch
+            nbytes: Content bytes in the batch
+
+        Returns:
+            True if the batch reached the current budget or a hard limit
+        """
+        return self._over_limit(count, nbytes, self.budget_bytes)
+
+    def fits(self, count: int, nbytes: int) -> bool:
+        """
+        Check whether a batch stays within the hard request limits.
+
+        Args:
+            count: Number of documents in the batch
+            nbytes: Content bytes in the batch
+
+        Returns:
+            True if the batch can be sent in a single request
+        """
+        if count > self.max_count or nbytes > self.max_bytes:
+            return False
+        return self.max_tokens is None or estimate_tokens(nbytes) <= self.max_tokens
+
+    def split(self, documents: Sequence[Document]) -> Iterator[List[Document]]:
+        """
+        Split documents into requests within the hard limits.
+
+        A single document larger than the limits is sent on its own.
+
+        Args:
+            documents: Documents to write
+
+        Yields:
+            Consecutive slices of the documents
+        """
+        current: List[Document] = []
+        current_bytes = 0
+        for document in documents:
+            size = document_bytes(document)
+            if current and not self.fits(len(current) + 1, current_bytes + size):
+                yield current
+                current = []
+                current_bytes = 0
+            current.append(document)
+            current_bytes += size
+        if current:
+            yield current
+
+    def observe(self, nbytes: int, seconds: float) -> None:
+        """
+        Adapt the budget to the latency of a written batch.
+
+        Batches much smaller than the budget (cut short by the count limit
+        or by the end of the run) say little about the budget and are
+        ignored unless they were too slow.
+
+        Args:
+            nbytes: Content bytes of the batch
+            seconds: Time the write took
+        """
+        if nbytes <= 0 or seconds <= 0:
+            return
+
+        with self._lock:
+            too_slow = self.max_latency is not None and seconds > self.max_latency
+            if not too_slow and nbytes < self.budget_bytes / 2:
+                return
+
+            throughput = nbytes / seconds
+            if too_slow:
+                self._direction = -1
+            elif (
+                self._best_throughput is not None
+                and throughput < self._best_throughput * (1 - self.tolerance)
+            ):
+                # Past the optimum: turn around with a smaller step
+                self._direction = -self._direction
+                self._step = max(1.0 + (self._step - 1.0) / 2, self._min_step)
+                self._best_throughput = throughput
+            if self._best_throughput is None or throughput > self._best_throughput:
+                self._best_throughput = throughput
+
+            budget = self.budget_bytes * self._step ** self._direction
+            self.budget_bytes = int(min(max(budget, self.min_bytes), self.max_bytes))
+            logger.debug(
+                f"Batch of {nbytes} bytes took {seconds:.3f}s "
+                f"({throughput:.0f} B/s); budget now {self.budget_bytes} bytes"
+            )
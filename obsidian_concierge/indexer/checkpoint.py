@@ -0,0 +1,143 @@
+"""
+Index job checkpoints.
+
+This module records the progress of an indexing run in an append-only log so
+that a run killed halfway (crash, OOM, restart of the embedding server) can be
+resumed from its last committed batch instead of from the first file.
+"""
+
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ..utils.logging import logger
+from .manifest import ManifestEntry
+
+
+@dataclass
+class CheckpointState:
+    """Progress recorded by an interrupted indexing run."""
+    started_at: float
+    incremental: bool
+    batches: int = 0
+    committed: Dict[str, ManifestEntry] = field(default_factory=dict)
+    last_batch: List[str] = field(default_factory=list)
+
+
+class IndexCheckpoint:
+    """Append-only log of the batches committed by an indexing run.
+
+    The log starts with a header line describing the run, followed by one
+    line per committed batch listing the manifest entries of its files.
+    Appending keeps each commit proportional to the batch size, and a
+    truncated last line (from a crash mid-write) is ignored on load.
+    """
+
+    def __init__(self, checkpoint_path: str | Path):
+        """
+        Initialize the checkpoint.
+
+        Args:
+            checkpoint_path: Path of the checkpoint log
+        """
+        self.checkpoint_path = Path(checkpoint_path)
+        self._batches = 0
+
+    def exists(self) -> bool:
+        """
+        Check whether an unfinished run left a checkpoint.
+
+        Returns:
+            True if a checkpoint log exists
+        """
+        return self.checkpoint_path.exists()
+
+    def start(self, incremental: bool, resume_from: Optional[CheckpointState] = None) -> None:
+        """
+        Begin recording a run.
+
+        Args:
+            incremental: Whether the run is incremental
+            resume_from: State of the interrupted run being resumed; its log
+                is kept and appended to
+        """
+        if resume_from is not None:
+            self._batches = resume_from.batches
+            return
+
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        self._batches = 0
+        header = {"type": "start", "started_at": time.time(), "incremental": incremental}
+        with open(self.checkpoint_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(header) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def commit(self, entries: List[ManifestEntry]) -> None:
+        """
+        Record files whose documents were written to the repository.
+
+        The record is forced to disk before returning.
+
+        Args:
+            entries: Manifest entries of the committed files
+        """
+        if not entries:
+            return
+        self._batches += 1
+        record = {
+            "type": "batch",
+            "batch": self._batches,
+            "files": [asdict(entry) for entry in entries]
+        }
+        with open(self.checkpoint_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def load(self) -> Optional[CheckpointState]:
+        """
+        Read the progress of an interrupted run.
+
+        Returns:
+            Recorded state, or None if there is no usable checkpoint
+        """
+        if not self.checkpoint_path.exists():
+            return None
+
+        state: Optional[CheckpointState] = None
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Partially written last record
+                        logger.warning(f"Ignoring truncated checkpoint record in {self.checkpoint_path}")
+                        break
+                    if record.get("type") == "start":
+                        state = CheckpointState(
+                            started_at=record.get("started_at", 0.0),
+                            incremental=record.get("incremental", False)
+                        )
+                    elif record.get("type") == "batch" and state is not None:
+                        files = [ManifestEntry(**entry) for entry in record["files"]]
+                        for entry in files:
+                            state.committed[entry.path] = entry
+                        state.batches = record.get("batch", state.batches + 1)
+                        state.last_batch = [entry.path for entry in files]
+        except (OSError, TypeError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.checkpoint_path}: {e}")
+            return None
+        return state
+
+    def complete(self) -> None:
+        """Discard the checkpoint after a successful run."""
+        try:
+            self.checkpoint_path.unlink()
+        except FileNotFoundError:
+            pass
+        self._batches = 0
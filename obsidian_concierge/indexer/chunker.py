@@ -0,0 +1,173 @@
+"""
+Markdown chunker implementation.
+
+This module splits notes into heading-aware chunks that fit an embedding
+budget, so that long notes are stored as several focused sub-documents.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+HEADING_PATH_SEPARATOR = " > "
+
+_HEADING_RE = re.compile(r"^(#{1,6})[ \t]+(.+?)[ \t#]*$")
+_FENCE_RE = re.compile(r"^[ \t]*(```|~~~)")
+
+
+@dataclass
+class Chunk:
+    """A contiguous part of a note."""
+    content: str
+    ordinal: int = 0
+    heading_path: List[str] = field(default_factory=list)
+
+
+def chunk_id(document_id: str, ordinal: int) -> str:
+    """
+    Build the ID of a chunk from its note's document ID.
+
+    Args:
+        document_id: Document ID of the parent note
+        ordinal: Position of the chunk within the note
+
+    Returns:
+        Chunk ID
+    """
+    return f"{document_id}-{ordinal}"
+
+
+class MarkdownChunker:
+    """Split markdown notes on headings and then on a character budget."""
+
+    def __init__(self, max_chars: int = 1000, overlap: int = 200):
+        """
+        Initialize the chunker.
+
+        Args:
+            max_chars: Maximum number of characters per chunk
+            overlap: Number of characters shared by consecutive windows of an
+                oversized section
+
+        Raises:
+            ValueError: If the budget or overlap is invalid
+        """
+        if max_chars < 1:
+            raise ValueError("max_chars must be at least 1")
+        if not 0 <= overlap < max_chars:
+            raise ValueError("overlap must be between 0 and max_chars")
+
+        self.max_chars = max_chars
+        self.overlap = overlap
+
+    def _sections(self, text: str) -> List[Tuple[List[str], str]]:
+        """
+        Split text into sections starting at each heading.
+
+        Headings inside fenced code blocks are ignored.
+
+        Args:
+            text: Markdown text
+
+        Returns:
+            List of (heading path, section text) tuples
+        """
+        sections: List[Tuple[List[str], str]] = []
+        path: List[Tuple[int, str]] = []
+        current: List[str] = []
+        current_path: List[str] = []
+        has_body = False
+        in_fence = False
+
+        for line in text.splitlines(keepends=True):
+            if _FENCE_RE.match(line):
+                in_fence = not in_fence
+            match = None if in_fence else _HEADING_RE.match(line.rstrip("\r\n"))
+            if match:
+                # Headings without body text stay with the following section
+                if has_body:
+                    sections.append((current_path, "".join(current)))
+                    current = []
+                    has_body = False
+                level = len(match.group(1))
+                path = [(lvl, title) for lvl, title in path if lvl < level]
+                path.append((level, match.group(2)))
+                current_path = [title for _, title in path]
+            elif line.strip():
+                has_body = True
+            current.append(line)
+
+        if "".join(current).strip():
+            sections.append((current_path, "".join(current)))
+        return sections
+
+    def _windows(self, text: str) -> List[str]:
+        """
+        Split an oversized section into overlapping windows.
+
+        Windows end at a paragraph, line or word boundary where possible.
+
+        Args:
+            text: Section text
+
+        Returns:
+            List of window texts
+        """
+        windows = []
+        start = 0
+        while start < len(text):
+            end = min(start + self.max_chars, len(text))
+            if end < len(text):
+                floor = start + self.max_chars // 2
+                for separator in ("\n\n", "\n", " "):
+                    cut = text.rfind(separator, floor, end)
+                    if cut != -1:
+                        end = cut + len(separator)
+                        break
+            windows.append(text[start:end])
+            if end >= len(text):
+                break
+            start = max(end - self.overlap, start + 1)
+        return windows
+
+    def split(self, text: str) -> List[Chunk]:
+        """
+        Split a note into chunks.
+
+        A note that fits the budget is returned as a single chunk with its
+        text unchanged. Otherwise the note is split on headings, oversized
+        sections are windowed with overlap, and consecutive small sections
+        are packed together up to the budget.
+
+        Args:
+            text: Markdown text
+
+        Returns:
+            List of chunks in document order
+        """
+        sections = self._sections(text)
+        if not sections:
+            return []
+        if len(text) <= self.max_chars:
+            return [Chunk(content=text, ordinal=0, heading_path=sections[0][0])]
+
+        pieces: List[Tuple[List[str], str, bool]] = []
+        for heading_path, section in sections:
+            if len(section) > self.max_chars:
+                pieces.extend((heading_path, window, False) for window in self._windows(section))
+            else:
+                pieces.append((heading_path, section, True))
+
+        chunks: List[Chunk] = []
+        packable = False
+        for heading_path, piece, can_pack in pieces:
+            if (
+                chunks and packable and can_pack
+                and len(chunks[-1].content) + len(piece) <= self.max_chars
+            ):
+                chunks[-1].content += piece
+                continue
+            chunks.append(Chunk(content=piece, ordinal=len(chunks), heading_path=heading_path))
+            packable = can_pack
+        return chunks
+
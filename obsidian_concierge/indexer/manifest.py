@@ -0,0 +1,156 @@
+"""
+Vault file manifest.
+
+This module keeps a persisted record of every indexed vault file (path, size,
+mtime, content hash and document ID) so that the indexer can detect added,
+changed and removed files without re-reading the whole vault.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from ..utils.logging import logger
+
+MANIFEST_VERSION = 2
+
+
+@dataclass
+class ManifestEntry:
+    """State of a single indexed file."""
+    path: str
+    size: int
+    mtime_ns: int
+    content_hash: str
+    document_id: str
+    chunk_count: int = 1
+
+    def matches_stat(self, stat: os.stat_result) -> bool:
+        """
+        Check whether a stat result matches the recorded file state.
+
+        Args:
+            stat: Current stat result of the file
+
+        Returns:
+            True if size and modification time are unchanged
+        """
+        return self.size == stat.st_size and self.mtime_ns == stat.st_mtime_ns
+
+
+def hash_content(content: str) -> str:
+    """
+    Compute the content hash used for change detection.
+
+    Args:
+        content: File content
+
+    Returns:
+        Hex digest of the content
+    """
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class FileManifest:
+    """Persisted mapping of relative file paths to their indexed state."""
+
+    def __init__(self, manifest_path: str | Path):
+        """
+        Initialize the manifest.
+
+        Args:
+            manifest_path: Path of the JSON file the manifest is stored in
+        """
+        self.manifest_path = Path(manifest_path)
+        self._entries: Dict[str, ManifestEntry] = {}
+
+    def load(self) -> None:
+        """Load entries from disk, starting empty if no manifest exists."""
+        self._entries = {}
+        if not self.manifest_path.exists():
+            return
+
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable manifest {self.manifest_path}: {e}")
+            return
+
+        if data.get("version") != MANIFEST_VERSION:
+            logger.warning(f"Ignoring manifest with unsupported version: {data.get('version')}")
+            return
+
+        for path, entry in data.get("files", {}).items():
+            self._entries[path] = ManifestEntry(path=path, **entry)
+
+    def save(self) -> None:
+        """Atomically write entries to disk."""
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": MANIFEST_VERSION,
+            "files": {
+                path: {k: v for k, v in asdict(entry).items() if k != "path"}
+                for path, entry in self._entries.items()
+            }
+        }
+
+        tmp_path = self.manifest_path.with_suffix(self.manifest_path.suffix + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def get(self, path: str) -> Optional[ManifestEntry]:
+        """
+        Get the entry for a relative path.
+
+        Args:
+            path: Path relative to the vault root
+
+        Returns:
+            Manifest entry or None if the path is not recorded
+        """
+        return self._entries.get(path)
+
+    def set(self, entry: ManifestEntry) -> None:
+        """
+        Record or replace an entry.
+
+        Args:
+            entry: Manifest entry to store
+        """
+        self._entries[entry.path] = entry
+
+    def remove(self, path: str) -> None:
+        """
+        Forget an entry.
+
+        Args:
+            path: Path relative to the vault root
+        """
+        self._entries.pop(path, None)
+
+    def clear(self) -> None:
+        """Forget all entries."""
+        self._entries = {}
+
+    def entries(self) -> Dict[str, ManifestEntry]:
+        """
+        Get a snapshot of all entries.
+
+        Returns:
+            Mapping of relative path to manifest entry
+        """
+        return dict(self._entries)
+
+    def __contains__(self, path: object) -> bool:
+        return path in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
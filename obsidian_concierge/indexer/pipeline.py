@@ -0,0 +1,255 @@
+"""
+Staged indexing pipeline.
+
+This module provides a producer/consumer pipeline used by the vault indexer:
+a feeder thread enumerates work items, a pool of worker threads reads and
+parses them, and the calling thread drains the results through a bounded
+queue so that disk I/O and parsing overlap with repository writes.
+"""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Generic, Iterable, Optional, TypeVar
+
+from ..utils.logging import logger
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_DONE = object()
+_POLL_INTERVAL = 0.1
+
+
+@dataclass
+class StageStats:
+    """Throughput counters for a single pipeline stage."""
+    files: int = 0
+    bytes: int = 0
+    busy_seconds: float = 0.0
+
+
+@dataclass
+class PipelineStats:
+    """Per-stage throughput statistics of a pipeline run."""
+    workers: int = 1
+    started_at: float = field(default_factory=time.perf_counter)
+    finished_at: Optional[float] = None
+    stages: Dict[str, StageStats] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self._lock = threading.Lock()
+        self._completed: set = set()
+
+    def record(self, stage: str, files: int = 1, nbytes: int = 0, seconds: float = 0.0) -> None:
+        """
+        Add work done by a stage.
+
+        Args:
+            stage: Stage name
+            files: Number of files processed
+            nbytes: Number of bytes processed
+            seconds: Time spent processing
+        """
+        with self._lock:
+            stats = self.stages.setdefault(stage, StageStats())
+            stats.files += files
+            stats.bytes += nbytes
+            stats.busy_seconds += seconds
+
+    def files(self, stage: str) -> int:
+        """
+        Get the number of files a stage has processed so far.
+
+        Args:
+            stage: Stage name
+
+        Returns:
+            Number of processed files
+        """
+        with self._lock:
+            stats = self.stages.get(stage)
+            return stats.files if stats else 0
+
+    def complete(self, stage: str) -> None:
+        """
+        Mark a stage as having processed all of its input.
+
+        Args:
+            stage: Stage name
+        """
+        with self._lock:
+            self._completed.add(stage)
+
+    def is_complete(self, stage: str) -> bool:
+        """
+        Check whether a stage has processed all of its input.
+
+        Args:
+            stage: Stage name
+
+        Returns:
+            True if the stage was marked complete
+        """
+        with self._lock:
+            return stage in self._completed
+
+    def finish(self) -> None:
+        """Mark the run as finished."""
+        self.finished_at = time.perf_counter()
+
+    @property
+    def wall_seconds(self) -> float:
+        """Elapsed wall time of the run."""
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize per-stage throughput.
+
+        ``files_per_sec`` and ``bytes_per_sec`` are measured against wall time.
+        ``utilization`` is the fraction of the stage's available thread time
+        spent busy; a stage close to 1.0 is the bottleneck.
+
+        Returns:
+            Dictionary with wall time and per-stage statistics
+        """
+        wall = max(self.wall_seconds, 1e-9)
+        stages = {}
+        for name, stats in self.stages.items():
+            threads = self.workers if name == "read" else 1
+            stages[name] = {
+                "files": stats.files,
+                "bytes": stats.bytes,
+                "busy_seconds": round(stats.busy_seconds, 3),
+                "files_per_sec": round(stats.files / wall, 1),
+                "bytes_per_sec": round(stats.bytes / wall, 1),
+                "utilization": round(stats.busy_seconds / (wall * threads), 3),
+            }
+        return {"workers": self.workers, "wall_seconds": round(wall, 3), "stages": stages}
+
+
+class IndexPipeline(Generic[T, R]):
+    """Bounded-queue pipeline with parallel workers and a single consumer."""
+
+    def __init__(self, workers: int = 4, queue_size: int = 256):
+        """
+        Initialize the pipeline.
+
+        Args:
+            workers: Number of worker threads running the process step
+            queue_size: Maximum number of items buffered between stages
+
+        Raises:
+            ValueError: If workers or queue_size is not positive
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+
+        self.workers = workers
+        self.queue_size = queue_size
+
+    def run(
+        self,
+        items: Iterable[T],
+        process: Callable[[T], Optional[R]],
+        consume: Callable[[R], None],
+        size_of: Optional[Callable[[R], int]] = None,
+        stats: Optional[PipelineStats] = None
+    ) -> PipelineStats:
+        """
+        Run items through the pipeline.
+
+        ``items`` is iterated on a feeder thread, ``process`` runs on the
+        worker pool and ``consume`` runs on the calling thread in completion
+        order. Results of None are dropped. The first exception raised by any
+        stage stops the pipeline and is re-raised here.
+
+        Args:
+            items: Work items to process
+            process: Function turning a work item into a result
+            consume: Function receiving each result
+            size_of: Optional function returning the byte size of a result
+            stats: Optional statistics object to record into
+
+        Returns:
+            Statistics of the run
+        """
+        stats = stats or PipelineStats(workers=self.workers)
+        inbox: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        outbox: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+
+        def put(q: queue.Queue, item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=_POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def feed() -> None:
+            try:
+                for item in items:
+                    if not put(inbox, item):
+                        return
+            except BaseException as e:
+                put(outbox, e)
+            finally:
+                for _ in range(self.workers):
+                    put(inbox, _DONE)
+
+        def work() -> None:
+            try:
+                while not stop.is_set():
+                    try:
+                        item = inbox.get(timeout=_POLL_INTERVAL)
+                    except queue.Empty:
+                        continue
+                    if item is _DONE:
+                        break
+                    start = time.perf_counter()
+                    result = process(item)
+                    nbytes = size_of(result) if size_of and result is not None else 0
+                    stats.record("read", nbytes=nbytes, seconds=time.perf_counter() - start)
+                    if result is not None and not put(outbox, result):
+                        return
+            except BaseException as e:
+                put(outbox, e)
+            finally:
+                put(outbox, _DONE)
+
+        threads = [threading.Thread(target=feed, name="index-feeder", daemon=True)]
+        threads += [
+            threading.Thread(target=work, name=f"index-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            remaining = self.workers
+            while remaining:
+                result = outbox.get()
+                if result is _DONE:
+                    remaining -= 1
+                    continue
+                if isinstance(result, BaseException):
+                    raise result
+                start = time.perf_counter()
+                consume(result)
+                nbytes = size_of(result) if size_of else 0
+                stats.record("write", nbytes=nbytes, seconds=time.perf_counter() - start)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            stats.finish()
+
+        logger.debug(f"Pipeline finished: {stats.summary()}")
+        return stats
@@ -7,57 +7,131 @@ into ChromaDB for efficient searching and retrieval.
 
 import os
 import hashlib
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any, Generator
+from typing import List, Dict, Any, Generator, Iterable, Optional, Tuple
 
-from ..db.chroma import ChromaRepository, Document
+from ..repository.chroma import EXCERPT_KEY, ChromaRepository, Document, make_excerpt
+from ..repository.lexical_index import LexicalIndex
 from ..utils.config import config
-from ..utils.fs import list_files, is_text_file
+from ..utils.fs import DEFAULT_IGNORED_DIRS, is_ignored, read_text_file, walk_files
 from ..utils.logging import logger
+from .batching import AdaptiveBatchSizer, document_bytes
+from .checkpoint import CheckpointState, IndexCheckpoint
+from .chunker import HEADING_PATH_SEPARATOR, MarkdownChunker, chunk_id
+from .manifest import FileManifest, ManifestEntry, hash_content
+from .parser import parse_note
+from .pipeline import IndexPipeline, PipelineStats
+
+# (file path, stat result, previous manifest entry)
+_WorkItem = Tuple[Path, os.stat_result, Optional[ManifestEntry]]
+# (chunk documents, new manifest entry, previous manifest entry)
+_BuiltFile = Tuple[List[Document], ManifestEntry, Optional[ManifestEntry]]
+
+
+class IndexingCancelled(Exception):
+    """Raised when an indexing run is cancelled."""
 
 
 class VaultIndexer:
     """Class for indexing Obsidian vault contents."""
     
-    def __init__(self, vault_path: str, repo: ChromaRepository):
+    def __init__(
+        self,
+        vault_path: str,
+        repo: ChromaRepository,
+        manifest_path: Optional[str] = None,
+        chunker: Optional[MarkdownChunker] = None,
+        ignore_patterns: Optional[List[str]] = None,
+        checkpoint_path: Optional[str] = None,
+        lexical_index: Optional[LexicalIndex] = None,
+        lexical_index_path: Optional[str] = None
+    ):
         """
         Initialize vault indexer.
         
         Args:
             vault_path: Path to Obsidian vault
             repo: ChromaDB repository instance
+            manifest_path: Optional path of the file manifest used for
+                incremental indexing (see ``config.VAULT_MANIFEST_PATH``)
+            chunker: Optional chunker splitting notes into sub-documents
+                (defaults to ``config.VAULT_CHUNK_SIZE``/``VAULT_CHUNK_OVERLAP``)
+            ignore_patterns: Glob patterns of vault paths to skip in addition
+                to ``.obsidian``, ``.trash`` and ``.git`` (defaults to
+                ``config.VAULT_IGNORE_PATTERNS``)
+            checkpoint_path: Optional path of the log recording committed
+                batches, which lets an interrupted run be resumed (see
+                ``config.VAULT_INDEX_CHECKPOINT_PATH``)
+            lexical_index: Optional inverted index kept in step with the
+                repository by every write of the indexer
+            lexical_index_path: Optional file the lexical index is saved to
+                whenever the manifest is saved (see
+                ``config.LEXICAL_INDEX_PATH``)
         """
         self.vault_path = Path(vault_path)
         if not self.vault_path.exists():
             raise ValueError(f"Vault path does not exist: {vault_path}")
             
         self.repo = repo
+        self.chunker = chunker or MarkdownChunker(
+            max_chars=config.VAULT_CHUNK_SIZE,
+            overlap=config.VAULT_CHUNK_OVERLAP
+        )
+        self.ignore_patterns = list(
+            config.VAULT_IGNORE_PATTERNS if ignore_patterns is None else ignore_patterns
+        )
+        self.last_stats: Optional[PipelineStats] = None
+        self.last_counts: Optional[Dict[str, int]] = None
+        self.manifest: Optional[FileManifest] = None
+        if manifest_path:
+            self.manifest = FileManifest(manifest_path)
+            self.manifest.load()
+        self.checkpoint = IndexCheckpoint(checkpoint_path) if checkpoint_path else None
+        self.lexical_index = lexical_index
+        self.lexical_index_path = lexical_index_path
         logger.info(f"Initialized vault indexer for: {vault_path}")
     
-    def _read_markdown_file(self, file_path: Path) -> str:
+    def _read_text(self, file_path: Path) -> str:
         """
-        Read and preprocess markdown file content.
+        Read raw markdown file content.
+        
+        The file is opened once; binary content is detected on the same
+        buffer that is decoded.
         
         Args:
             file_path: Path to markdown file
             
         Returns:
-            Preprocessed file content
+            File content, or an empty string if the file cannot be read or
+            is not UTF-8 text
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            # TODO: Add more preprocessing steps as needed
-            # - Remove YAML frontmatter
-            # - Handle special Obsidian syntax
-            # - Extract and process tags
-            return content
-            
+            content = read_text_file(file_path)
         except Exception as e:
             logger.error(f"Error reading file {file_path}: {e}")
             return ""
+        if content is None:
+            logger.warning(f"Skipping binary file: {file_path}")
+            return ""
+        return content
+    
+    def _read_markdown_file(self, file_path: Path) -> str:
+        """
+        Read and preprocess markdown file content.
+        
+        Frontmatter, comments and embeds are removed and wikilinks are
+        replaced by their display text (see ``parse_note``).
+        
+        Args:
+            file_path: Path to markdown file
+            
+        Returns:
+            Preprocessed file content
+        """
+        return parse_note(self._read_text(file_path)).body
     
     def _generate_document_id(self, file_path: Path) -> str:
         """
@@ -73,17 +147,22 @@ class VaultIndexer:
         rel_path = file_path.relative_to(self.vault_path)
         return hashlib.sha256(str(rel_path).encode()).hexdigest()
     
-    def _get_file_metadata(self, file_path: Path) -> Dict[str, Any]:
+    def _get_file_metadata(
+        self,
+        file_path: Path,
+        stat: Optional[os.stat_result] = None
+    ) -> Dict[str, Any]:
         """
         Extract metadata from file.
         
         Args:
             file_path: Path to file
+            stat: Optional stat result to reuse instead of stat'ing the file
             
         Returns:
             File metadata
         """
-        stat = file_path.stat()
+        stat = stat or file_path.stat()
         rel_path = str(file_path.relative_to(self.vault_path))
         
         return {
@@ -95,6 +174,46 @@ class VaultIndexer:
             "size_bytes": stat.st_size
         }
     
+    def is_ignored(self, file_path: Path) -> bool:
+        """
+        Check whether a vault path is excluded from indexing.
+        
+        Args:
+            file_path: Path inside the vault
+            
+        Returns:
+            True if the path lies in an ignored directory or matches an
+            ignore pattern
+        """
+        try:
+            rel_path = file_path.relative_to(self.vault_path)
+        except ValueError:
+            return True
+        return is_ignored(rel_path, DEFAULT_IGNORED_DIRS, self.ignore_patterns)
+    
+    def scan_vault_entries(
+        self,
+        directory: Optional[Path] = None
+    ) -> Generator[os.DirEntry, None, None]:
+        """
+        Stream markdown file entries of the vault.
+        
+        Nothing is opened during the scan; each entry caches its stat result.
+        
+        Args:
+            directory: Optional directory inside the vault to limit the scan to
+            
+        Yields:
+            Directory entries of markdown files
+        """
+        yield from walk_files(
+            directory or self.vault_path,
+            suffixes=(".md",),
+            ignored_dirs=DEFAULT_IGNORED_DIRS,
+            ignore_patterns=self.ignore_patterns,
+            root=self.vault_path
+        )
+    
     def _scan_vault_files(self) -> Generator[Path, None, None]:
         """
         Scan vault directory for markdown files.
@@ -102,57 +221,505 @@ class VaultIndexer:
         Yields:
             Paths to markdown files
         """
-        for file_path in list_files(self.vault_path, recursive=True):
-            path = Path(file_path)
-            # Only process markdown files
-            if path.suffix.lower() == ".md" and is_text_file(path):
-                yield path
+        for entry in self.scan_vault_entries():
+            yield Path(entry.path)
+    
+    def _build_documents(
+        self,
+        file_path: Path,
+        stat: Optional[os.stat_result] = None
+    ) -> Optional[Tuple[List[Document], ManifestEntry]]:
+        """
+        Read a file and build its chunk documents and manifest entry.
+        
+        Each chunk's metadata carries the note's file metadata, its
+        frontmatter fields, tags, aliases, links and embeds, plus the parent
+        document ID, the chunk position and its heading path.
+        
+        Args:
+            file_path: Path to markdown file
+            stat: Optional stat result taken before reading
+            
+        Returns:
+            Tuple of (chunk documents, manifest entry), or None if the file is empty
+        """
+        stat = stat or file_path.stat()
+        content = self._read_text(file_path)
+        if not content:
+            return None
+        note = parse_note(content)
+        if not note.body.strip():
+            return None
+            
+        doc_id = self._generate_document_id(file_path)
+        metadata = {**note.metadata(), **self._get_file_metadata(file_path, stat)}
+        chunks = self.chunker.split(note.body)
+        docs = [
+            Document(
+                id=chunk_id(doc_id, chunk.ordinal),
+                content=chunk.content,
+                metadata={
+                    **metadata,
+                    "parent_id": doc_id,
+                    "chunk_index": chunk.ordinal,
+                    "chunk_count": len(chunks),
+                    "heading_path": HEADING_PATH_SEPARATOR.join(chunk.heading_path),
+                    EXCERPT_KEY: make_excerpt(chunk.content)
+                }
+            )
+            for chunk in chunks
+        ]
+        entry = ManifestEntry(
+            path=metadata["path"],
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            content_hash=hash_content(content),
+            document_id=doc_id,
+            chunk_count=len(docs)
+        )
+        return docs, entry
+    
+    def _stale_ids(
+        self,
+        old_entry: Optional[ManifestEntry],
+        entry: ManifestEntry
+    ) -> List[str]:
+        """
+        Get IDs of stored documents a (re)written note no longer uses.
+        
+        These are the chunks beyond the note's new end and, for notes indexed
+        before chunking, the single document stored under the bare note ID.
+        
+        Args:
+            old_entry: Previously recorded manifest entry, if any
+            entry: Manifest entry of the note as written now
+            
+        Returns:
+            IDs of documents to delete
+        """
+        stale_ids = [entry.document_id]
+        if old_entry is None:
+            return stale_ids
+        if old_entry.document_id != entry.document_id:
+            stale_ids.append(old_entry.document_id)
+        stale_ids.extend(
+            chunk_id(old_entry.document_id, ordinal)
+            for ordinal in range(entry.chunk_count, old_entry.chunk_count)
+        )
+        return stale_ids
+    
+    def _delete_notes(self, document_ids: List[str]) -> None:
+        """
+        Delete all chunks of the given notes.
+        
+        Notes indexed before chunking are stored as one document under the
+        bare note ID, without a parent_id, so those IDs are deleted as well.
+        
+        Args:
+            document_ids: Document IDs of the notes
+        """
+        if document_ids:
+            self.repo.delete_documents(where={"parent_id": {"$in": document_ids}})
+            self.repo.delete_documents(document_ids)
+            if self.lexical_index is not None:
+                self.lexical_index.remove_notes(document_ids)
+    
+    def _index_terms(self, docs: List[Document]) -> None:
+        """
+        Replace the terms of notes in the lexical index.
+        
+        Args:
+            docs: All chunk documents of each note
+        """
+        if self.lexical_index is not None and docs:
+            self.lexical_index.replace_notes(docs)
+    
+    def _has_terms(self, document_id: str) -> bool:
+        """
+        Check that a note needs no lexical indexing.
+        
+        Args:
+            document_id: Document ID of the note
+            
+        Returns:
+            False if there is a lexical index and it lacks the note
+        """
+        return self.lexical_index is None or document_id in self.lexical_index
     
-    def index_vault(self, batch_size: int = 100) -> None:
+    def _save(self) -> None:
+        """Save the manifest and the lexical index."""
+        if self.manifest is not None:
+            self.manifest.save()
+        if self.lexical_index is not None and self.lexical_index_path:
+            self.lexical_index.save(self.lexical_index_path)
+    
+    def _match_rename(
+        self,
+        entry: ManifestEntry,
+        candidates: Dict[str, List[ManifestEntry]],
+        claimed: set
+    ) -> Optional[ManifestEntry]:
+        """
+        Find the vanished file a new file was renamed or moved from.
+        
+        Args:
+            entry: Manifest entry of the new file
+            candidates: Previously indexed entries grouped by content hash
+            claimed: Paths of old entries already matched to another file;
+                the returned entry's path is added to it
+            
+        Returns:
+            Entry of a vanished file with identical content, or None
+        """
+        for old_entry in candidates.get(entry.content_hash, ()):
+            if old_entry.path in claimed or (self.vault_path / old_entry.path).exists():
+                continue
+            claimed.add(old_entry.path)
+            return old_entry
+        return None
+    
+    def _move_pairs(
+        self,
+        old_entry: ManifestEntry,
+        docs: List[Document]
+    ) -> List[Tuple[str, Document]]:
+        """
+        Pair the chunks of a renamed note with the IDs they are stored under.
+        
+        Args:
+            old_entry: Manifest entry of the note's previous path
+            docs: Chunk documents of the note at its new path
+            
+        Returns:
+            (old chunk ID, new chunk document) pairs
+        """
+        return [
+            (chunk_id(old_entry.document_id, doc.metadata["chunk_index"]), doc)
+            for doc in docs
+        ]
+    
+    def index_vault(
+        self,
+        batch_size: int = 100,
+        incremental: bool = False,
+        workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        resume: bool = False,
+        cancel: Optional[threading.Event] = None,
+        batch_bytes: Optional[int] = None
+    ) -> Dict[str, int]:
         """
         Index all markdown files in the vault.
         
+        Files are read and parsed by a pool of worker threads and streamed
+        through a bounded queue to this thread, which writes them to the
+        repository in batches. Documents are upserted, so a full re-run is
+        safe and chunks whose content is unchanged are not re-embedded.
+        Throughput statistics of the run are kept in ``last_stats``.
+        
+        Batches are sized by content bytes rather than document count: a
+        batch is written once it reaches the byte budget or ``batch_size``
+        documents, and the budget is adapted to the throughput observed for
+        each batch (see ``AdaptiveBatchSizer``). No embedder request exceeds
+        ``config.VAULT_INDEX_BATCH_MAX_BYTES`` or
+        ``config.VAULT_INDEX_BATCH_MAX_TOKENS``.
+        
+        In incremental mode the vault is diffed against the file manifest:
+        new files are added, changed files are updated and vanished files are
+        deleted. Files whose size and mtime match the manifest are skipped
+        without being read. A new file with the same content as a vanished
+        one is treated as a rename: its stored embeddings are moved to the
+        new document IDs instead of being recomputed.
+        
+        With a lexical index, every written note is re-indexed in it too, and
+        files whose notes are missing from it are read even when unchanged,
+        so that an index added to an existing vault is filled in by the next
+        incremental run without re-embedding anything.
+        
+        With a checkpoint, every committed batch is appended to the
+        checkpoint log, together with the unchanged files read since the
+        previous batch. If a run dies, ``resume=True`` continues it: files
+        committed by the interrupted run whose size and mtime are unchanged
+        are skipped, and the run keeps its original mode. The checkpoint is
+        discarded once a run completes.
+        
+        Progress can be followed while the run is in progress through
+        ``last_stats`` (files per stage) and ``last_counts``. Setting
+        ``cancel`` stops the run after committing the documents already
+        read; the checkpoint is kept so that the run can be resumed.
+        
         Args:
-            batch_size: Number of documents to process in each batch
+            batch_size: Maximum number of documents in each batch
+            incremental: Only index changes since the last recorded run
+            workers: Number of reader threads (defaults to config.VAULT_INDEX_WORKERS)
+            queue_size: Maximum number of parsed documents buffered for the
+                writer (defaults to config.VAULT_INDEX_QUEUE_SIZE)
+            resume: Continue the run recorded in the checkpoint, if any
+            cancel: Optional event that cancels the run when set
+            batch_bytes: Initial byte budget of a batch (defaults to
+                config.VAULT_INDEX_BATCH_BYTES)
+            
+        Returns:
+            Counts of added, updated, renamed, deleted and unchanged files
+            
+        Raises:
+            ValueError: If incremental mode is requested without a manifest
+            IndexingCancelled: If the run was cancelled
         """
+        resumed: Optional[CheckpointState] = None
+        if resume and self.checkpoint is not None:
+            resumed = self.checkpoint.load()
+            if resumed is not None:
+                incremental = resumed.incremental
+                logger.info(
+                    f"Resuming indexing run after batch {resumed.batches} "
+                    f"({len(resumed.committed)} files already committed)"
+                )
+                
+        if incremental and self.manifest is None:
+            raise ValueError("Incremental indexing requires a manifest path")
+            
+        previous = self.manifest.entries() if incremental and self.manifest else {}
+        if self.manifest is not None and not incremental:
+            self.manifest.clear()
+        committed = resumed.committed if resumed else {}
+        if resumed:
+            self._record(list(committed.values()))
+        if self.checkpoint is not None:
+            self.checkpoint.start(incremental, resume_from=resumed)
+            
+        pipeline: IndexPipeline[_WorkItem, _BuiltFile] = IndexPipeline(
+            workers=workers or config.VAULT_INDEX_WORKERS,
+            queue_size=queue_size or config.VAULT_INDEX_QUEUE_SIZE
+        )
+        stats = PipelineStats(workers=pipeline.workers)
+        self.last_stats = stats
+        sizer = AdaptiveBatchSizer(
+            initial_bytes=batch_bytes or config.VAULT_INDEX_BATCH_BYTES,
+            min_bytes=config.VAULT_INDEX_BATCH_MIN_BYTES,
+            max_bytes=config.VAULT_INDEX_BATCH_MAX_BYTES,
+            max_count=batch_size,
+            max_tokens=config.VAULT_INDEX_BATCH_MAX_TOKENS,
+            max_latency=config.VAULT_INDEX_BATCH_MAX_SECONDS
+        )
+        
+        counts = {"added": 0, "updated": 0, "renamed": 0, "deleted": 0, "unchanged": 0}
+        self.last_counts = counts
         batch: List[Document] = []
-        total_indexed = 0
+        batch_bytes_used = 0
+        batch_entries: List[ManifestEntry] = []
+        # (old entry, new entry) of changed files in the batch
+        update_entries: List[Tuple[ManifestEntry, ManifestEntry]] = []
+        moves: List[Tuple[str, Document]] = []
+        move_entries: List[Tuple[ManifestEntry, ManifestEntry]] = []
+        seen = set()
+        moved = set()
+        # Previously indexed files by content hash, for rename detection
+        by_hash: Dict[str, List[ManifestEntry]] = {}
+        for old_entry in previous.values():
+            by_hash.setdefault(old_entry.content_hash, []).append(old_entry)
+        # Unchanged files read since the last batch; logged with the next
+        # batch instead of one checkpoint record each
+        unchanged_entries: List[ManifestEntry] = []
+        # Written by the feeder thread only
+        skipped = {"count": 0}
+        write_failed = False
         
-        try:
-            for file_path in self._scan_vault_files():
-                # Create document
-                content = self._read_markdown_file(file_path)
-                if not content:
-                    continue
-                    
-                doc = Document(
-                    id=self._generate_document_id(file_path),
-                    content=content,
-                    metadata=self._get_file_metadata(file_path)
+        def commit(entries: List[ManifestEntry]) -> None:
+            self._record(entries)
+            if self.checkpoint is not None:
+                self.checkpoint.commit(entries + unchanged_entries)
+            unchanged_entries.clear()
+        
+        def upsert(docs: List[Document]) -> None:
+            # One request per slice within the embedder limits; each slice
+            # tunes the byte budget of the following batches by the bytes
+            # it actually embedded, as unchanged chunks cost next to nothing
+            for part in sizer.split(docs):
+                embedded: List[Document] = []
+                start = time.perf_counter()
+                self.repo.upsert_documents(part, on_embedded=embedded.extend)
+                sizer.observe(
+                    sum(document_bytes(doc) for doc in embedded),
+                    time.perf_counter() - start
                 )
-                batch.append(doc)
+        
+        def flush() -> None:
+            nonlocal write_failed, batch_bytes_used
+            start = time.perf_counter()
+            try:
+                if moves:
+                    self.repo.move_documents(list(moves))
+                    self.repo.delete_documents([
+                        stale_id
+                        for old_entry, entry in move_entries
+                        for stale_id in self._stale_ids(old_entry, entry)
+                    ])
+                    if self.lexical_index is not None:
+                        self.lexical_index.remove_notes(
+                            [old_entry.document_id for old_entry, _ in move_entries]
+                        )
+                        self._index_terms([doc for _, doc in moves])
+                if batch:
+                    upsert(batch)
+                    # Drop chunks beyond the new end of changed notes and
+                    # documents stored before the notes were chunked
+                    self.repo.delete_documents([
+                        stale_id
+                        for old_entry, entry in (
+                            update_entries + [(None, entry) for entry in batch_entries]
+                        )
+                        for stale_id in self._stale_ids(old_entry, entry)
+                    ])
+                    self._index_terms(batch)
+            except Exception:
+                write_failed = True
+                raise
+            stats.record("embed", files=len(batch) + len(moves), seconds=time.perf_counter() - start)
+            counts["added"] += len(batch_entries)
+            counts["updated"] += len(update_entries)
+            counts["renamed"] += len(move_entries)
+            commit(
+                batch_entries
+                + [entry for _, entry in update_entries]
+                + [entry for _, entry in move_entries]
+            )
+            for old_entry, _ in move_entries:
+                self.manifest.remove(old_entry.path)
+            batch.clear()
+            batch_bytes_used = 0
+            batch_entries.clear()
+            update_entries.clear()
+            moves.clear()
+            move_entries.clear()
+        
+        def check_cancelled() -> None:
+            if cancel is not None and cancel.is_set():
+                raise IndexingCancelled("Indexing was cancelled")
+        
+        def scan() -> Generator[_WorkItem, None, None]:
+            for entry in self.scan_vault_entries():
+                check_cancelled()
+                file_path = Path(entry.path)
+                rel_path = str(file_path.relative_to(self.vault_path))
+                try:
+                    # Reuses the stat cached by the directory walk
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                seen.add(rel_path)
+                stats.record("scan", nbytes=stat.st_size)
+                
+                # Compare stats before reading anything; files missing from
+                # the lexical index are read to fill it in
+                done = committed.get(rel_path)
+                old_entry = previous.get(rel_path)
+                if ((done and done.matches_stat(stat)) or (old_entry and old_entry.matches_stat(stat))) \
+                        and self._has_terms((done or old_entry).document_id):
+                    skipped["count"] += 1
+                    stats.record("skip")
+                    continue
+                yield file_path, stat, old_entry
+            stats.complete("scan")
+        
+        def build(item: _WorkItem) -> Optional[_BuiltFile]:
+            file_path, stat, old_entry = item
+            built = self._build_documents(file_path, stat)
+            if built is None:
+                return None
+            return built[0], built[1], old_entry
+        
+        def write(result: _BuiltFile) -> None:
+            nonlocal batch_bytes_used
+            check_cancelled()
+            docs, entry, old_entry = result
+            if old_entry and old_entry.content_hash == entry.content_hash:
+                if not self._has_terms(entry.document_id):
+                    self._index_terms(docs)
+                counts["unchanged"] += 1
+                self._record([entry])
+                unchanged_entries.append(entry)
+                return
+                
+            renamed_from = None
+            if not old_entry and by_hash:
+                renamed_from = self._match_rename(entry, by_hash, moved)
+            if renamed_from:
+                moves.extend(self._move_pairs(renamed_from, docs))
+                move_entries.append((renamed_from, entry))
+            else:
+                # New and changed files share the batch, and its byte budget
+                batch.extend(docs)
+                batch_bytes_used += sum(document_bytes(doc) for doc in docs)
+                if old_entry:
+                    update_entries.append((old_entry, entry))
+                else:
+                    batch_entries.append(entry)
+            
+            # Process batch
+            if sizer.is_full(len(batch) + len(moves), batch_bytes_used):
+                flush()
+        
+        try:
+            try:
+                pipeline.run(scan(), build, write, size_of=lambda r: r[1].size, stats=stats)
+            except Exception:
+                # Commit documents that were already read before re-raising,
+                # unless the repository write itself failed
+                if (batch or moves) and not write_failed:
+                    flush()
+                raise
+            counts["unchanged"] += skipped["count"]
                 
-                # Process batch
-                if len(batch) >= batch_size:
-                    self.repo.add_documents(batch)
-                    total_indexed += len(batch)
-                    batch = []
-                    
             # Process remaining documents
-            if batch:
-                self.repo.add_documents(batch)
-                total_indexed += len(batch)
+            if batch or moves:
+                start = time.perf_counter()
+                flush()
+                stats.record("write", files=0, seconds=time.perf_counter() - start)
+            stats.finish()
                 
-            logger.info(f"Successfully indexed {total_indexed} documents")
+            # Remove files that vanished since the last run
+            vanished = [
+                previous[path] for path in previous if path not in seen and path not in moved
+            ]
+            if vanished:
+                self._delete_notes([entry.document_id for entry in vanished])
+                for entry in vanished:
+                    self.manifest.remove(entry.path)
+                counts["deleted"] = len(vanished)
+                
+            logger.info(
+                f"Indexed vault: {counts['added']} added, {counts['updated']} updated, "
+                f"{counts['renamed']} renamed, {counts['deleted']} deleted, "
+                f"{counts['unchanged']} unchanged"
+            )
+            logger.info(f"Indexing throughput: {stats.summary()}")
+            logger.debug(f"Final indexing batch budget: {sizer.budget_bytes} bytes")
+            self._save()
+            if self.checkpoint is not None:
+                self.checkpoint.complete()
+            return counts
             
         except Exception as e:
-            logger.error(f"Error during indexing: {e}")
-            # Add any remaining documents
-            if batch:
-                self.repo.add_documents(batch)
-                total_indexed += len(batch)
+            if isinstance(e, IndexingCancelled):
+                logger.info(f"Indexing cancelled after {stats.files('write')} files")
+            else:
+                logger.error(f"Error during indexing: {e}")
+            self._save()
             raise
     
+    def _record(self, entries: List[ManifestEntry]) -> None:
+        """
+        Record committed files in the manifest.
+        
+        Args:
+            entries: Manifest entries of files written to the repository
+        """
+        if self.manifest is None:
+            return
+        for entry in entries:
+            self.manifest.set(entry)
+    
     def reindex_file(self, file_path: str) -> None:
         """
         Reindex a single file.
@@ -161,21 +728,29 @@ class VaultIndexer:
             file_path: Path to file to reindex
         """
         path = Path(file_path)
-        if not path.exists() or path.suffix.lower() != ".md":
+        if not path.exists() or path.suffix.lower() != ".md" or self.is_ignored(path):
             return
             
         try:
-            content = self._read_markdown_file(path)
-            if not content:
+            built = self._build_documents(path)
+            if built is None:
                 return
-                
-            doc = Document(
-                id=self._generate_document_id(path),
-                content=content,
-                metadata=self._get_file_metadata(path)
-            )
+            docs, entry = built
             
-            self.repo.update_document(doc)
+            self.repo.upsert_documents(docs)
+            # Drop chunks beyond the new end of the note and the document
+            # stored before the note was chunked
+            self.repo.delete_documents([entry.document_id])
+            self.repo.delete_documents(where={
+                "$and": [
+                    {"parent_id": entry.document_id},
+                    {"chunk_index": {"$gte": len(docs)}}
+                ]
+            })
+            self._index_terms(docs)
+            if self.manifest is not None:
+                self.manifest.set(entry)
+            self._save()
             logger.info(f"Reindexed file: {file_path}")
             
         except Exception as e:
@@ -192,5 +767,112 @@ class VaultIndexer:
         path = Path(file_path)
         doc_id = self._generate_document_id(path)
         
-        self.repo.delete_documents([doc_id])
-        logger.info(f"Removed file from index: {file_path}") 
\ No newline at end of file
+        self._delete_notes([doc_id])
+        if self.manifest is not None:
+            self.manifest.remove(str(path.relative_to(self.vault_path)))
+        self._save()
+        logger.info(f"Removed file from index: {file_path}")
+    
+    def apply_changes(
+        self,
+        changed: Iterable[str | Path],
+        deleted: Iterable[str | Path]
+    ) -> Dict[str, int]:
+        """
+        Apply a batch of file changes with one upsert and one delete call.
+        
+        When a manifest is available, a deleted file and a new file with the
+        same content hash are treated as a rename: the stored embeddings are
+        moved to the new document IDs instead of being recomputed.
+        
+        Args:
+            changed: Paths of added or modified markdown files
+            deleted: Paths of removed markdown files
+            
+        Returns:
+            Counts of upserted, deleted, renamed and unchanged files
+        """
+        counts = {"upserted": 0, "deleted": 0, "renamed": 0, "unchanged": 0}
+        docs: List[Document] = []
+        entries: List[ManifestEntry] = []
+        stale_ids: List[str] = []
+        moves: List[Tuple[str, Document]] = []
+        move_entries: List[Tuple[ManifestEntry, ManifestEntry]] = []
+        
+        deleted_paths = [Path(file_path) for file_path in deleted]
+        by_hash: Dict[str, List[ManifestEntry]] = {}
+        for path in deleted_paths:
+            rel_path = str(path.relative_to(self.vault_path))
+            old_entry = self.manifest.get(rel_path) if self.manifest else None
+            if old_entry:
+                by_hash.setdefault(old_entry.content_hash, []).append(old_entry)
+        moved = set()
+        
+        for file_path in changed:
+            path = Path(file_path)
+            if self.is_ignored(path):
+                continue
+            built = self._build_documents(path)
+            if built is None:
+                continue
+            chunk_docs, entry = built
+            old_entry = self.manifest.get(entry.path) if self.manifest else None
+            if old_entry and old_entry.content_hash == entry.content_hash:
+                if not self._has_terms(entry.document_id):
+                    self._index_terms(chunk_docs)
+                counts["unchanged"] += 1
+                self._record([entry])
+                continue
+            if not old_entry:
+                # Pair a new file with a deleted file of identical content
+                renamed_from = self._match_rename(entry, by_hash, moved)
+                if renamed_from:
+                    moves.extend(self._move_pairs(renamed_from, chunk_docs))
+                    stale_ids.extend(self._stale_ids(renamed_from, entry))
+                    move_entries.append((renamed_from, entry))
+                    continue
+            stale_ids.extend(self._stale_ids(old_entry, entry))
+            docs.extend(chunk_docs)
+            entries.append(entry)
+            
+        deleted_ids: List[str] = []
+        deleted_entries: List[ManifestEntry] = []
+        for path in deleted_paths:
+            rel_path = str(path.relative_to(self.vault_path))
+            if rel_path in moved:
+                continue
+            old_entry = self.manifest.get(rel_path) if self.manifest else None
+            if old_entry:
+                deleted_entries.append(old_entry)
+            deleted_ids.append(self._generate_document_id(path))
+            
+        try:
+            if moves:
+                self.repo.move_documents(moves)
+            self.repo.upsert_documents(docs)
+            if stale_ids:
+                self.repo.delete_documents(stale_ids)
+            self._delete_notes(deleted_ids)
+            if self.lexical_index is not None:
+                self.lexical_index.remove_notes(
+                    [old_entry.document_id for old_entry, _ in move_entries]
+                )
+                self._index_terms(docs + [doc for _, doc in moves])
+        except Exception as e:
+            logger.error(f"Error applying vault changes: {e}")
+            raise
+            
+        counts["upserted"] = len(entries)
+        counts["deleted"] = len(deleted_ids)
+        counts["renamed"] = len(move_entries)
+        self._record(entries + [entry for _, entry in move_entries])
+        if self.manifest is not None:
+            for entry in deleted_entries + [old_entry for old_entry, _ in move_entries]:
+                self.manifest.remove(entry.path)
+        self._save()
+            
+        logger.info(
+            f"Applied vault changes: {counts['upserted']} upserted, {counts['deleted']} deleted, "
+            f"{counts['renamed']} renamed"
+        )
+        return counts
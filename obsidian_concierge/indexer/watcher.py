@@ -0,0 +1,310 @@
+"""
+Vault watcher implementation.
+
+This module watches an Obsidian vault for file changes and keeps the index up
+to date. Events are coalesced per path over a debounce window and flushed as a
+single batched upsert/delete, so that sync clients touching hundreds of files
+at once do not trigger one repository write per event.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..utils.config import config
+from ..utils.fs import DEFAULT_IGNORED_DIRS
+from ..utils.logging import logger
+from .vault_indexer import VaultIndexer
+
+try:
+    import watchfiles
+except ImportError:  # pragma: no cover - depends on optional dependency
+    watchfiles = None
+
+IGNORED_DIRS = DEFAULT_IGNORED_DIRS
+
+
+class VaultWatcher:
+    """Debounced watcher that batches vault changes into index updates."""
+
+    def __init__(
+        self,
+        indexer: VaultIndexer,
+        debounce: Optional[float] = None,
+        max_delay: Optional[float] = None,
+        poll_interval: Optional[float] = None,
+        use_native: Optional[bool] = None,
+        write_lock: Optional[threading.Lock] = None
+    ):
+        """
+        Initialize vault watcher.
+
+        Args:
+            indexer: Indexer used to apply changes
+            debounce: Seconds without new events before pending changes are
+                flushed (defaults to config.VAULT_WATCH_DEBOUNCE)
+            max_delay: Maximum seconds a change may stay pending during a
+                continuous burst of events (defaults to config.VAULT_WATCH_MAX_DELAY)
+            poll_interval: Seconds between scans when polling for changes
+                (defaults to config.VAULT_WATCH_POLL_INTERVAL)
+            use_native: Use native (inotify) events; defaults to True when
+                ``watchfiles`` is installed
+            write_lock: Optional lock shared with other index writers (e.g.
+                index jobs); it is held for a whole flush, pending changes
+                are kept while another writer holds it, and the manifest is
+                reloaded before each flush since it may have changed
+        """
+        self.indexer = indexer
+        self.vault_path = indexer.vault_path
+        self._vault_root = indexer.vault_path.resolve()
+        self.debounce = config.VAULT_WATCH_DEBOUNCE if debounce is None else debounce
+        self.max_delay = config.VAULT_WATCH_MAX_DELAY if max_delay is None else max_delay
+        self.poll_interval = (
+            config.VAULT_WATCH_POLL_INTERVAL if poll_interval is None else poll_interval
+        )
+        self.use_native = watchfiles is not None if use_native is None else use_native
+        if self.use_native and watchfiles is None:
+            raise ValueError("Native file watching requires the watchfiles package")
+
+        self._pending: Set[Path] = set()
+        self._first_event: Optional[float] = None
+        self._last_event: Optional[float] = None
+        self._snapshot: Optional[Dict[Path, Tuple[int, int]]] = None
+        self.write_lock = write_lock
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _is_ignored(self, path: Path) -> bool:
+        """
+        Check whether a path is excluded by the indexer's ignore rules.
+
+        Args:
+            path: Path inside the vault
+
+        Returns:
+            True if the path should not be watched
+        """
+        return self.indexer.is_ignored(path)
+
+    def record(self, path: str | Path) -> None:
+        """
+        Record a change event for a path.
+
+        Args:
+            path: Path of the changed file or directory
+        """
+        path = Path(path)
+        if path.is_absolute() and not self.vault_path.is_absolute():
+            # Native events report resolved paths
+            try:
+                path = self.vault_path / path.relative_to(self._vault_root)
+            except ValueError:
+                return
+        if self._is_ignored(path):
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            self._pending.add(path)
+            if self._first_event is None:
+                self._first_event = now
+            self._last_event = now
+
+    def is_due(self, now: Optional[float] = None) -> bool:
+        """
+        Check whether pending changes should be flushed.
+
+        Args:
+            now: Current monotonic time
+
+        Returns:
+            True if the debounce window or the maximum delay has elapsed
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if not self._pending:
+                return False
+            return (
+                now - self._last_event >= self.debounce
+                or now - self._first_event >= self.max_delay
+            )
+
+    def _resolve(self, paths: Set[Path]) -> Tuple[List[Path], List[Path]]:
+        """
+        Split pending paths into changed and deleted markdown files.
+
+        Directory events are expanded: an existing directory contributes all
+        markdown files below it, a removed one all indexed files below it.
+
+        Args:
+            paths: Pending paths
+
+        Returns:
+            Tuple of (changed files, deleted files)
+        """
+        changed: Set[Path] = set()
+        deleted: Set[Path] = set()
+        indexed = list(self.indexer.manifest) if self.indexer.manifest is not None else []
+
+        for path in paths:
+            if path.is_dir():
+                changed.update(
+                    Path(entry.path) for entry in self.indexer.scan_vault_entries(path)
+                )
+            elif path.exists():
+                if path.suffix.lower() == ".md":
+                    changed.add(path)
+            elif path.suffix.lower() == ".md":
+                deleted.add(path)
+            else:
+                prefix = str(path.relative_to(self.vault_path)) + os.sep
+                deleted.update(
+                    self.vault_path / rel_path for rel_path in indexed if rel_path.startswith(prefix)
+                )
+
+        return sorted(changed), sorted(deleted - changed)
+
+    def flush(self) -> Optional[Dict[str, int]]:
+        """
+        Apply all pending changes as one batch.
+
+        Returns:
+            Counts reported by the indexer, or None if nothing was pending or
+            another writer holds the write lock
+        """
+        if self.write_lock is None:
+            return self._apply_pending()
+        with self._lock:
+            if not self._pending:
+                return None
+        if not self.write_lock.acquire(blocking=False):
+            # Another writer is updating the index; retry on the next flush
+            return None
+        try:
+            # Another writer may have changed the manifest since the last flush
+            if self.indexer.manifest is not None:
+                self.indexer.manifest.load()
+            return self._apply_pending()
+        finally:
+            self.write_lock.release()
+
+    def _apply_pending(self) -> Optional[Dict[str, int]]:
+        """Apply and clear the pending changes."""
+        with self._lock:
+            paths = self._pending
+            self._pending = set()
+            self._first_event = None
+            self._last_event = None
+
+        if not paths:
+            return None
+
+        changed, deleted = self._resolve(paths)
+        if not changed and not deleted:
+            return None
+        try:
+            return self.indexer.apply_changes(changed, deleted)
+        except Exception as e:
+            logger.error(f"Failed to apply {len(paths)} pending vault changes: {e}")
+            # Keep the changes pending so that the next flush retries them
+            for path in paths:
+                self.record(path)
+            return None
+
+    def _take_snapshot(self) -> Dict[Path, Tuple[int, int]]:
+        """
+        Collect size and mtime of all markdown files in the vault.
+
+        Returns:
+            Mapping of file path to (size, mtime in nanoseconds)
+        """
+        snapshot = {}
+        for entry in self.indexer.scan_vault_entries():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            snapshot[Path(entry.path)] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def poll(self) -> int:
+        """
+        Scan the vault once and record every file that changed since the last scan.
+
+        Returns:
+            Number of changed paths recorded
+        """
+        snapshot = self._take_snapshot()
+        previous = self._snapshot
+        self._snapshot = snapshot
+        if previous is None:
+            return 0
+
+        changes = [path for path, state in snapshot.items() if previous.get(path) != state]
+        changes += [path for path in previous if path not in snapshot]
+        for path in changes:
+            self.record(path)
+        return len(changes)
+
+    def _watch_filter(self, change: object, path: str) -> bool:
+        """Filter native events down to vault content."""
+        try:
+            rel_path = Path(path).relative_to(self._vault_root)
+        except ValueError:
+            return False
+        return not self.indexer.is_ignored(self.vault_path / rel_path)
+
+    def run(self) -> None:
+        """Watch the vault until ``stop`` is called."""
+        logger.info(
+            f"Watching vault {self.vault_path} "
+            f"({'native events' if self.use_native else 'polling'}, debounce={self.debounce}s)"
+        )
+
+        if self.use_native:
+            for changes in watchfiles.watch(
+                self._vault_root,
+                watch_filter=self._watch_filter,
+                debounce=int(self.debounce * 1000),
+                stop_event=self._stop,
+                rust_timeout=int(self.poll_interval * 1000),
+                yield_on_timeout=True,
+                raise_interrupt=False
+            ):
+                for _, path in changes:
+                    self.record(path)
+                if self.is_due():
+                    self.flush()
+        else:
+            self.poll()
+            while not self._stop.wait(self.poll_interval):
+                self.poll()
+                if self.is_due():
+                    self.flush()
+
+        # Do not lose changes that arrived right before stopping
+        self.flush()
+        logger.info(f"Stopped watching vault {self.vault_path}")
+
+    def start(self) -> None:
+        """Start watching the vault on a background thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="vault-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop watching the vault.
+
+        Args:
+            timeout: Seconds to wait for the watcher thread to finish
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
@@ -6,5 +6,6 @@ This module contains integrations with Large Language Models.
 from typing import Any, Dict, List, Optional, Union
 
 from .ollama import *  # noqa
+from .embeddings import OllamaEmbeddingFunction  # noqa
 
-__all__: List[str] = [] 
\ No newline at end of file
+__all__: List[str] = ['OllamaEmbeddingFunction'] 
\ No newline at end of file
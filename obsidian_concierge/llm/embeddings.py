@@ -0,0 +1,168 @@
+"""
+Ollama embedding function.
+
+This module provides a ChromaDB embedding function backed by Ollama's batch
+``/api/embed`` endpoint. Inputs are split into sub-batches bounded by text
+count and size, which are sent concurrently over one pooled HTTP client, so
+that indexing throughput is limited by the embedding model rather than by
+request round trips.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+class OllamaEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Embedding function sending batched, concurrent requests to Ollama."""
+
+    def __init__(
+        self,
+        url: str = "http://localhost:11434",
+        model_name: str = "nomic-embed-text",
+        max_batch_size: int = 64,
+        max_batch_chars: int = 65_536,
+        concurrency: int = 4,
+        timeout: float = 120.0,
+        keep_alive: Optional[str] = None,
+        transport: Optional[httpx.BaseTransport] = None
+    ):
+        """Initialize the embedding function.
+
+        Args:
+            url: Ollama base URL
+            model_name: Embedding model
+            max_batch_size: Maximum number of texts per request
+            max_batch_chars: Maximum total characters per request; a single
+                longer text is still sent on its own
+            concurrency: Maximum number of requests in flight, shared by all
+                callers of this function
+            timeout: Request timeout in seconds
+            keep_alive: Optional time Ollama keeps the model loaded (e.g. "10m")
+            transport: Optional HTTP transport replacing the network one
+
+        Raises:
+            ValueError: If a batch limit or the concurrency is not positive
+        """
+        if max_batch_size < 1 or max_batch_chars < 1 or concurrency < 1:
+            raise ValueError("max_batch_size, max_batch_chars and concurrency must be at least 1")
+        self.url = url.rstrip("/")
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.max_batch_chars = max_batch_chars
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.transport = transport
+        self._client: Optional[httpx.Client] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _resources(self) -> Tuple[httpx.Client, ThreadPoolExecutor]:
+        """Create the shared HTTP client and request thread pool on first use."""
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(
+                    base_url=self.url,
+                    timeout=self.timeout,
+                    transport=self.transport,
+                    limits=httpx.Limits(
+                        max_connections=self.concurrency,
+                        max_keepalive_connections=self.concurrency
+                    )
+                )
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.concurrency,
+                    thread_name_prefix="ollama-embed"
+                )
+            return self._client, self._pool
+
+    def split(self, texts: List[str]) -> List[List[str]]:
+        """Split texts into request-sized sub-batches, keeping their order.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Consecutive sub-batches covering all texts
+        """
+        batches: List[List[str]] = []
+        batch: List[str] = []
+        chars = 0
+        for text in texts:
+            if batch and (len(batch) >= self.max_batch_size or chars + len(text) > self.max_batch_chars):
+                batches.append(batch)
+                batch, chars = [], 0
+            batch.append(text)
+            chars += len(text)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _embed_batch(self, client: httpx.Client, texts: List[str]) -> List[List[float]]:
+        """Embed one sub-batch with a single ``/api/embed`` request."""
+        payload: Dict[str, Any] = {"model": self.model_name, "input": texts}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        response = client.post("/api/embed", json=payload)
+        response.raise_for_status()
+        embeddings = response.json().get("embeddings") or []
+        if len(embeddings) != len(texts):
+            raise ValueError(
+                f"Ollama returned {len(embeddings)} embeddings for {len(texts)} inputs"
+            )
+        return embeddings
+
+    def __call__(self, input: Documents) -> Embeddings:
+        """Embed texts.
+
+        Args:
+            input: Texts to embed
+
+        Returns:
+            One embedding per text, in input order
+
+        Raises:
+            httpx.HTTPError: If a request fails
+        """
+        texts = list(input)
+        if not texts:
+            return []
+        client, pool = self._resources()
+        batches = self.split(texts)
+        if len(batches) == 1:
+            results = [self._embed_batch(client, batches[0])]
+        else:
+            futures = [pool.submit(self._embed_batch, client, batch) for batch in batches]
+            results = [future.result() for future in futures]
+        logger.debug(f"Embedded {len(texts)} texts in {len(batches)} Ollama requests")
+        return [np.asarray(vector, dtype=np.float32) for batch in results for vector in batch]
+
+    def close(self) -> None:
+        """Close the HTTP client and stop the request threads."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+            if self._client is not None:
+                self._client.close()
+            self._client = None
+            self._pool = None
+
+    @staticmethod
+    def name() -> str:
+        return "ollama_batched"
+
+    def get_config(self) -> Dict[str, Any]:
+        # Only settings that change the vectors; batching and concurrency do not
+        return {"url": self.url, "model_name": self.model_name}
+
+    @staticmethod
+    def build_from_config(config: Dict[str, Any]) -> "OllamaEmbeddingFunction":
+        return OllamaEmbeddingFunction(url=config["url"], model_name=config["model_name"])
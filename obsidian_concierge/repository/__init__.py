@@ -4,6 +4,16 @@ Repository package for Obsidian Concierge.
 This package contains repository implementations for data storage and retrieval.
 """
 
-from .chroma import ChromaRepository, Document
+from .chroma import ChromaRepository, Document, SearchQuery
+from .embedding_cache import CachedEmbeddingFunction, EmbeddingCache
+from .executor import RepositoryExecutor
+from .knn_graph import KnnGraph
+from .lexical_index import LexicalIndex
+from .numpy_store import LocalCollection, NumpyRepository
+from .query_cache import QueryEmbeddingCache
 
-__all__ = ['ChromaRepository', 'Document'] 
\ No newline at end of file
+__all__ = [
+    'ChromaRepository', 'Document', 'CachedEmbeddingFunction', 'EmbeddingCache',
+    'KnnGraph', 'LexicalIndex', 'LocalCollection', 'NumpyRepository', 'QueryEmbeddingCache',
+    'RepositoryExecutor', 'SearchQuery'
+] 
\ No newline at end of file
@@ -5,14 +5,51 @@ This module provides a wrapper around ChromaDB for document storage and retrieva
 Located in the repository package for better organization.
 """
 
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Set, Tuple, Callable, TypeVar
+from collections import deque
+from contextlib import contextmanager
 from dataclasses import dataclass
+import hashlib
+import json
 import logging
+import threading
 import chromadb
+import numpy as np
 from chromadb.config import Settings
+from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+
+from .embedding_cache import CachedEmbeddingFunction, EmbeddingCache, embedding_model_key
+from .executor import RepositoryExecutor
+from .query_cache import QueryEmbeddingCache, normalize_query
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Number of chunk hits fetched per requested note, so that enough distinct
+# notes remain after collapsing chunks of the same note
+CHUNK_OVERFETCH = 3
+
+# Metadata key holding the hash of a document's content
+CONTENT_HASH_KEY = "content_hash"
+
+# Number of records fetched per page when scanning the whole collection
+SCAN_PAGE_SIZE = 5000
+
+# Metadata key holding the start of a document's content, so that search
+# results can be shown without fetching the content
+EXCERPT_KEY = "excerpt"
+
+# Number of characters kept in an excerpt
+EXCERPT_LENGTH = 200
+
+# Fields fetched by queries with and without document content
+CONTENT_FIELDS = ["documents", "metadatas", "distances"]
+PROJECTED_FIELDS = ["metadatas", "distances"]
+
+# Number of recent writes whose changed notes are remembered
+CHANGE_LOG_SIZE = 4096
+
 @dataclass
 class Document:
     """Represents a document in the vector store."""
@@ -20,6 +57,106 @@ class Document:
     content: str
     metadata: Dict[str, Any]
 
+
+@dataclass
+class SearchQuery:
+    """One query of a batch search."""
+    query: str
+    limit: Optional[int] = 10
+    filters: Optional[Dict[str, Any]] = None
+    include_content: bool = True
+    # Ranking used by the search service; the repository only runs vector queries
+    mode: str = "vector"
+
+
+def content_hash(content: str) -> str:
+    """Compute the hash stored under ``CONTENT_HASH_KEY``.
+
+    Args:
+        content: Document content
+
+    Returns:
+        Hex digest of the content
+    """
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def make_excerpt(content: str, length: int = EXCERPT_LENGTH) -> str:
+    """Build the excerpt stored under ``EXCERPT_KEY``.
+
+    Args:
+        content: Document content
+        length: Maximum number of characters kept
+
+    Returns:
+        The start of the content, with an ellipsis if it was cut
+    """
+    return content[:length] + "..." if len(content) > length else content
+
+
+def note_ids_of(documents: Iterable[Document]) -> List[str]:
+    """Get the IDs of the notes documents belong to.
+
+    Args:
+        documents: Chunk or whole-note documents
+
+    Returns:
+        The ``parent_id`` of each document, or its own ID without one
+    """
+    return [doc.metadata.get("parent_id", doc.id) for doc in documents]
+
+
+def cosine_distances(source: Any, vectors: Any) -> np.ndarray:
+    """Compute the cosine distances from one vector to several.
+
+    Args:
+        source: Vector to measure from
+        vectors: Vectors to measure to, one per row
+
+    Returns:
+        ``1 - cosine similarity`` per row; zero vectors are at distance 1
+    """
+    source = np.asarray(source, dtype=np.float32)
+    vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, len(source))
+    norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(source)
+    similarity = np.divide(
+        vectors @ source, norms, out=np.zeros(len(vectors), dtype=np.float32), where=norms > 0
+    )
+    return 1.0 - similarity
+
+
+def collapse_chunks(
+    items: List[T],
+    metadata_of: Callable[[T], Dict[str, Any]],
+    limit: Optional[int] = None
+) -> List[T]:
+    """Collapse ranked chunk hits to one hit per note.
+
+    The first (best ranked) hit of each note is kept. Hits without a
+    ``parent_id`` are treated as whole notes.
+
+    Args:
+        items: Hits ordered by relevance
+        metadata_of: Function returning the metadata of a hit
+        limit: Optional maximum number of notes to return
+
+    Returns:
+        Hits with at most one entry per note, in the original order
+    """
+    seen = set()
+    collapsed = []
+    for item in items:
+        metadata = metadata_of(item) or {}
+        key = metadata.get("parent_id") or metadata.get("path") or id(item)
+        if key in seen:
+            continue
+        seen.add(key)
+        collapsed.append(item)
+        if limit is not None and len(collapsed) >= limit:
+            break
+    return collapsed
+
+
 class ChromaRepository:
     """Repository for managing document vectors using ChromaDB."""
     
@@ -27,7 +164,10 @@ class ChromaRepository:
         self,
         collection_name: str,
         persist_directory: str = ".chroma",
-        embedding_function = None  # Will use default if None
+        embedding_function = None,  # Will use default if None
+        embedding_cache: Optional[EmbeddingCache] = None,
+        executor: Optional[RepositoryExecutor] = None,
+        query_cache: Optional[QueryEmbeddingCache] = None
     ):
         """Initialize ChromaDB repository.
         
@@ -35,8 +175,46 @@ class ChromaRepository:
             collection_name: Name of the ChromaDB collection
             persist_directory: Directory to persist vectors
             embedding_function: Optional custom embedding function
+            embedding_cache: Optional persistent cache consulted before the
+                embedding function is called
+            executor: Optional thread pool running the blocking ChromaDB
+                calls of the async methods (defaults to four threads)
+            query_cache: Optional in-memory cache of query embeddings
         """
         self.collection_name = collection_name
+        self.embedding_cache = embedding_cache
+        self.executor = executor or RepositoryExecutor()
+        self.query_cache = query_cache
+        self._generation = 0
+        self._generation_lock = threading.Lock()
+        # (generation, changed note IDs or None if unknown) of recent writes
+        self._change_log: deque = deque(maxlen=CHANGE_LOG_SIZE)
+        embedding_function = embedding_function or DefaultEmbeddingFunction()
+        self.embedding_model = None
+        if query_cache is not None:
+            self.embedding_model = embedding_model_key(embedding_function)
+        if embedding_cache is not None:
+            embedding_function = CachedEmbeddingFunction(embedding_function, embedding_cache)
+        # Queries are embedded with the function the collection embeds documents with
+        self.embedding_function = embedding_function
+        self.collection = self._open_collection(collection_name, persist_directory, embedding_function)
+        
+        logger.info(f"Initialized {type(self).__name__} with collection '{collection_name}'")
+    
+    def _open_collection(self, collection_name: str, persist_directory: str, embedding_function: Any) -> Any:
+        """Open the collection backing the repository.
+        
+        Subclasses return another object with the subset of the ChromaDB
+        collection API used here.
+        
+        Args:
+            collection_name: Name of the collection
+            persist_directory: Directory to persist vectors
+            embedding_function: Embedding function, or None for the default
+            
+        Returns:
+            The collection
+        """
         self.client = chromadb.PersistentClient(
             path=persist_directory,
             settings=Settings(
@@ -45,47 +223,124 @@ class ChromaRepository:
         )
         
         # Get or create collection
-        self.collection = self.client.get_or_create_collection(
+        return self.client.get_or_create_collection(
             name=collection_name,
             embedding_function=embedding_function
         )
+    
+    @property
+    def generation(self) -> int:
+        """Counter incremented after every write to the collection."""
+        return self._generation
+    
+    def bump_generation(self, note_ids: Optional[Iterable[str]] = None) -> int:
+        """Record that the collection changed.
         
-        logger.info(f"Initialized ChromaRepository with collection '{collection_name}'")
+        Results cached under an older generation are stale.
+        
+        Args:
+            note_ids: IDs of the notes that changed, if known
+            
+        Returns:
+            The new generation
+        """
+        with self._generation_lock:
+            self._generation += 1
+            self._change_log.append(
+                (self._generation, set(note_ids) if note_ids is not None else None)
+            )
+            return self._generation
+    
+    def changed_notes(self, since: int) -> Optional[Set[str]]:
+        """Get the notes written to after a generation.
+        
+        Args:
+            since: Generation the caller is up to date with
+            
+        Returns:
+            IDs of added, changed and removed notes, or None if they are not
+            known (a write did not record its notes, or the generation is
+            older than the writes remembered)
+        """
+        with self._generation_lock:
+            if since == self._generation:
+                return set()
+            log = list(self._change_log)
+        if not log or log[0][0] > since + 1:
+            return None
+        notes: Set[str] = set()
+        for generation, note_ids in log:
+            if generation <= since:
+                continue
+            if note_ids is None:
+                return None
+            notes |= note_ids
+        return notes
+    
+    @contextmanager
+    def _writing(self, note_ids: Optional[Iterable[str]] = None) -> Iterator[None]:
+        """Bump the generation once a write finished, even if it failed midway.
+        
+        Args:
+            note_ids: IDs of the notes written to, if known
+        """
+        try:
+            yield
+        finally:
+            self.bump_generation(note_ids)
     
     async def search(
         self,
         query: str,
         limit: Optional[int] = 10,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        include_content: bool = True
     ) -> List[Dict[str, Any]]:
         """Search for documents similar to the query.
         
+        The query runs on the repository's thread pool, so the event loop
+        is not blocked while the query is embedded and searched.
+        
+        Args:
+            query: Search query
+            limit: Maximum number of results to return
+            filters: Optional metadata filters
+            include_content: Fetch the document content; without it the
+                "text" of each result is None and the ``excerpt`` metadata
+                stands in for it
+            
+        Returns:
+            List of search results with metadata
+        """
+        return await self.executor.run(self.search_sync, query, limit, filters, include_content)
+    
+    def search_sync(
+        self,
+        query: str,
+        limit: Optional[int] = 10,
+        filters: Optional[Dict[str, Any]] = None,
+        include_content: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Search for documents similar to the query, blocking the caller.
+        
         Args:
             query: Search query
             limit: Maximum number of results to return
             filters: Optional metadata filters
+            include_content: Fetch the document content
             
         Returns:
             List of search results with metadata
         """
         try:
             results = self.collection.query(
-                query_texts=[query],
+                query_embeddings=self.embed_queries([query]),
                 n_results=limit,
-                where=filters
+                where=filters,
+                include=CONTENT_FIELDS if include_content else PROJECTED_FIELDS
             )
             
-            # Format results
-            formatted_results = []
-            for i in range(len(results["ids"][0])):
-                result = {
-                    "id": results["ids"][0][i],
-                    "text": results["documents"][0][i],
-                    "metadata": results["metadatas"][0][i] if results["metadatas"] else {},
-                    "score": results["distances"][0][i] if "distances" in results else None
-                }
-                formatted_results.append(result)
-            
+            formatted_results = self._format_results(results, 0)
             logger.info(f"Found {len(formatted_results)} results for query: {query}")
             return formatted_results
             
@@ -93,6 +348,136 @@ class ChromaRepository:
             logger.error(f"Search failed: {str(e)}")
             raise
     
+    def embed_queries(self, texts: List[str]) -> List[Any]:
+        """Embed query texts in one batch.
+        
+        With a query cache, texts are normalized first and only those
+        missing from the cache are embedded.
+        
+        Args:
+            texts: Query texts
+            
+        Returns:
+            One embedding per text, in input order
+        """
+        if self.query_cache is None:
+            return self._embed_queries(texts)
+        
+        normalized = [normalize_query(text) for text in texts]
+        vectors: Dict[str, Any] = {}
+        missing = []
+        for query in dict.fromkeys(normalized):
+            vector = self.query_cache.get(self.embedding_model, query)
+            if vector is None:
+                missing.append(query)
+            else:
+                vectors[query] = vector
+        if missing:
+            embedded = self._embed_queries(missing)
+            for query, vector in zip(missing, embedded):
+                vector = np.asarray(vector, dtype=np.float32)
+                self.query_cache.put(self.embedding_model, query, vector)
+                vectors[query] = vector
+        return [vectors[query] for query in normalized]
+    
+    def _embed_queries(self, texts: List[str]) -> List[Any]:
+        """Embed query texts with the configured embedding function.
+        
+        Functions that embed queries differently from documents do so in
+        ``embed_query``; others embed queries like documents.
+        
+        Args:
+            texts: Query texts
+            
+        Returns:
+            One embedding per text, in input order
+        """
+        embed_query = getattr(self.embedding_function, "embed_query", None)
+        if callable(embed_query):
+            return list(embed_query(input=texts))
+        return list(self.embedding_function(texts))
+    
+    @staticmethod
+    def _format_results(results: Dict[str, Any], row: int) -> List[Dict[str, Any]]:
+        """Convert one query's rows of a ChromaDB query result to search results.
+        
+        Args:
+            results: Result of ``collection.query``
+            row: Index of the query within the result
+            
+        Returns:
+            List of search results with metadata
+        """
+        documents = results.get("documents")
+        distances = results.get("distances")
+        formatted_results = []
+        for i in range(len(results["ids"][row])):
+            formatted_results.append({
+                "id": results["ids"][row][i],
+                "text": documents[row][i] if documents else None,
+                "metadata": results["metadatas"][row][i] if results["metadatas"] else {},
+                "score": distances[row][i] if distances else None
+            })
+        return formatted_results
+    
+    async def search_batch(self, queries: List[SearchQuery]) -> List[List[Dict[str, Any]]]:
+        """Run several searches in one call on the repository's thread pool.
+        
+        Args:
+            queries: Queries with their own limits and filters
+            
+        Returns:
+            Search results of each query, in query order
+        """
+        return await self.executor.run(self.search_batch_sync, queries)
+    
+    def search_batch_sync(self, queries: List[SearchQuery]) -> List[List[Dict[str, Any]]]:
+        """Run several searches in one call, blocking the caller.
+        
+        All query texts are embedded in a single batch. ChromaDB applies one
+        filter and field selection to every query of a request, so queries
+        are grouped by filter and projection and each group is sent as one
+        vector query; in the common case of queries sharing both that is a
+        single query for the whole batch.
+        
+        Args:
+            queries: Queries with their own limits, filters and projection
+            
+        Returns:
+            Search results of each query, in query order
+        """
+        if not queries:
+            return []
+        
+        try:
+            embeddings = self.embed_queries([query.query for query in queries])
+            
+            groups: Dict[Tuple[str, bool], List[int]] = {}
+            for i, query in enumerate(queries):
+                key = json.dumps(query.filters, sort_keys=True, default=str) if query.filters else ""
+                groups.setdefault((key, query.include_content), []).append(i)
+            
+            batch_results: List[List[Dict[str, Any]]] = [[] for _ in queries]
+            for indices in groups.values():
+                limits = [queries[i].limit or 10 for i in indices]
+                results = self.collection.query(
+                    query_embeddings=[embeddings[i] for i in indices],
+                    n_results=max(limits),
+                    where=queries[indices[0]].filters or None,
+                    include=CONTENT_FIELDS if queries[indices[0]].include_content else PROJECTED_FIELDS
+                )
+                for row, (i, limit) in enumerate(zip(indices, limits)):
+                    batch_results[i] = self._format_results(results, row)[:limit]
+            
+            logger.info(
+                f"Ran batch search of {len(queries)} queries in {len(groups)} vector queries"
+            )
+            return batch_results
+            
+        except Exception as e:
+            logger.error(f"Batch search failed: {str(e)}")
+            raise
+    
     async def find_similar(
         self,
         document_id: str,
@@ -100,6 +485,9 @@ class ChromaRepository:
     ) -> List[Tuple[Document, float]]:
         """Find documents similar to a given document.
         
+        The lookup runs on the repository's thread pool and queries by the
+        document's stored embedding.
+        
         Args:
             document_id: ID of the document to find similar ones for
             limit: Maximum number of similar documents to return
@@ -111,36 +499,39 @@ class ChromaRepository:
             ValueError: If document not found
             Exception: If similarity search fails
         """
-        try:
-            # Get the source document first
-            source_results = self.collection.get(
-                ids=[document_id]
-            )
+        return await self.executor.run(self.find_similar_sync, document_id, limit)
+    
+    def find_similar_sync(
+        self,
+        document_id: str,
+        limit: Optional[int] = 5
+    ) -> List[Tuple[Document, float]]:
+        """Find documents similar to a given document, blocking the caller.
+        
+        The stored embedding of the document (or of the first chunk, when a
+        note ID is given) is used as the query, so the cost does not depend
+        on the length of the note.
+        
+        Args:
+            document_id: ID of the document to find similar ones for
+            limit: Maximum number of similar documents to return
             
-            if not source_results["documents"]:
-                raise ValueError(f"Document not found: {document_id}")
-                
-            # Use the document content to find similar ones
-            source_text = source_results["documents"][0]
-            results = self.collection.query(
-                query_texts=[source_text],
-                n_results=limit + 1  # Add 1 to account for the source document
-            )
+        Returns:
+            List of tuples containing (Document, similarity_score)
             
-            # Format results, excluding the source document
-            similar_docs = []
-            for i in range(len(results["ids"][0])):
-                if results["ids"][0][i] != document_id:  # Skip the source document
-                    doc = Document(
-                        id=results["ids"][0][i],
-                        content=results["documents"][0][i],
-                        metadata=results["metadatas"][0][i] if results["metadatas"] else {}
-                    )
-                    score = results["distances"][0][i] if "distances" in results else 0.0
-                    similar_docs.append((doc, score))
+        Raises:
+            ValueError: If document not found
+            Exception: If similarity search fails
+        """
+        try:
+            sources = self._source_embeddings([document_id])
+            if document_id not in sources:
+                raise ValueError(f"Document not found: {document_id}")
             
+            embedding, metadata = sources[document_id]
+            similar_docs = self._query_similar(document_id, embedding, metadata, limit)
             logger.info(f"Found {len(similar_docs)} similar documents for {document_id}")
-            return similar_docs[:limit]  # Ensure we return at most 'limit' documents
+            return similar_docs
             
         except ValueError as e:
             logger.error(f"Document not found: {str(e)}")
@@ -149,6 +540,143 @@ class ChromaRepository:
             logger.error(f"Error finding similar documents: {str(e)}")
             raise
     
+    async def find_similar_many(
+        self,
+        document_ids: List[str],
+        limit: Optional[int] = 5
+    ) -> Dict[str, List[Tuple[Document, float]]]:
+        """Find similar documents for several documents on the repository's thread pool.
+        
+        Args:
+            document_ids: IDs of the documents to find similar ones for
+            limit: Maximum number of similar documents per document
+            
+        Returns:
+            Similar documents by source document ID; unknown IDs are omitted
+        """
+        return await self.executor.run(self.find_similar_many_sync, document_ids, limit)
+    
+    def find_similar_many_sync(
+        self,
+        document_ids: List[str],
+        limit: Optional[int] = 5
+    ) -> Dict[str, List[Tuple[Document, float]]]:
+        """Find similar documents for several documents, blocking the caller.
+        
+        The stored embeddings of all sources are fetched with one ``get``
+        call (plus one for note IDs resolved to their first chunk).
+        
+        Args:
+            document_ids: IDs of the documents to find similar ones for
+            limit: Maximum number of similar documents per document
+            
+        Returns:
+            Similar documents by source document ID; unknown IDs are omitted
+        """
+        if not document_ids:
+            return {}
+        
+        try:
+            sources = self._source_embeddings(document_ids)
+            similar = {
+                document_id: self._query_similar(document_id, embedding, metadata, limit)
+                for document_id, (embedding, metadata) in sources.items()
+            }
+            logger.info(
+                f"Found similar documents for {len(similar)} of {len(document_ids)} documents"
+            )
+            return similar
+            
+        except Exception as e:
+            logger.error(f"Error finding similar documents: {str(e)}")
+            raise
+    
+    def _source_embeddings(
+        self,
+        document_ids: List[str]
+    ) -> Dict[str, Tuple[Any, Dict[str, Any]]]:
+        """Fetch the stored embeddings and metadata of similarity sources.
+        
+        IDs that are not stored documents are looked up as note IDs and
+        resolved to the note's first chunk.
+        
+        Args:
+            document_ids: Document or note IDs
+            
+        Returns:
+            (embedding, metadata) by requested ID, for every ID found
+        """
+        unique = list(dict.fromkeys(document_ids))
+        stored = self.collection.get(ids=unique, include=["embeddings", "metadatas"])
+        embeddings = stored["embeddings"] if stored["embeddings"] is not None else []
+        sources = {
+            doc_id: (embedding, metadata or {})
+            for doc_id, embedding, metadata in zip(
+                stored["ids"], embeddings, stored["metadatas"] or []
+            )
+        }
+        
+        missing = [doc_id for doc_id in unique if doc_id not in sources]
+        if missing:
+            parent = missing[0] if len(missing) == 1 else {"$in": missing}
+            chunks = self.collection.get(
+                where={"$and": [{"parent_id": parent}, {"chunk_index": 0}]},
+                include=["embeddings", "metadatas"]
+            )
+            embeddings = chunks["embeddings"] if chunks["embeddings"] is not None else []
+            for embedding, metadata in zip(embeddings, chunks["metadatas"] or []):
+                sources[metadata["parent_id"]] = (embedding, metadata)
+        return sources
+    
+    def _query_similar(
+        self,
+        document_id: str,
+        embedding: Any,
+        metadata: Dict[str, Any],
+        limit: Optional[int]
+    ) -> List[Tuple[Document, float]]:
+        """Query the neighbours of a stored embedding, excluding its note.
+        
+        Chunks of the source note are excluded by the query filter, so no
+        extra hits are fetched for them. Hits are scored by cosine distance,
+        whatever the distance function of the collection, so that scores
+        match those of the related-notes graph.
+        
+        Args:
+            document_id: ID of the source document
+            embedding: Stored embedding of the source
+            metadata: Stored metadata of the source
+            limit: Maximum number of similar notes to return
+            
+        Returns:
+            List of tuples containing (Document, cosine distance), closest first
+        """
+        source_note = metadata.get("parent_id", document_id)
+        # "$ne" also matches documents without a parent_id, which includes
+        # a source stored as a whole note; leave room to drop it
+        extra = 0 if "parent_id" in metadata else 1
+        results = self.collection.query(
+            query_embeddings=[embedding],
+            n_results=(limit or 10) * CHUNK_OVERFETCH + extra,
+            where={"parent_id": {"$ne": source_note}},
+            include=["documents", "metadatas", "embeddings"]
+        )
+        
+        hits = self._format_results(results, 0)
+        embeddings = results.get("embeddings")
+        distances = cosine_distances(
+            embedding, embeddings[0] if embeddings is not None else np.zeros((0, 0))
+        )
+        similar_docs = []
+        for hit, distance in zip(hits, distances):
+            hit_metadata = hit["metadata"] or {}
+            if hit["id"] == document_id or hit_metadata.get("parent_id", hit["id"]) == source_note:
+                continue
+            doc = Document(id=hit["id"], content=hit["text"], metadata=hit_metadata)
+            similar_docs.append((doc, float(distance)))
+        similar_docs.sort(key=lambda item: item[1])
+        return collapse_chunks(similar_docs, lambda item: item[0].metadata, limit)
+    
     def add_documents(self, documents: List[Document]) -> None:
         """Add documents to the vector store.
         
@@ -165,11 +693,12 @@ class ChromaRepository:
             metadatas = [doc.metadata for doc in documents]
             
             # Add to collection
-            self.collection.add(
-                ids=ids,
-                documents=contents,
-                metadatas=metadatas
-            )
+            with self._writing(note_ids_of(documents)):
+                self.collection.add(
+                    ids=ids,
+                    documents=contents,
+                    metadatas=metadatas
+                )
             
             logger.info(f"Added {len(documents)} documents to collection")
             
@@ -177,11 +706,210 @@ class ChromaRepository:
             logger.error(f"Error adding documents: {str(e)}")
             raise
     
+    def upsert_documents(
+        self,
+        documents: List[Document],
+        skip_unchanged: bool = True,
+        on_embedded: Optional[Callable[[List[Document]], None]] = None
+    ) -> int:
+        """Add new documents and replace changed ones.
+
+        The hash of each document's content is stored in its metadata. The
+        stored metadata of the whole batch is fetched with one ``get`` call,
+        and only new documents or documents whose content hash differs are
+        sent to the embedding function. Documents with unchanged content but
+        changed metadata are updated without re-embedding.
+
+        ChromaDB merges metadata on upsert and update, so documents losing
+        metadata keys are deleted and written again instead; a relabeled one
+        is written with its stored embedding.
+
+        Args:
+            documents: List of Document objects to upsert
+            skip_unchanged: Skip documents whose stored content hash matches
+            on_embedded: Optional callback receiving the documents that were
+                sent to the embedding function, once they are stored
+
+        Returns:
+            Number of documents that were (re-)embedded
+        """
+        if not documents:
+            return 0
+
+        try:
+            documents = [
+                Document(
+                    id=doc.id,
+                    content=doc.content,
+                    metadata={**doc.metadata, CONTENT_HASH_KEY: content_hash(doc.content)}
+                )
+                for doc in documents
+            ]
+            existing: Dict[str, Dict[str, Any]] = {}
+            if skip_unchanged:
+                stored = self.collection.get(
+                    ids=[doc.id for doc in documents],
+                    include=["metadatas"]
+                )
+                existing = dict(zip(stored["ids"], stored["metadatas"] or []))
+
+            changed: List[Document] = []
+            relabeled: List[Document] = []
+            for doc in documents:
+                stored_metadata = existing.get(doc.id)
+                stored_hash = (stored_metadata or {}).get(CONTENT_HASH_KEY)
+                if stored_hash != doc.metadata[CONTENT_HASH_KEY]:
+                    changed.append(doc)
+                elif stored_metadata != doc.metadata:
+                    relabeled.append(doc)
+
+            if changed:
+                with self._writing(note_ids_of(changed)):
+                    dropping = [doc.id for doc in changed if self._drops_keys(doc, existing)]
+                    if dropping:
+                        self.collection.delete(ids=dropping)
+                    self.collection.upsert(
+                        ids=[doc.id for doc in changed],
+                        documents=[doc.content for doc in changed],
+                        metadatas=[doc.metadata for doc in changed]
+                    )
+                if on_embedded is not None:
+                    on_embedded(changed)
+            if relabeled:
+                with self._writing(note_ids_of(relabeled)):
+                    rewritten = [doc for doc in relabeled if self._drops_keys(doc, existing)]
+                    rewritten_ids = {doc.id for doc in rewritten}
+                    merged = [doc for doc in relabeled if doc.id not in rewritten_ids]
+                    if rewritten:
+                        self._rewrite_documents(rewritten)
+                    if merged:
+                        self.collection.update(
+                            ids=[doc.id for doc in merged],
+                            metadatas=[doc.metadata for doc in merged]
+                        )
+
+            logger.info(
+                f"Upserted {len(documents)} documents ({len(changed)} embedded, "
+                f"{len(relabeled)} metadata-only, "
+                f"{len(documents) - len(changed) - len(relabeled)} unchanged)"
+            )
+            return len(changed)
+
+        except Exception as e:
+            logger.error(f"Error upserting documents: {str(e)}")
+            raise
+
+    @staticmethod
+    def _drops_keys(document: Document, existing: Dict[str, Dict[str, Any]]) -> bool:
+        """Check whether the stored metadata of a document has keys its new metadata lacks.
+
+        Args:
+            document: Document with its new metadata
+            existing: Stored metadata by document ID
+
+        Returns:
+            True if writing the metadata must not merge with the stored one
+        """
+        stored = existing.get(document.id) or {}
+        return any(key not in document.metadata for key in stored)
+
+    def _rewrite_documents(self, documents: List[Document]) -> None:
+        """Replace stored documents whole, keeping their stored embeddings.
+
+        Called within a write, for documents whose content is unchanged.
+
+        Args:
+            documents: Documents with their new metadata
+        """
+        stored = self.collection.get(ids=[doc.id for doc in documents], include=["embeddings"])
+        embeddings = stored["embeddings"] if stored["embeddings"] is not None else []
+        by_id = dict(zip(stored["ids"], embeddings))
+        self.collection.delete(ids=[doc.id for doc in documents])
+        self.collection.add(
+            ids=[doc.id for doc in documents],
+            embeddings=[by_id[doc.id] for doc in documents],
+            documents=[doc.content for doc in documents],
+            metadatas=[doc.metadata for doc in documents]
+        )
+
+    def move_documents(self, moves: List[Tuple[str, Document]]) -> int:
+        """Move documents to new IDs, reusing their stored embeddings.
+
+        Stored embeddings are fetched for all old IDs in one call. A document
+        whose stored content hash matches its new content is written with the
+        copied embedding; any other document is embedded normally. The old
+        IDs are deleted afterwards.
+
+        Args:
+            moves: (old document ID, new document) pairs
+
+        Returns:
+            Number of documents moved without re-embedding
+        """
+        if not moves:
+            return 0
+
+        try:
+            stored = self.collection.get(
+                ids=[old_id for old_id, _ in moves],
+                include=["embeddings", "metadatas"]
+            )
+            embeddings = stored["embeddings"] if stored["embeddings"] is not None else []
+            existing = {
+                old_id: (embedding, metadata or {})
+                for old_id, embedding, metadata in zip(
+                    stored["ids"], embeddings, stored["metadatas"] or []
+                )
+            }
+
+            copied: List[Tuple[Document, Any]] = []
+            reembed: List[Document] = []
+            for old_id, doc in moves:
+                doc = Document(
+                    id=doc.id,
+                    content=doc.content,
+                    metadata={**doc.metadata, CONTENT_HASH_KEY: content_hash(doc.content)}
+                )
+                embedding, metadata = existing.get(old_id, (None, {}))
+                if (
+                    embedding is not None
+                    and metadata.get(CONTENT_HASH_KEY) == doc.metadata[CONTENT_HASH_KEY]
+                ):
+                    copied.append((doc, embedding))
+                else:
+                    reembed.append(doc)
+
+            if copied:
+                with self._writing(note_ids_of(doc for doc, _ in copied)):
+                    self.collection.upsert(
+                        ids=[doc.id for doc, _ in copied],
+                        embeddings=[embedding for _, embedding in copied],
+                        documents=[doc.content for doc, _ in copied],
+                        metadatas=[doc.metadata for doc, _ in copied]
+                    )
+            self.upsert_documents(reembed)
+            new_ids = {doc.id for doc, _ in copied} | {doc.id for doc in reembed}
+            old_ids = [old_id for old_id, _ in moves if old_id not in new_ids]
+            if old_ids:
+                with self._writing(
+                    existing[old_id][1].get("parent_id", old_id) if old_id in existing else old_id
+                    for old_id in old_ids
+                ):
+                    self.collection.delete(ids=old_ids)
+
+            logger.info(f"Moved {len(moves)} documents ({len(copied)} without re-embedding)")
+            return len(copied)
+
+        except Exception as e:
+            logger.error(f"Error moving documents: {str(e)}")
+            raise
+
     def query(
         self,
         query_text: str,
         n_results: int = 10,
-        where: Optional[Dict[str, Any]] = None
+        where: Optional[Dict[str, Any]] = None,
+        include_content: bool = True
     ) -> List[Document]:
         """Query the vector store for similar documents.
         
@@ -189,6 +917,9 @@ class ChromaRepository:
             query_text: Text to search for
             n_results: Maximum number of results to return
             where: Optional metadata filter conditions
+            include_content: Fetch the document content; without it the
+                returned documents have empty content, which can be loaded
+                later with ``fetch_content``
             
         Returns:
             List of matching Document objects
@@ -196,17 +927,19 @@ class ChromaRepository:
         try:
             # Execute query
             results = self.collection.query(
-                query_texts=[query_text],
+                query_embeddings=self.embed_queries([query_text]),
                 n_results=n_results,
-                where=where
+                where=where,
+                include=CONTENT_FIELDS if include_content else PROJECTED_FIELDS
             )
             
             # Convert results to Document objects
+            contents = results.get("documents")
             documents = []
             for i in range(len(results["ids"][0])):
                 doc = Document(
                     id=results["ids"][0][i],
-                    content=results["documents"][0][i],
+                    content=contents[0][i] if contents else "",
                     metadata=results["metadatas"][0][i] if results["metadatas"] else {}
                 )
                 documents.append(doc)
@@ -218,15 +951,303 @@ class ChromaRepository:
             logger.error(f"Error querying documents: {str(e)}")
             raise
     
-    def delete_documents(self, ids: List[str]) -> None:
+    async def afetch_content(self, ids: List[str]) -> Dict[str, str]:
+        """Fetch document content on the repository's thread pool.
+        
+        Args:
+            ids: Document IDs
+            
+        Returns:
+            Content by document ID, for every document found
+        """
+        return await self.executor.run(self.fetch_content, ids)
+    
+    def fetch_content(self, ids: List[str]) -> Dict[str, str]:
+        """Fetch the content of documents returned by a projected query.
+        
+        Args:
+            ids: Document IDs
+            
+        Returns:
+            Content by document ID, for every document found
+        """
+        if not ids:
+            return {}
+        stored = self.collection.get(ids=list(ids), include=["documents"])
+        return dict(zip(stored["ids"], stored["documents"]))
+    
+    async def afetch_results(
+        self,
+        ids: List[str],
+        where: Optional[Dict[str, Any]] = None,
+        include_content: bool = True
+    ) -> Dict[str, Dict[str, Any]]:
+        """Fetch documents as search results on the repository's thread pool.
+
+        Args:
+            ids: Document IDs
+            where: Optional metadata filter the documents must match
+            include_content: Fetch the content of each document
+
+        Returns:
+            Search results without a score by document ID, for every
+            document found
+        """
+        return await self.executor.run(self.fetch_results, ids, where, include_content)
+
+    def fetch_results(
+        self,
+        ids: List[str],
+        where: Optional[Dict[str, Any]] = None,
+        include_content: bool = True
+    ) -> Dict[str, Dict[str, Any]]:
+        """Fetch documents ranked outside the vector store as search results.
+
+        Args:
+            ids: Document IDs
+            where: Optional metadata filter the documents must match
+            include_content: Fetch the content of each document; without it
+                "text" is None
+
+        Returns:
+            Search results without a score by document ID, for every
+            document found
+        """
+        if not ids:
+            return {}
+        stored = self.collection.get(
+            ids=list(ids),
+            where=where,
+            include=["documents", "metadatas"] if include_content else ["metadatas"]
+        )
+        documents = stored.get("documents") if include_content else None
+        return {
+            doc_id: {
+                "id": doc_id,
+                "text": documents[i] if documents else None,
+                "metadata": stored["metadatas"][i] or {},
+                "score": None
+            }
+            for i, doc_id in enumerate(stored["ids"])
+        }
+
+    def get_document(self, document_id: str) -> Optional[Document]:
+        """Get a stored document by ID.
+        
+        Args:
+            document_id: Document ID
+            
+        Returns:
+            The document, or None if it does not exist
+        """
+        stored = self.collection.get(ids=[document_id], include=["documents", "metadatas"])
+        if not stored["ids"]:
+            return None
+        return Document(
+            id=stored["ids"][0],
+            content=stored["documents"][0],
+            metadata=stored["metadatas"][0] or {}
+        )
+    
+    def _scan(
+        self,
+        include: List[str],
+        where: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Tuple[str, Any, Dict[str, Any]]]:
+        """Iterate over stored records page by page.
+        
+        Args:
+            include: Fields to fetch besides IDs ("embeddings", "metadatas")
+            where: Optional metadata filter
+            
+        Yields:
+            (ID, embedding or None, metadata) per record
+        """
+        offset = 0
+        while True:
+            page = self.collection.get(
+                where=where,
+                include=include,
+                limit=SCAN_PAGE_SIZE,
+                offset=offset
+            )
+            ids = page["ids"]
+            embeddings = page.get("embeddings")
+            if embeddings is None:
+                embeddings = [None] * len(ids)
+            for doc_id, embedding, metadata in zip(ids, embeddings, page["metadatas"] or [{}] * len(ids)):
+                yield doc_id, embedding, metadata or {}
+            if len(ids) < SCAN_PAGE_SIZE:
+                return
+            offset += len(ids)
+    
+    def note_signatures(self, note_ids: Optional[List[str]] = None) -> Dict[str, str]:
+        """Get a signature of the content of stored notes.
+        
+        Only metadata is read. A note's signature changes whenever the
+        content of any of its chunks changes.
+        
+        Args:
+            note_ids: Optional notes to fetch (defaults to all notes)
+            
+        Returns:
+            Signature by note ID, for every note found
+        """
+        where = None
+        if note_ids is not None:
+            if not note_ids:
+                return {}
+            where = {"parent_id": {"$in": list(note_ids)}}
+        
+        hashes: Dict[str, List[Tuple[int, str]]] = {}
+        records = list(self._scan(["metadatas"], where))
+        # Notes stored as a single document without a parent_id
+        if note_ids is not None:
+            stored = self.collection.get(ids=list(note_ids), include=["metadatas"])
+            records.extend(
+                (doc_id, None, metadata or {})
+                for doc_id, metadata in zip(stored["ids"], stored["metadatas"] or [])
+                if "parent_id" not in (metadata or {})
+            )
+        for doc_id, _, metadata in records:
+            note_id = metadata.get("parent_id", doc_id)
+            hashes.setdefault(note_id, []).append(
+                (metadata.get("chunk_index", 0), metadata.get(CONTENT_HASH_KEY, doc_id))
+            )
+        return {
+            note_id: content_hash("|".join(chunk_hash for _, chunk_hash in sorted(chunks)))
+            for note_id, chunks in hashes.items()
+        }
+    
+    def note_vectors(self, note_ids: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+        """Get one vector per note from the stored chunk embeddings.
+        
+        A note's vector is the sum of its normalized chunk embeddings, which
+        points in the direction of their mean, so long notes are not
+        dominated by any single chunk.
+        
+        Args:
+            note_ids: Optional notes to fetch (defaults to all notes)
+            
+        Returns:
+            Vector by note ID
+        """
+        where = None
+        if note_ids is not None:
+            if not note_ids:
+                return {}
+            where = {"parent_id": {"$in": list(note_ids)}}
+        
+        sums: Dict[str, np.ndarray] = {}
+        for doc_id, embedding, metadata in self._scan(["embeddings", "metadatas"], where):
+            note_id = metadata.get("parent_id", doc_id)
+            vector = np.asarray(embedding, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            vector = vector / norm if norm else vector
+            sums[note_id] = sums[note_id] + vector if note_id in sums else vector
+        
+        # Notes stored as a single document without a parent_id
+        if note_ids is not None:
+            missing = [note_id for note_id in note_ids if note_id not in sums]
+            if missing:
+                stored = self.collection.get(ids=missing, include=["embeddings"])
+                embeddings = stored["embeddings"] if stored["embeddings"] is not None else []
+                for doc_id, embedding in zip(stored["ids"], embeddings):
+                    sums[doc_id] = np.asarray(embedding, dtype=np.float32)
+        return sums
+    
+    async def get_notes(self, note_ids: List[str]) -> Dict[str, Document]:
+        """Fetch the first chunk of several notes on the repository's thread pool.
+        
+        Args:
+            note_ids: Note IDs
+            
+        Returns:
+            First chunk (or whole document) by note ID, for every note found
+        """
+        return await self.executor.run(self.get_notes_sync, note_ids)
+    
+    def get_notes_sync(self, note_ids: List[str]) -> Dict[str, Document]:
+        """Fetch the first chunk of several notes, blocking the caller.
+        
+        Args:
+            note_ids: Note IDs
+            
+        Returns:
+            First chunk (or whole document) by note ID, for every note found
+        """
+        if not note_ids:
+            return {}
+        parent = note_ids[0] if len(note_ids) == 1 else {"$in": list(note_ids)}
+        stored = self.collection.get(where={"$and": [{"parent_id": parent}, {"chunk_index": 0}]})
+        notes = {
+            metadata["parent_id"]: Document(id=doc_id, content=content, metadata=metadata)
+            for doc_id, content, metadata in zip(
+                stored["ids"], stored["documents"], stored["metadatas"]
+            )
+        }
+        missing = [note_id for note_id in note_ids if note_id not in notes]
+        if missing:
+            stored = self.collection.get(ids=missing)
+            for doc_id, content, metadata in zip(
+                stored["ids"], stored["documents"], stored["metadatas"]
+            ):
+                notes[doc_id] = Document(id=doc_id, content=content, metadata=metadata or {})
+        return notes
+    
+    async def aquery(
+        self,
+        query_text: str,
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        include_content: bool = True
+    ) -> List[Document]:
+        """Query the vector store on the repository's thread pool.
+        
+        Args:
+            query_text: Text to search for
+            n_results: Maximum number of results to return
+            where: Optional metadata filter conditions
+            include_content: Fetch the document content
+            
+        Returns:
+            List of matching Document objects
+        """
+        return await self.executor.run(self.query, query_text, n_results, where, include_content)
+    
+    async def count(self) -> int:
+        """Count the documents in the collection on the repository's thread pool.
+        
+        Returns:
+            Number of stored documents
+        """
+        return await self.executor.run(self.collection.count)
+    
+    def delete_documents(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None
+    ) -> None:
         """Delete documents from the vector store.
         
         Args:
             ids: List of document IDs to delete
+            where: Optional metadata filter selecting documents to delete
         """
+        if not ids and not where:
+            return
+
         try:
-            self.collection.delete(ids=ids)
-            logger.info(f"Deleted {len(ids)} documents")
+            # Look up the notes losing documents, so that consumers of the
+            # change log only revisit those
+            stored = self.collection.get(ids=ids or None, where=where, include=["metadatas"])
+            note_ids = [
+                (metadata or {}).get("parent_id", doc_id)
+                for doc_id, metadata in zip(stored["ids"], stored["metadatas"] or [])
+            ]
+            with self._writing(note_ids):
+                self.collection.delete(ids=ids or None, where=where)
+            logger.info(f"Deleted documents (ids={len(ids or [])}, where={where})")
         except Exception as e:
             logger.error(f"Error deleting documents: {str(e)}")
             raise
@@ -238,11 +1259,14 @@ class ChromaRepository:
             document: Document object with updated content/metadata
         """
         try:
-            self.collection.update(
-                ids=[document.id],
-                documents=[document.content],
-                metadatas=[document.metadata]
-            )
+            stored = self.collection.get(ids=[document.id], include=["metadatas"])
+            stored_metadata = (stored["metadatas"] or [None])[0] or {}
+            with self._writing([stored_metadata.get("parent_id", document.id)]):
+                self.collection.update(
+                    ids=[document.id],
+                    documents=[document.content],
+                    metadatas=[document.metadata]
+                )
             logger.info(f"Updated document {document.id}")
         except Exception as e:
             logger.error(f"Error updating document: {str(e)}")
@@ -0,0 +1,354 @@
+"""
+Persistent embedding cache.
+
+This module stores embeddings in SQLite keyed by (embedding model, text hash),
+so that identical text is never embedded twice across renames, collection
+rebuilds and chunking changes. The cache is bounded by entry count and vector
+bytes and evicts least recently used entries first.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of SQL variables per statement on older SQLite builds
+_SQL_BATCH = 500
+
+# Number of pending last-used updates written without waiting for a store
+_TOUCH_BATCH = 4096
+
+
+def text_hash(text: str) -> str:
+    """Compute the cache key of a text.
+
+    Args:
+        text: Text to embed
+
+    Returns:
+        Hex digest of the text
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """SQLite-backed LRU cache of embedding vectors.
+
+    The entry count and vector bytes are kept in memory, so the cache assumes
+    it is the only writer of its database. Lookups only record when entries
+    were used; the times are written with the next store, or once enough of
+    them are pending.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ):
+        """Initialize the cache.
+
+        Args:
+            path: SQLite database file, or ``":memory:"``
+            max_entries: Maximum number of cached vectors
+            max_bytes: Maximum total size of cached vectors in bytes
+        """
+        self.path = str(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # Last-used times not written yet, by (model, text hash)
+        self._touched: Dict[Tuple[str, str], int] = {}
+
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used INTEGER NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+        self._entries, self._bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()
+
+    def get_many(self, model: str, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Look up cached vectors and mark them as recently used.
+
+        Args:
+            model: Embedding model key
+            hashes: Text hashes to look up
+
+        Returns:
+            Mapping of text hash to float32 vector for every hit
+        """
+        unique = list(dict.fromkeys(hashes))
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for start in range(0, len(unique), _SQL_BATCH):
+                batch = unique[start:start + _SQL_BATCH]
+                rows = self._conn.execute(
+                    "SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({','.join('?' * len(batch))})",
+                    [model, *batch]
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+
+            if found:
+                now = time.time_ns()
+                self._touched.update(((model, key), now) for key in found)
+                if len(self._touched) >= _TOUCH_BATCH:
+                    self._write_touched()
+                    self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(unique) - len(found)
+        return found
+
+    def put_many(self, model: str, items: Iterable[Tuple[str, Any]]) -> None:
+        """Store vectors and evict entries beyond the configured bounds.
+
+        Args:
+            model: Embedding model key
+            items: (text hash, vector) pairs
+        """
+        now = time.time_ns()
+        rows = [
+            (model, key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for key, vector in items
+        ]
+        if not rows:
+            return
+        with self._lock:
+            # Vectors being replaced no longer count towards the bounds
+            keys = list(dict.fromkeys(row[1] for row in rows))
+            for start in range(0, len(keys), _SQL_BATCH):
+                batch = keys[start:start + _SQL_BATCH]
+                for (size,) in self._conn.execute(
+                    "SELECT LENGTH(vector) FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({','.join('?' * len(batch))})",
+                    [model, *batch]
+                ):
+                    self._entries -= 1
+                    self._bytes -= size
+            stored = list({row[1]: row for row in rows}.values())
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                stored
+            )
+            self._entries += len(stored)
+            self._bytes += sum(len(row[2]) for row in stored)
+            for row in stored:
+                self._touched.pop((model, row[1]), None)
+            # Eviction must see when entries were last used
+            self._write_touched()
+            self._evict()
+            self._conn.commit()
+
+    def _write_touched(self) -> None:
+        """Write the pending last-used times."""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                [(now, model, key) for (model, key), now in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the cache fits its bounds."""
+        if self.max_entries is not None and self._entries > self.max_entries:
+            self._delete_oldest(self._entries - self.max_entries)
+
+        if self.max_bytes is not None and self._bytes > self.max_bytes:
+            # Walk entries from oldest until enough bytes are freed
+            freed = 0
+            excess = 0
+            for (size,) in self._conn.execute(
+                "SELECT LENGTH(vector) FROM embeddings ORDER BY last_used"
+            ):
+                freed += size
+                excess += 1
+                if self._bytes - freed <= self.max_bytes:
+                    break
+            self._delete_oldest(excess)
+
+    def _delete_oldest(self, count: int) -> None:
+        """Delete the ``count`` least recently used entries."""
+        victims = self._conn.execute(
+            "SELECT rowid, LENGTH(vector) FROM embeddings ORDER BY last_used LIMIT ?",
+            (count,)
+        ).fetchall()
+        self._conn.executemany(
+            "DELETE FROM embeddings WHERE rowid = ?", [(rowid,) for rowid, _ in victims]
+        )
+        self._entries -= len(victims)
+        self._bytes -= sum(size for _, size in victims)
+        self.evictions += len(victims)
+        logger.debug(f"Evicted {len(victims)} cached embeddings")
+
+    def clear(self) -> None:
+        """Remove all cached vectors."""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._touched.clear()
+            self._entries = 0
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters.
+
+        Returns:
+            Entry count, stored bytes, hits, misses, hit rate and evictions
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": self._entries,
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions
+        }
+
+    def close(self) -> None:
+        """Write pending last-used times and close the database connection."""
+        with self._lock:
+            self._write_touched()
+            self._conn.commit()
+            self._conn.close()
+
+    def __len__(self) -> int:
+        return self._entries
+
+
+def embedding_model_key(embedding_function: Any) -> str:
+    """Build the cache key identifying an embedding function and its settings.
+
+    Args:
+        embedding_function: ChromaDB embedding function
+
+    Returns:
+        Model key combining the function name and its serialized config
+    """
+    try:
+        name = embedding_function.name()
+    except Exception:
+        name = NotImplemented
+    if name is NotImplemented or not name:
+        name = type(embedding_function).__name__
+    try:
+        config = embedding_function.get_config()
+    except Exception:
+        config = NotImplemented
+    if config is NotImplemented or config is None:
+        return name
+    return f"{name}:{json.dumps(config, sort_keys=True, default=str)}"
+
+
+class CachedEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Embedding function that consults an ``EmbeddingCache`` before embedding."""
+
+    def __init__(
+        self,
+        embedding_function: EmbeddingFunction[Documents],
+        cache: EmbeddingCache,
+        model: Optional[str] = None
+    ):
+        """Initialize the wrapper.
+
+        Args:
+            embedding_function: Embedding function called for cache misses
+            cache: Embedding cache
+            model: Optional model key (defaults to the function's name and config)
+        """
+        self.embedding_function = embedding_function
+        self.cache = cache
+        self.model = model or embedding_model_key(embedding_function)
+
+    def __call__(self, input: Documents) -> Embeddings:
+        """Embed texts, calling the wrapped function only for cache misses.
+
+        Args:
+            input: Texts to embed
+
+        Returns:
+            One embedding per text, in input order
+        """
+        texts = list(input)
+        hashes = [text_hash(text) for text in texts]
+        vectors = self.cache.get_many(self.model, hashes)
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(hashes, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        if missing:
+            embedded = self.embedding_function(list(missing.values()))
+            fresh = dict(zip(missing, (np.asarray(v, dtype=np.float32) for v in embedded)))
+            self.cache.put_many(self.model, fresh.items())
+            vectors.update(fresh)
+
+        return [vectors[key] for key in hashes]
+
+    def embed_query(self, input: Documents) -> Embeddings:
+        """Embed query texts with the wrapped function, bypassing the cache.
+
+        Queries go to the wrapped function's ``embed_query``, since models
+        may embed queries differently from documents; repeated queries are
+        cached in memory by the repository's query cache instead.
+
+        Args:
+            input: Query texts to embed
+
+        Returns:
+            One embedding per text, in input order
+        """
+        embed_query = getattr(self.embedding_function, "embed_query", None)
+        if callable(embed_query):
+            return embed_query(input)
+        return self.embedding_function(input)
+
+    # Delegate identity and space to the wrapped function, so that the
+    # collection stays compatible with the uncached embedding function
+    def name(self) -> str:  # type: ignore[override]
+        return self.embedding_function.name()
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.embedding_function.get_config()
+
+    def default_space(self):  # type: ignore[override]
+        return self.embedding_function.default_space()
+
+    def supported_spaces(self) -> List[Any]:  # type: ignore[override]
+        return self.embedding_function.supported_spaces()
+
+    def is_legacy(self) -> bool:
+        # The wrapper cannot be rebuilt from a persisted config, so it must
+        # not be registered with ChromaDB
+        return True
@@ -0,0 +1,146 @@
+"""
+Thread pool for blocking repository calls.
+
+ChromaDB's client is synchronous. This module runs its calls on a dedicated,
+bounded thread pool so that async request handlers never block the event
+loop, and records how long calls wait for a free thread (queue time) and how
+long they run, so that saturation shows up in the metrics instead of as
+unexplained latency.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Sequence, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Number of recent calls kept for latency percentiles
+_SAMPLE_SIZE = 1024
+
+
+def _percentile(samples: Sequence[float], fraction: float) -> float:
+    """Get a percentile of samples using the nearest-rank method.
+
+    Args:
+        samples: Measured values
+        fraction: Percentile between 0 and 1
+
+    Returns:
+        The percentile, or 0.0 without samples
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(int(fraction * len(ordered)), len(ordered) - 1)
+    return ordered[index]
+
+
+class RepositoryExecutor:
+    """Bounded thread pool with queue-time and run-time metrics."""
+
+    def __init__(self, max_workers: int = 4, name: str = "chroma"):
+        """Initialize the executor.
+
+        Args:
+            max_workers: Maximum number of repository calls running at once
+            name: Prefix of the worker thread names
+
+        Raises:
+            ValueError: If max_workers is not positive
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._queue_times: Deque[float] = deque(maxlen=_SAMPLE_SIZE)
+        self._run_times: Deque[float] = deque(maxlen=_SAMPLE_SIZE)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.running = 0
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking function on the pool and await its result.
+
+        Args:
+            fn: Function to call
+            *args: Positional arguments of the function
+            **kwargs: Keyword arguments of the function
+
+        Returns:
+            The function's return value
+
+        Raises:
+            Exception: Whatever the function raises
+        """
+        submitted_at = time.perf_counter()
+        with self._lock:
+            self.submitted += 1
+
+        def call() -> T:
+            started_at = time.perf_counter()
+            with self._lock:
+                self.running += 1
+                self._queue_times.append(started_at - submitted_at)
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self._run_times.append(time.perf_counter() - started_at)
+                    if ok:
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, call)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get executor metrics.
+
+        Queue and run times are in milliseconds over the most recent calls.
+
+        Returns:
+            Concurrency limit, call counters, calls waiting for a thread and
+            queue/run time percentiles
+        """
+        with self._lock:
+            queue_times = list(self._queue_times)
+            run_times = list(self._run_times)
+            finished = self.completed + self.failed
+            stats = {
+                "max_workers": self.max_workers,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "running": self.running,
+                "queued": self.submitted - finished - self.running
+            }
+        for label, samples in (("queue_ms", queue_times), ("run_ms", run_times)):
+            stats[label] = {
+                "p50": round(_percentile(samples, 0.50) * 1000, 2),
+                "p95": round(_percentile(samples, 0.95) * 1000, 2),
+                "p99": round(_percentile(samples, 0.99) * 1000, 2),
+                "max": round(max(samples, default=0.0) * 1000, 2)
+            }
+        return stats
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker threads.
+
+        Args:
+            wait: Wait for running calls to finish
+        """
+        self._pool.shutdown(wait=wait)
+        logger.info("Repository executor shut down")
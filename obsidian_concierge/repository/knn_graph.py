@@ -0,0 +1,308 @@
+"""
+Precomputed nearest-neighbour graph of notes.
+
+This module keeps the top-k most similar notes of every note, computed with
+blocked matrix products over normalized note vectors, so that "related notes"
+lookups are a table read instead of a vector query. The graph is stored as a
+handful of arrays in one ``.npz`` file and can be updated incrementally: only
+rows whose neighbour lists involved a changed or removed note are recomputed,
+every other row just merges the changed notes as new candidates.
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Neighbour slot without a note (graphs with fewer than k + 1 notes)
+EMPTY = -1
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length, leaving zero rows untouched."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class KnnGraph:
+    """Top-k cosine neighbours of every note.
+
+    Distances are cosine distances (``1 - cosine similarity``), so that
+    smaller is closer, as with ChromaDB query distances.
+    """
+
+    def __init__(self, k: int = 20, block_size: int = 1024):
+        """Initialize an empty graph.
+
+        Args:
+            k: Number of neighbours kept per note
+            block_size: Number of rows compared against all notes at once;
+                bounds the similarity matrix to ``block_size x notes``
+
+        Raises:
+            ValueError: If k or block_size is not positive
+        """
+        if k < 1 or block_size < 1:
+            raise ValueError("k and block_size must be at least 1")
+        self.k = k
+        self.block_size = block_size
+        self.ids: List[str] = []
+        self.signatures: List[str] = []
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.neighbors = np.zeros((0, k), dtype=np.int32)
+        self.distances = np.zeros((0, k), dtype=np.float32)
+        self._rows: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, note_id: object) -> bool:
+        return note_id in self._rows
+
+    def copy(self) -> "KnnGraph":
+        """Copy the graph, so that it can be updated while the original is read.
+
+        Returns:
+            An independent copy
+        """
+        graph = KnnGraph(k=self.k, block_size=self.block_size)
+        graph.ids = list(self.ids)
+        graph.signatures = list(self.signatures)
+        graph.vectors = self.vectors.copy()
+        graph.neighbors = self.neighbors.copy()
+        graph.distances = self.distances.copy()
+        graph._rows = dict(self._rows)
+        return graph
+
+    def signature(self, note_id: str) -> Optional[str]:
+        """Get the content signature a note had when its row was computed.
+
+        Args:
+            note_id: Note ID
+
+        Returns:
+            The signature, or None if the note is not in the graph
+        """
+        row = self._rows.get(note_id)
+        return None if row is None else self.signatures[row]
+
+    def build(
+        self,
+        ids: Sequence[str],
+        vectors: np.ndarray,
+        signatures: Optional[Sequence[str]] = None
+    ) -> None:
+        """Compute the graph from scratch.
+
+        Args:
+            ids: Note IDs
+            vectors: One vector per note
+            signatures: Optional content signature per note, used to detect
+                changed notes later
+        """
+        self.ids = list(ids)
+        self.signatures = list(signatures) if signatures is not None else [""] * len(self.ids)
+        self.vectors = _normalize(vectors).reshape(len(self.ids), -1)
+        self._rows = {note_id: row for row, note_id in enumerate(self.ids)}
+        self.neighbors = np.full((len(self.ids), self.k), EMPTY, dtype=np.int32)
+        self.distances = np.full((len(self.ids), self.k), np.inf, dtype=np.float32)
+        self._recompute(np.arange(len(self.ids)))
+
+    def _recompute(self, rows: np.ndarray) -> None:
+        """Recompute the neighbour lists of rows against all notes."""
+        total = len(self.ids)
+        for start in range(0, len(rows), self.block_size):
+            block = rows[start:start + self.block_size]
+            similarity = self.vectors[block] @ self.vectors.T
+            # A note is not its own neighbour
+            similarity[np.arange(len(block)), block] = -np.inf
+            self._store_top(block, np.broadcast_to(np.arange(total), similarity.shape), similarity)
+
+    def _store_top(self, rows: np.ndarray, candidates: np.ndarray, similarity: np.ndarray) -> None:
+        """Keep the k most similar candidates of each row."""
+        count = min(self.k, similarity.shape[1])
+        if count == 0:
+            return
+        if count < similarity.shape[1]:
+            top = np.argpartition(-similarity, count - 1, axis=1)[:, :count]
+        else:
+            top = np.broadcast_to(np.arange(count), (len(rows), count))
+        top_similarity = np.take_along_axis(similarity, top, axis=1)
+        order = np.argsort(-top_similarity, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_similarity = np.take_along_axis(top_similarity, order, axis=1)
+
+        neighbors = np.take_along_axis(candidates, top, axis=1).astype(np.int32)
+        distances = (1.0 - top_similarity).astype(np.float32)
+        missing = ~np.isfinite(top_similarity)
+        neighbors[missing] = EMPTY
+        distances[missing] = np.inf
+
+        self.neighbors[rows] = EMPTY
+        self.distances[rows] = np.inf
+        self.neighbors[rows, :count] = neighbors
+        self.distances[rows, :count] = distances
+
+    def update(
+        self,
+        upserts: Dict[str, np.ndarray],
+        removals: Iterable[str] = (),
+        signatures: Optional[Dict[str, str]] = None
+    ) -> int:
+        """Apply changed, added and removed notes.
+
+        A row whose neighbour list contains a changed or removed note, and
+        the rows of changed notes themselves, are recomputed against all
+        notes. Every other row is exact after merging the changed notes into
+        its list, because none of its unchanged non-neighbours can have
+        become closer.
+
+        Args:
+            upserts: New vectors of added or changed notes
+            removals: IDs of removed notes
+            signatures: Optional content signatures of the upserted notes
+
+        Returns:
+            Number of rows recomputed from scratch
+        """
+        signatures = signatures or {}
+        removed = [note_id for note_id in removals if note_id in self._rows and note_id not in upserts]
+        if not removed and not upserts:
+            return 0
+
+        # Drop removed rows and remap neighbour indices
+        affected = np.zeros(len(self.ids), dtype=bool)
+        if removed:
+            removed_rows = np.array([self._rows[note_id] for note_id in removed], dtype=np.int32)
+            affected |= np.isin(self.neighbors, removed_rows).any(axis=1)
+            keep = np.ones(len(self.ids), dtype=bool)
+            keep[removed_rows] = False
+            remap = np.full(len(self.ids) + 1, EMPTY, dtype=np.int32)
+            remap[:-1][keep] = np.arange(int(keep.sum()), dtype=np.int32)
+            # EMPTY (-1) maps to the trailing EMPTY slot
+            self.neighbors = remap[self.neighbors[keep]]
+            self.distances = self.distances[keep]
+            self.vectors = self.vectors[keep]
+            self.ids = [note_id for note_id, kept in zip(self.ids, keep) if kept]
+            self.signatures = [sig for sig, kept in zip(self.signatures, keep) if kept]
+            affected = affected[keep]
+            self._rows = {note_id: row for row, note_id in enumerate(self.ids)}
+
+        # Write changed vectors in place and append new notes
+        vectors = {note_id: _normalize(np.asarray(v).reshape(1, -1))[0] for note_id, v in upserts.items()}
+        new_ids = [note_id for note_id in vectors if note_id not in self._rows]
+        if new_ids:
+            dimension = len(next(iter(vectors.values())))
+            if self.vectors.size == 0:
+                self.vectors = np.zeros((len(self.ids), dimension), dtype=np.float32)
+            self.vectors = np.vstack([self.vectors, np.zeros((len(new_ids), dimension), dtype=np.float32)])
+            self.neighbors = np.vstack([self.neighbors, np.full((len(new_ids), self.k), EMPTY, dtype=np.int32)])
+            self.distances = np.vstack([self.distances, np.full((len(new_ids), self.k), np.inf, dtype=np.float32)])
+            for note_id in new_ids:
+                self._rows[note_id] = len(self.ids)
+                self.ids.append(note_id)
+                self.signatures.append("")
+            affected = np.concatenate([affected, np.zeros(len(new_ids), dtype=bool)])
+
+        changed_rows = np.array([self._rows[note_id] for note_id in vectors], dtype=np.int32)
+        for note_id, vector in vectors.items():
+            row = self._rows[note_id]
+            self.vectors[row] = vector
+            self.signatures[row] = signatures.get(note_id, self.signatures[row])
+        affected |= np.isin(self.neighbors, changed_rows).any(axis=1)
+        affected[changed_rows] = True
+
+        # Merge changed notes into the lists of all other rows
+        unaffected = np.flatnonzero(~affected)
+        for start in range(0, len(unaffected), self.block_size):
+            block = unaffected[start:start + self.block_size]
+            similarity = np.concatenate([
+                1.0 - self.distances[block],
+                self.vectors[block] @ self.vectors[changed_rows].T
+            ], axis=1)
+            candidates = np.concatenate([
+                self.neighbors[block],
+                np.broadcast_to(changed_rows, (len(block), len(changed_rows)))
+            ], axis=1)
+            similarity[candidates == EMPTY] = -np.inf
+            self._store_top(block, candidates, similarity)
+
+        recomputed = np.flatnonzero(affected)
+        self._recompute(recomputed)
+        return len(recomputed)
+
+    def get(self, note_id: str, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Look up the neighbours of a note.
+
+        Args:
+            note_id: Note ID
+            limit: Maximum number of neighbours (at most k)
+
+        Returns:
+            (note ID, cosine distance) pairs, closest first; empty if the
+            note is not in the graph
+        """
+        row = self._rows.get(note_id)
+        if row is None:
+            return []
+        neighbors = self.neighbors[row][:limit]
+        distances = self.distances[row][:limit]
+        return [
+            (self.ids[neighbor], float(distance))
+            for neighbor, distance in zip(neighbors, distances)
+            if neighbor != EMPTY
+        ]
+
+    def save(self, path: str | Path) -> None:
+        """Write the graph to an ``.npz`` file atomically.
+
+        Args:
+            path: Target file
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                ids=np.array(self.ids, dtype=str),
+                signatures=np.array(self.signatures, dtype=str),
+                vectors=self.vectors,
+                neighbors=self.neighbors,
+                distances=self.distances,
+                k=np.array(self.k)
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str | Path, block_size: int = 1024) -> Optional["KnnGraph"]:
+        """Read a graph written by ``save``.
+
+        Args:
+            path: Graph file
+            block_size: Row block size for later updates
+
+        Returns:
+            The graph, or None if the file is missing or unreadable
+        """
+        try:
+            with np.load(path) as data:
+                graph = cls(k=int(data["k"]), block_size=block_size)
+                graph.ids = [str(note_id) for note_id in data["ids"]]
+                graph.signatures = [str(sig) for sig in data["signatures"]]
+                graph.vectors = data["vectors"].astype(np.float32)
+                graph.neighbors = data["neighbors"].astype(np.int32)
+                graph.distances = data["distances"].astype(np.float32)
+        except FileNotFoundError:
+            return None
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable related-notes graph {path}: {e}")
+            return None
+        graph._rows = {note_id: row for row, note_id in enumerate(graph.ids)}
+        return graph
@@ -0,0 +1,487 @@
+"""
+Inverted index with BM25 scoring.
+
+This module keeps a term -> postings index of every stored chunk, so that
+queries for exact terms (names, tags, identifiers) are answered without an
+embedding round trip. Postings are held in compact arrays: a merged segment
+in CSR form (one ``offsets`` array into flat ``postings``/``frequencies``
+arrays) plus flat arrays of the postings added since the last merge.
+Removed chunks are tombstoned and dropped, with their rows renumbered, the
+next time the segment is merged.
+
+On disk, the merged segment is written in full only when it changed; the
+chunks, postings and tombstones added since are saved to a small delta file
+next to it, so that saving after every update stays cheap.
+"""
+
+import logging
+import math
+import os
+import threading
+import uuid
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .chroma import Document
+from .tokenizer import TOKENIZER_VERSION, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Function splitting text into index terms
+Tokenizer = Callable[[str], List[str]]
+
+# Appended to the index file name for the changes since the merged segment
+DELTA_SUFFIX = ".delta"
+
+
+class LexicalIndex:
+    """Inverted index of chunks scored with Okapi BM25.
+
+    Chunks are keyed by document ID and grouped by their ``parent_id``, so
+    that all chunks of a note can be replaced or removed at once. Scores are
+    BM25 scores, so that larger is better, unlike vector distances.
+    """
+
+    def __init__(
+        self,
+        tokenizer: Tokenizer = tokenize,
+        k1: float = 1.2,
+        b: float = 0.75,
+        merge_threshold: int = 65_536
+    ):
+        """Initialize an empty index.
+
+        Args:
+            tokenizer: Function splitting document and query text into terms
+            k1: BM25 term frequency saturation
+            b: BM25 document length normalization
+            merge_threshold: Minimum number of unmerged postings (or removed
+                chunks) after which they are merged into the compact segment
+
+        Raises:
+            ValueError: If k1 is negative, b is outside [0, 1] or the merge
+                threshold is not positive
+        """
+        if k1 < 0 or not 0 <= b <= 1 or merge_threshold < 1:
+            raise ValueError("k1 must be >= 0, b within [0, 1] and merge_threshold at least 1")
+        self.tokenizer = tokenizer
+        self.k1 = k1
+        self.b = b
+        self.merge_threshold = merge_threshold
+        # Incremented on every change, so that cached results can be invalidated
+        self.generation = 0
+        self._lock = threading.RLock()
+        # Chunks by row; removed rows stay until the next merge
+        self._ids: List[str] = []
+        self._parents: List[str] = []
+        self._lengths = np.zeros(0, dtype=np.int32)
+        self._live = np.zeros(0, dtype=bool)
+        self._rows: Dict[str, int] = {}
+        self._notes: Dict[str, Set[int]] = {}
+        self._total_length = 0
+        self._dead = 0
+        # Merged segment: postings of term t are rows [offsets[t], offsets[t + 1])
+        self._terms: Dict[str, int] = {}
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._postings = np.zeros(0, dtype=np.int32)
+        self._frequencies = np.zeros(0, dtype=np.int32)
+        # Postings added since the last merge, in insertion order
+        self._pending_terms = array("i")
+        self._pending_rows = array("i")
+        self._pending_frequencies = array("i")
+        # File and ID of the saved merged segment; None once it is re-merged
+        self._segment_path: Optional[Path] = None
+        self._segment_id: Optional[str] = None
+        self._segment_rows = 0
+        self._segment_terms = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, note_id: object) -> bool:
+        return note_id in self._notes
+
+    def add_documents(self, documents: Iterable[Document]) -> None:
+        """Index documents, replacing chunks already indexed under their IDs.
+
+        Args:
+            documents: Documents to index
+        """
+        with self._lock:
+            for doc in documents:
+                self._remove_row(doc.id)
+                self._add_row(doc)
+            self.generation += 1
+            self._maybe_merge()
+
+    def replace_notes(self, documents: Iterable[Document]) -> None:
+        """Index the chunks of notes, replacing every chunk they had before.
+
+        Chunks a note no longer has are removed, so that a shrunk note does
+        not keep matching on its old content.
+
+        Args:
+            documents: All chunks of each note to index
+        """
+        documents = list(documents)
+        with self._lock:
+            self._remove_notes({doc.metadata.get("parent_id", doc.id) for doc in documents})
+            self.add_documents(documents)
+
+    def remove(self, ids: Iterable[str]) -> None:
+        """Remove chunks by document ID.
+
+        Args:
+            ids: Document IDs; unknown IDs are ignored
+        """
+        with self._lock:
+            for doc_id in ids:
+                self._remove_row(doc_id)
+            self.generation += 1
+            self._maybe_merge()
+
+    def remove_notes(self, note_ids: Iterable[str]) -> None:
+        """Remove all chunks of notes.
+
+        Args:
+            note_ids: Note IDs; unknown IDs are ignored
+        """
+        with self._lock:
+            self._remove_notes(note_ids)
+            self.generation += 1
+            self._maybe_merge()
+
+    def _remove_notes(self, note_ids: Iterable[str]) -> None:
+        """Remove all chunks of notes without bumping the generation."""
+        for note_id in note_ids:
+            for row in list(self._notes.get(note_id, ())):
+                self._remove_row(self._ids[row])
+
+    def _add_row(self, doc: Document) -> None:
+        """Append a chunk and its pending postings."""
+        tokens = self.tokenizer(doc.content or "")
+        row = len(self._ids)
+        if row == len(self._lengths):
+            capacity = max(1024, 2 * row)
+            self._lengths = np.resize(self._lengths, capacity)
+            self._live = np.resize(self._live, capacity)
+        parent = doc.metadata.get("parent_id", doc.id)
+        self._ids.append(doc.id)
+        self._parents.append(parent)
+        self._lengths[row] = len(tokens)
+        self._live[row] = True
+        self._rows[doc.id] = row
+        self._notes.setdefault(parent, set()).add(row)
+        self._total_length += len(tokens)
+        counts = Counter(tokens)
+        terms = self._terms
+        self._pending_terms.extend([terms.setdefault(term, len(terms)) for term in counts])
+        self._pending_rows.extend([row] * len(counts))
+        self._pending_frequencies.extend(counts.values())
+
+    def _remove_row(self, doc_id: str) -> None:
+        """Tombstone a chunk; its postings are dropped by the next merge."""
+        row = self._rows.pop(doc_id, None)
+        if row is None:
+            return
+        self._live[row] = False
+        self._total_length -= int(self._lengths[row])
+        self._dead += 1
+        parent = self._parents[row]
+        rows = self._notes[parent]
+        rows.discard(row)
+        if not rows:
+            del self._notes[parent]
+
+    def _maybe_merge(self) -> None:
+        """Merge once enough postings are pending or enough rows are dead.
+
+        The thresholds grow with the merged segment, so that building a large
+        index merges a logarithmic number of times.
+        """
+        pending_limit = max(self.merge_threshold, len(self._postings) // 4)
+        if len(self._pending_terms) >= pending_limit or self._dead >= max(self.merge_threshold, len(self._rows)):
+            self.merge()
+
+    def merge(self) -> None:
+        """Fold pending postings into the merged segment and drop removed chunks.
+
+        Live rows are renumbered densely and terms without live postings are
+        dropped from the vocabulary.
+        """
+        with self._lock:
+            if not self._pending_terms and not self._dead:
+                return
+            # (term, row, frequency) triples of both segments
+            merged_terms = np.repeat(
+                np.arange(len(self._offsets) - 1, dtype=np.int64), np.diff(self._offsets)
+            )
+            terms = np.concatenate([merged_terms, np.array(self._pending_terms, dtype=np.int64)])
+            rows = np.concatenate([self._postings, np.array(self._pending_rows, dtype=np.int32)])
+            frequencies = np.concatenate(
+                [self._frequencies, np.array(self._pending_frequencies, dtype=np.int32)]
+            )
+
+            live = self._live[:len(self._ids)]
+            keep = live[rows]
+            terms, rows, frequencies = terms[keep], rows[keep], frequencies[keep]
+
+            # Renumber live rows and terms with postings densely
+            new_rows = np.cumsum(live, dtype=np.int64) - 1
+            term_counts = np.bincount(terms, minlength=len(self._terms))
+            used = term_counts > 0
+            new_terms = np.cumsum(used, dtype=np.int64) - 1
+            terms, rows = new_terms[terms], new_rows[rows].astype(np.int32)
+            order = np.lexsort((rows, terms))
+
+            self._postings = rows[order]
+            self._frequencies = frequencies[order]
+            self._offsets = np.concatenate([[0], np.cumsum(term_counts[used])]).astype(np.int64)
+            if not used.all():
+                self._terms = {
+                    term: int(new_terms[term_id])
+                    for term, term_id in self._terms.items()
+                    if used[term_id]
+                }
+            live_rows = np.flatnonzero(live)
+            self._ids = [self._ids[row] for row in live_rows]
+            self._parents = [self._parents[row] for row in live_rows]
+            self._lengths = self._lengths[live_rows]
+            self._live = np.ones(len(live_rows), dtype=bool)
+            self._reset_rows()
+            self._pending_terms = array("i")
+            self._pending_rows = array("i")
+            self._pending_frequencies = array("i")
+            self._dead = 0
+            self._segment_id = None
+
+    def _reset_rows(self) -> None:
+        """Rebuild the row lookups of live rows from the chunk lists."""
+        live = np.flatnonzero(self._live[:len(self._ids)])
+        self._rows = {self._ids[row]: int(row) for row in live}
+        self._notes = {}
+        for row in live:
+            self._notes.setdefault(self._parents[row], set()).add(int(row))
+        self._total_length = int(self._lengths[live].sum())
+        self._dead = len(self._ids) - len(live)
+
+    def _term_postings(
+        self,
+        term_id: int,
+        pending: Tuple[np.ndarray, np.ndarray, np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the live postings of a term from both segments."""
+        # Terms first seen since the last merge only have pending postings
+        start = end = 0
+        if term_id + 1 < len(self._offsets):
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+        rows, frequencies = self._postings[start:end], self._frequencies[start:end]
+        pending_terms, pending_rows, pending_frequencies = pending
+        if len(pending_terms):
+            mask = pending_terms == term_id
+            rows = np.concatenate([rows, pending_rows[mask]])
+            frequencies = np.concatenate([frequencies, pending_frequencies[mask]])
+        if self._dead:
+            keep = self._live[rows]
+            rows, frequencies = rows[keep], frequencies[keep]
+        return rows, frequencies
+
+    def search(self, query: str, limit: Optional[int] = 10) -> List[Tuple[str, float]]:
+        """Rank chunks containing any query term by BM25 score.
+
+        Args:
+            query: Query text, tokenized like the documents
+            limit: Maximum number of chunks to return (all matches if None)
+
+        Returns:
+            (document ID, score) pairs, best first
+        """
+        with self._lock:
+            term_ids = {self._terms[term] for term in self.tokenizer(query) if term in self._terms}
+            count = len(self._rows)
+            if not term_ids or not count:
+                return []
+            average_length = max(self._total_length / count, 1e-9)
+            scores = np.zeros(len(self._ids), dtype=np.float32)
+            pending = (
+                np.array(self._pending_terms, dtype=np.int32),
+                np.array(self._pending_rows, dtype=np.int32),
+                np.array(self._pending_frequencies, dtype=np.int32)
+            )
+            for term_id in term_ids:
+                rows, frequencies = self._term_postings(term_id, pending)
+                if not len(rows):
+                    continue
+                idf = math.log(1.0 + (count - len(rows) + 0.5) / (len(rows) + 0.5))
+                frequencies = frequencies.astype(np.float32)
+                norm = self.k1 * (1.0 - self.b + self.b * self._lengths[rows] / average_length)
+                scores[rows] += idf * frequencies * (self.k1 + 1.0) / (frequencies + norm)
+
+            matches = np.flatnonzero(scores > 0)
+            if limit is not None and limit < len(matches):
+                matches = matches[np.argpartition(-scores[matches], limit - 1)[:limit]]
+            # Ties are broken by row so that results are deterministic
+            matches = matches[np.lexsort((matches, -scores[matches]))]
+            return [(self._ids[row], float(scores[row])) for row in matches]
+
+    def stats(self) -> Dict[str, int]:
+        """Get index counters.
+
+        Returns:
+            Chunk, note, term and posting counts
+        """
+        with self._lock:
+            return {
+                "documents": len(self._rows),
+                "notes": len(self._notes),
+                "terms": len(self._terms),
+                "postings": len(self._postings) + len(self._pending_terms),
+                "pending_postings": len(self._pending_terms),
+                "generation": self.generation
+            }
+
+    def save(self, path: str | Path) -> None:
+        """Write the index to an ``.npz`` file atomically.
+
+        The merged segment is rewritten, after merging, only when it is not
+        already the one saved at ``path``; otherwise only the changes since
+        are written to the delta file. Merges happen by themselves once
+        enough changes are pending, which bounds the size of the delta.
+
+        Args:
+            path: Target file
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        delta_path = path.with_name(path.name + DELTA_SUFFIX)
+        with self._lock:
+            if self._segment_id is not None and self._segment_path == path:
+                self._write(delta_path, self._delta_arrays())
+                return
+            self.merge()
+            segment_id = uuid.uuid4().hex
+            terms = sorted(self._terms, key=self._terms.__getitem__)
+            self._write(path, {
+                "segment_id": np.array(segment_id),
+                "ids": np.array(self._ids, dtype=str),
+                "parents": np.array(self._parents, dtype=str),
+                "lengths": self._lengths[:len(self._ids)],
+                "terms": np.array(terms, dtype=str),
+                "offsets": self._offsets,
+                "postings": self._postings,
+                "frequencies": self._frequencies,
+                "tokenizer_version": np.array(TOKENIZER_VERSION)
+            })
+            # The delta of the previous segment no longer applies
+            delta_path.unlink(missing_ok=True)
+            self._mark_segment(path, segment_id)
+
+    def _delta_arrays(self) -> Dict[str, np.ndarray]:
+        """Get the chunks, terms, postings and tombstones since the segment."""
+        new_terms = sorted(
+            (term for term, term_id in self._terms.items() if term_id >= self._segment_terms),
+            key=self._terms.__getitem__
+        )
+        return {
+            "segment_id": np.array(self._segment_id),
+            "ids": np.array(self._ids[self._segment_rows:], dtype=str),
+            "parents": np.array(self._parents[self._segment_rows:], dtype=str),
+            "lengths": self._lengths[self._segment_rows:len(self._ids)],
+            "terms": np.array(new_terms, dtype=str),
+            "dead": np.flatnonzero(~self._live[:len(self._ids)]),
+            "pending_terms": np.array(self._pending_terms, dtype=np.int32),
+            "pending_rows": np.array(self._pending_rows, dtype=np.int32),
+            "pending_frequencies": np.array(self._pending_frequencies, dtype=np.int32)
+        }
+
+    def _mark_segment(self, path: Path, segment_id: str) -> None:
+        """Remember that the merged segment is the one saved at ``path``."""
+        self._segment_path = path
+        self._segment_id = segment_id
+        self._segment_rows = len(self._ids)
+        self._segment_terms = len(self._terms)
+
+    @staticmethod
+    def _write(path: Path, arrays: Dict[str, np.ndarray]) -> None:
+        """Write arrays to an ``.npz`` file through a temporary file."""
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(
+        cls,
+        path: str | Path,
+        tokenizer: Tokenizer = tokenize,
+        k1: float = 1.2,
+        b: float = 0.75,
+        merge_threshold: int = 65_536
+    ) -> Optional["LexicalIndex"]:
+        """Read an index written by ``save``, with its delta if there is one.
+
+        The tokenizer must be the one the index was built with; files
+        written with another ``TOKENIZER_VERSION`` are ignored.
+
+        Args:
+            path: Index file
+            tokenizer: Function splitting text into terms
+            k1: BM25 term frequency saturation
+            b: BM25 document length normalization
+            merge_threshold: Number of unmerged postings triggering a merge
+
+        Returns:
+            The index, or None if the file is missing or unreadable
+        """
+        index = cls(tokenizer=tokenizer, k1=k1, b=b, merge_threshold=merge_threshold)
+        try:
+            with np.load(path) as data:
+                if int(data["tokenizer_version"]) != TOKENIZER_VERSION:
+                    logger.info(f"Ignoring lexical index {path} built with another tokenizer")
+                    return None
+                index._ids = [str(doc_id) for doc_id in data["ids"]]
+                index._parents = [str(parent) for parent in data["parents"]]
+                index._lengths = data["lengths"].astype(np.int32)
+                index._terms = {str(term): term_id for term_id, term in enumerate(data["terms"])}
+                index._offsets = data["offsets"].astype(np.int64)
+                index._postings = data["postings"].astype(np.int32)
+                index._frequencies = data["frequencies"].astype(np.int32)
+                segment_id = str(data["segment_id"])
+        except FileNotFoundError:
+            return None
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable lexical index {path}: {e}")
+            return None
+        index._live = np.ones(len(index._ids), dtype=bool)
+        index._mark_segment(Path(path), segment_id)
+        index._load_delta(Path(path).with_name(Path(path).name + DELTA_SUFFIX))
+        index._reset_rows()
+        return index
+
+    def _load_delta(self, path: Path) -> None:
+        """Apply the changes saved since the merged segment, if any."""
+        try:
+            with np.load(path) as data:
+                if str(data["segment_id"]) != self._segment_id:
+                    logger.info(f"Ignoring lexical index delta {path} of another segment")
+                    return
+                delta = dict(data)
+        except FileNotFoundError:
+            return
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable lexical index delta {path}: {e}")
+            return
+        self._ids.extend(str(doc_id) for doc_id in delta["ids"])
+        self._parents.extend(str(parent) for parent in delta["parents"])
+        self._lengths = np.concatenate([self._lengths, delta["lengths"].astype(np.int32)])
+        for term in delta["terms"]:
+            self._terms[str(term)] = len(self._terms)
+        self._pending_terms = array("i", delta["pending_terms"].tolist())
+        self._pending_rows = array("i", delta["pending_rows"].tolist())
+        self._pending_frequencies = array("i", delta["pending_frequencies"].tolist())
+        self._live = np.ones(len(self._ids), dtype=bool)
+        self._live[delta["dead"]] = False
@@ -0,0 +1,1045 @@
+"""
+Local NumPy vector store.
+
+This module provides an alternative to the ChromaDB backend for tests and
+small deployments. Vectors live in a memory-mapped float32 ``.npy`` matrix and
+IDs, documents and metadata in an append-only JSONL sidecar, so opening a
+store costs a file read instead of a database startup. Queries are blocked
+matrix products with ``argpartition``; an optional IVF coarse quantizer
+restricts queries on large stores to the vectors of the nearest clusters.
+With scalar quantization (float16, or int8 with a scale per vector) queries
+scan a compact in-memory copy of the vectors and re-score only the top
+candidates against the float32 matrix, so that a persistent store reads just
+those rows of the memory-mapped file.
+
+``LocalCollection`` implements the part of the ChromaDB collection API that
+``ChromaRepository`` uses, so ``NumpyRepository`` inherits the complete
+repository surface and the two backends can be compared on the same calls.
+"""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+
+from .chroma import ChromaRepository
+from .embedding_cache import EmbeddingCache
+from .executor import RepositoryExecutor
+from .query_cache import QueryEmbeddingCache
+
+logger = logging.getLogger(__name__)
+
+# Distance functions, named as in ChromaDB
+SPACES = ("l2", "cosine", "ip")
+
+# Scalar quantizations of the scanned copy of the vectors
+QUANTIZATIONS = ("float16", "int8")
+
+# Candidates per requested result re-scored exactly after a quantized scan
+RESCORE_FACTOR = 4
+
+# Rows allocated when the first vector is written
+INITIAL_CAPACITY = 1024
+
+# The IVF quantizer is trained once the store holds this many vectors per list
+IVF_TRAIN_FACTOR = 39
+
+# Vectors per list sampled to train the quantizer
+IVF_SAMPLE_FACTOR = 32
+
+# Lloyd iterations when training the quantizer
+KMEANS_ITERATIONS = 10
+
+# Metadata keys with an inverted index, so that filters on them select rows
+# without evaluating every record's metadata
+INDEXED_KEYS = ("path", "parent_id", "tags", "aliases")
+
+# Matrix products use gathered rows instead of masked contiguous blocks when
+# fewer than this fraction of rows are candidates
+GATHER_FRACTION = 0.5
+
+
+def quantize(vectors: np.ndarray, quantization: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Quantize vectors for the first pass of a query.
+
+    Args:
+        vectors: float32 vectors, one per row
+        quantization: "float16", or "int8" with a scale per vector
+
+    Returns:
+        Codes and, for int8, the per-vector scales such that
+        ``codes * scales[:, None]`` approximates the vectors
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if quantization == "float16":
+        return vectors.astype(np.float16), None
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _contains(value: Any, operand: Any) -> bool:
+    """Check a ``$contains`` condition against list or string metadata."""
+    if isinstance(value, (list, tuple)):
+        return operand in value
+    if isinstance(value, str) and isinstance(operand, str):
+        return operand in value
+    return False
+
+
+def _compare(metadata: Dict[str, Any], key: str, operator: str, operand: Any) -> bool:
+    """Evaluate one operator of a metadata condition."""
+    present = key in metadata
+    value = metadata.get(key)
+    # As in ChromaDB, negated conditions match records without the key
+    if operator == "$ne":
+        return not present or value != operand
+    if operator == "$nin":
+        return not present or value not in operand
+    if operator == "$not_contains":
+        return not present or not _contains(value, operand)
+    if not present:
+        return False
+    if operator == "$eq":
+        return value == operand
+    if operator == "$in":
+        return value in operand
+    if operator == "$contains":
+        return _contains(value, operand)
+    try:
+        if operator == "$gt":
+            return value > operand
+        if operator == "$gte":
+            return value >= operand
+        if operator == "$lt":
+            return value < operand
+        if operator == "$lte":
+            return value <= operand
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported where operator: {operator}")
+
+
+def matches_where(metadata: Optional[Dict[str, Any]], where: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a ChromaDB ``where`` filter against a record's metadata.
+
+    Args:
+        metadata: Record metadata
+        where: Filter using ChromaDB's operators (``$and``, ``$or``, ``$eq``,
+            ``$ne``, ``$gt``, ``$gte``, ``$lt``, ``$lte``, ``$in``, ``$nin``,
+            ``$contains``, ``$not_contains``)
+
+    Returns:
+        True if the record matches
+
+    Raises:
+        ValueError: If the filter uses an unsupported operator
+    """
+    if not where:
+        return True
+    metadata = metadata or {}
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, part) for part in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, part) for part in condition):
+                return False
+        else:
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            for operator, operand in condition.items():
+                if not _compare(metadata, key, operator, operand):
+                    return False
+    return True
+
+
+class LocalCollection:
+    """Collection of records with vectors in a memory-mapped NumPy matrix.
+
+    Records occupy rows of the matrix; rows of deleted records are reused.
+    Every write appends the affected records to the sidecar log, which is
+    replayed on open and compacted once it holds mostly superseded records.
+    Metadata writes merge with stored metadata and ``None`` values remove
+    keys, as in ChromaDB. Equality, ``$in`` and ``$contains`` conditions on
+    the indexed metadata keys are answered from an inverted index.
+
+    Queries score outside the lock. They keep references to the record lists
+    taken together with the live mask, so writers copy those lists before
+    changing them while a query may still read them.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        path: Optional[str | Path] = None,
+        embedding_function: Any = None,
+        space: str = "l2",
+        block_size: int = 16384,
+        ivf_lists: Optional[int] = None,
+        ivf_probes: int = 8,
+        quantization: Optional[str] = None,
+        rescore_factor: int = RESCORE_FACTOR,
+        indexed_keys: Sequence[str] = INDEXED_KEYS
+    ):
+        """Open or create a collection.
+
+        Args:
+            name: Collection name
+            path: Directory holding the vector matrix and sidecar; None keeps
+                the collection in memory
+            embedding_function: Embedding function for documents written
+                without embeddings (defaults to ChromaDB's bundled model)
+            space: Distance function: "l2" (squared), "cosine" or "ip"
+            block_size: Number of stored vectors scored per matrix product
+            ivf_lists: Optional number of IVF clusters; queries then only
+                score the vectors of the ``ivf_probes`` nearest clusters
+            ivf_probes: Number of clusters scored per query
+            quantization: Optional "float16" or "int8"; queries scan the
+                quantized vectors and re-score the best candidates exactly
+            rescore_factor: Candidates re-scored per requested result
+            indexed_keys: Metadata keys with an inverted index for filters
+
+        Raises:
+            ValueError: If the space or quantization is unknown or a size is
+                not positive
+        """
+        if space not in SPACES:
+            raise ValueError(f"Unknown space {space!r}; expected one of {SPACES}")
+        if quantization is not None and quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization {quantization!r}; expected one of {QUANTIZATIONS}")
+        if (
+            block_size < 1 or ivf_probes < 1 or rescore_factor < 1
+            or (ivf_lists is not None and ivf_lists < 1)
+        ):
+            raise ValueError("block_size, ivf_lists, ivf_probes and rescore_factor must be at least 1")
+        self.name = name
+        self.path = Path(path) if path is not None else None
+        self.space = space
+        self.block_size = block_size
+        self.ivf_lists = ivf_lists
+        self.ivf_probes = ivf_probes
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+        self.indexed_keys = tuple(indexed_keys)
+        self._embedding_function = embedding_function
+        self._lock = threading.RLock()
+
+        self._ids: List[Optional[str]] = []
+        self._documents: List[Optional[str]] = []
+        self._metadatas: List[Optional[Dict[str, Any]]] = []
+        self._rows: Dict[str, int] = {}
+        # Set when a query holds references to the record lists
+        self._records_shared = False
+        # Rows by scalar value and by list element of each indexed key
+        self._values: Dict[str, Dict[Any, Set[int]]] = {key: {} for key in self.indexed_keys}
+        self._members: Dict[str, Dict[Any, Set[int]]] = {key: {} for key in self.indexed_keys}
+        self._free: List[int] = []
+        self._vectors: Optional[np.ndarray] = None
+        self._live = np.zeros(0, dtype=bool)
+        # Squared row norms and quantized vectors, computed on the first query
+        self._norms: Optional[np.ndarray] = None
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments: Optional[np.ndarray] = None
+        self._trained_at = 0
+        self._log_records = 0
+
+        if self.path is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._load()
+
+    @property
+    def _vectors_file(self) -> Path:
+        return self.path / "vectors.npy"
+
+    @property
+    def _records_file(self) -> Path:
+        return self.path / "records.jsonl"
+
+    @property
+    def _ivf_file(self) -> Path:
+        return self.path / "ivf.npz"
+
+    def _load(self) -> None:
+        """Map the stored vectors and replay the sidecar log."""
+        if self._vectors_file.exists():
+            self._vectors = np.load(self._vectors_file, mmap_mode="r+")
+        if self._records_file.exists():
+            with open(self._records_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Partially written last record
+                        logger.warning(f"Ignoring truncated record in {self._records_file}")
+                        break
+                    self._log_records += 1
+                    if record["op"] == "put":
+                        row = record["row"]
+                        old_row = self._rows.get(record["id"])
+                        if old_row is not None and old_row != row:
+                            self._clear_row(old_row)
+                        while len(self._ids) <= row:
+                            self._ids.append(None)
+                            self._documents.append(None)
+                            self._metadatas.append(None)
+                        self._ids[row] = record["id"]
+                        self._documents[row] = record["document"]
+                        self._set_metadata(row, record["metadata"])
+                        self._rows[record["id"]] = row
+                    elif record["op"] == "delete" and record["id"] in self._rows:
+                        self._clear_row(self._rows.pop(record["id"]))
+
+        capacity = self._vectors.shape[0] if self._vectors is not None else 0
+        self._live = np.zeros(capacity, dtype=bool)
+        self._live[list(self._rows.values())] = True
+        self._free = [row for row in range(len(self._ids)) if self._ids[row] is None]
+
+        if self.ivf_lists and self._ivf_file.exists():
+            try:
+                with np.load(self._ivf_file) as data:
+                    centroids = data["centroids"].astype(np.float32)
+                    if self._vectors is not None and centroids.shape == (self.ivf_lists, self._vectors.shape[1]):
+                        self._centroids = centroids
+                        self._trained_at = int(data["trained_at"])
+            except (OSError, KeyError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable IVF quantizer {self._ivf_file}: {e}")
+
+    def _clear_row(self, row: int) -> None:
+        """Forget the record stored in a row; the caller updates ``_rows``."""
+        self._ids[row] = None
+        self._documents[row] = None
+        self._set_metadata(row, None)
+
+    def _set_metadata(self, row: int, metadata: Optional[Dict[str, Any]]) -> None:
+        """Store a row's metadata and keep the inverted index current."""
+        self._index_metadata(row, self._metadatas[row], remove=True)
+        self._metadatas[row] = metadata
+        self._index_metadata(row, metadata)
+
+    def _index_metadata(
+        self,
+        row: int,
+        metadata: Optional[Dict[str, Any]],
+        remove: bool = False
+    ) -> None:
+        """Add a row to, or remove it from, the postings of its indexed values."""
+        if not metadata:
+            return
+        for key in self.indexed_keys:
+            value = metadata.get(key)
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple)):
+                postings, terms = self._members[key], value
+            else:
+                postings, terms = self._values[key], (value,)
+            for term in terms:
+                if not remove:
+                    postings.setdefault(term, set()).add(row)
+                elif term in postings:
+                    postings[term].discard(row)
+                    if not postings[term]:
+                        del postings[term]
+
+    def _detach_records(self) -> None:
+        """Copy the record lists before a write if a query may be reading them."""
+        if self._records_shared:
+            self._ids = list(self._ids)
+            self._documents = list(self._documents)
+            self._metadatas = list(self._metadatas)
+            self._records_shared = False
+
+    def _append_log(self, records: List[Dict[str, Any]]) -> None:
+        """Append records to the sidecar, compacting it when mostly superseded."""
+        if self.path is None or not records:
+            return
+        with open(self._records_file, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record) + "\n" for record in records))
+            f.flush()
+        self._log_records += len(records)
+        if self._log_records > 2 * len(self._rows) + 1024:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite the sidecar with one record per stored document."""
+        tmp_path = self._records_file.with_name(self._records_file.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for doc_id, row in self._rows.items():
+                f.write(json.dumps(self._put_record(row)) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._records_file)
+        self._log_records = len(self._rows)
+
+    def _put_record(self, row: int) -> Dict[str, Any]:
+        return {
+            "op": "put",
+            "id": self._ids[row],
+            "row": row,
+            "document": self._documents[row],
+            "metadata": self._metadatas[row]
+        }
+
+    def _reserve(self, needed: int, dimension: int) -> None:
+        """Grow the vector matrix to hold at least ``needed`` rows."""
+        if self._vectors is not None and self._vectors.shape[1] != dimension:
+            raise ValueError(
+                f"Embedding dimension {dimension} does not match collection dimension "
+                f"{self._vectors.shape[1]}"
+            )
+        capacity = self._vectors.shape[0] if self._vectors is not None else 0
+        if needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity, INITIAL_CAPACITY)
+        used = len(self._ids)
+        if self.path is None:
+            vectors = np.zeros((capacity, dimension), dtype=np.float32)
+        else:
+            tmp_path = self._vectors_file.with_name("vectors.tmp.npy")
+            vectors = np.lib.format.open_memmap(
+                tmp_path, mode="w+", dtype=np.float32, shape=(capacity, dimension)
+            )
+        if self._vectors is not None:
+            vectors[:used] = self._vectors[:used]
+        if self.path is not None:
+            vectors.flush()
+            os.replace(tmp_path, self._vectors_file)
+        self._vectors = vectors
+
+        grow = capacity - len(self._live)
+        self._live = np.concatenate([self._live, np.zeros(grow, dtype=bool)])
+        if self._norms is not None:
+            self._norms = np.concatenate([self._norms, np.zeros(grow, dtype=np.float32)])
+        if self._codes is not None:
+            self._codes = np.concatenate([self._codes, np.zeros((grow, dimension), dtype=self._codes.dtype)])
+        if self._scales is not None:
+            self._scales = np.concatenate([self._scales, np.ones(grow, dtype=np.float32)])
+        if self._assignments is not None:
+            self._assignments = np.concatenate([self._assignments, np.full(grow, -1, dtype=np.int32)])
+
+    def _embed(self, input: Sequence[str], is_query: bool = False) -> List[np.ndarray]:
+        """Embed texts with the collection's embedding function.
+
+        Args:
+            input: Texts to embed
+            is_query: Whether the texts are queries
+
+        Returns:
+            One embedding per text
+        """
+        if self._embedding_function is None:
+            self._embedding_function = DefaultEmbeddingFunction()
+        return [np.asarray(v, dtype=np.float32) for v in self._embedding_function(list(input))]
+
+    def count(self) -> int:
+        """Count the stored records."""
+        return len(self._rows)
+
+    def add(self, ids, embeddings=None, documents=None, metadatas=None) -> None:
+        """Add records; IDs that are already stored are ignored."""
+        self._write("add", ids, embeddings, documents, metadatas)
+
+    def upsert(self, ids, embeddings=None, documents=None, metadatas=None) -> None:
+        """Add new records and update stored ones."""
+        self._write("upsert", ids, embeddings, documents, metadatas)
+
+    def update(self, ids, embeddings=None, documents=None, metadatas=None) -> None:
+        """Update stored records; unknown IDs are ignored."""
+        self._write("update", ids, embeddings, documents, metadatas)
+
+    def _write(
+        self,
+        mode: str,
+        ids: Sequence[str],
+        embeddings: Optional[Sequence[Any]],
+        documents: Optional[Sequence[str]],
+        metadatas: Optional[Sequence[Optional[Dict[str, Any]]]]
+    ) -> None:
+        """Apply an add, upsert or update call."""
+        ids = [ids] if isinstance(ids, str) else list(ids)
+        with self._lock:
+            if mode == "add":
+                selected = [i for i, doc_id in enumerate(ids) if doc_id not in self._rows]
+            elif mode == "update":
+                selected = [i for i, doc_id in enumerate(ids) if doc_id in self._rows]
+            else:
+                selected = list(range(len(ids)))
+        if not selected:
+            return
+
+        # Embed outside the lock, so that queries are not blocked meanwhile
+        vectors: Optional[np.ndarray] = None
+        if embeddings is not None:
+            vectors = np.asarray([embeddings[i] for i in selected], dtype=np.float32)
+        elif documents is not None:
+            vectors = np.asarray(self._embed([documents[i] for i in selected]), dtype=np.float32)
+
+        with self._lock:
+            new_ids = {ids[i] for i in selected if ids[i] not in self._rows}
+            if new_ids and vectors is None:
+                raise ValueError("New records need documents or embeddings")
+            if vectors is not None:
+                self._reserve(len(self._ids) + max(0, len(new_ids) - len(self._free)), vectors.shape[1])
+
+            self._detach_records()
+            records = []
+            for position, i in enumerate(selected):
+                doc_id = ids[i]
+                row = self._rows.get(doc_id)
+                metadata = dict(self._metadatas[row] or {}) if row is not None else {}
+                if row is None:
+                    if self._free:
+                        row = self._free.pop()
+                    else:
+                        row = len(self._ids)
+                        self._ids.append(None)
+                        self._documents.append(None)
+                        self._metadatas.append(None)
+                    self._ids[row] = doc_id
+                    self._rows[doc_id] = row
+                    self._live[row] = True
+                if metadatas is not None and metadatas[i] is not None:
+                    metadata.update(metadatas[i])
+                metadata = {key: value for key, value in metadata.items() if value is not None}
+                self._set_metadata(row, metadata or None)
+                if documents is not None:
+                    self._documents[row] = documents[i]
+                if vectors is not None:
+                    self._set_vector(row, vectors[position])
+                records.append(self._put_record(row))
+
+            if vectors is not None and isinstance(self._vectors, np.memmap):
+                self._vectors.flush()
+            self._append_log(records)
+
+    def _set_vector(self, row: int, vector: np.ndarray) -> None:
+        """Store a vector and keep the derived norms and IVF assignment current."""
+        self._vectors[row] = vector
+        if self._norms is not None:
+            self._norms[row] = float(vector @ vector)
+        if self._codes is not None:
+            codes, scales = quantize(vector.reshape(1, -1), self.quantization)
+            self._codes[row] = codes[0]
+            if scales is not None:
+                self._scales[row] = scales[0]
+        if self._assignments is not None:
+            self._assignments[row] = self._nearest_lists(vector.reshape(1, -1), 1)[0, 0]
+
+    def delete(self, ids: Optional[Sequence[str]] = None, where: Optional[Dict[str, Any]] = None) -> None:
+        """Delete records by ID and/or metadata filter.
+
+        Args:
+            ids: Optional record IDs
+            where: Optional metadata filter
+        """
+        with self._lock:
+            if ids is not None:
+                ids = [ids] if isinstance(ids, str) else ids
+                rows = [self._rows[doc_id] for doc_id in ids if doc_id in self._rows]
+                if where:
+                    rows = [row for row in rows if matches_where(self._metadatas[row], where)]
+            elif where:
+                rows = np.flatnonzero(self._where_mask(where, self._live[:len(self._ids)])).tolist()
+            else:
+                rows = list(self._rows.values())
+
+            self._detach_records()
+            records = []
+            for row in rows:
+                doc_id = self._ids[row]
+                del self._rows[doc_id]
+                self._clear_row(row)
+                self._live[row] = False
+                if self._assignments is not None:
+                    self._assignments[row] = -1
+                self._free.append(row)
+                records.append({"op": "delete", "id": doc_id})
+            self._append_log(records)
+
+    def get(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Sequence[str] = ("metadatas", "documents")
+    ) -> Dict[str, Any]:
+        """Fetch records by ID and/or metadata filter.
+
+        Args:
+            ids: Optional record IDs; records are returned in this order
+            where: Optional metadata filter
+            limit: Optional maximum number of records
+            offset: Number of matching records to skip
+            include: Fields to return ("documents", "metadatas", "embeddings")
+
+        Returns:
+            ChromaDB-style result with one entry per record
+        """
+        with self._lock:
+            if ids is not None:
+                ids = [ids] if isinstance(ids, str) else ids
+                rows = [self._rows[doc_id] for doc_id in dict.fromkeys(ids) if doc_id in self._rows]
+                if where:
+                    rows = [row for row in rows if matches_where(self._metadatas[row], where)]
+            else:
+                allowed = self._live[:len(self._ids)]
+                if where:
+                    allowed = self._where_mask(where, allowed)
+                rows = np.flatnonzero(allowed).tolist()
+            rows = rows[offset or 0:]
+            if limit is not None:
+                rows = rows[:limit]
+            return {
+                "ids": [self._ids[row] for row in rows],
+                "documents": [self._documents[row] for row in rows] if "documents" in include else None,
+                "metadatas": [
+                    dict(self._metadatas[row]) if self._metadatas[row] else None for row in rows
+                ] if "metadatas" in include else None,
+                "embeddings": (
+                    np.array(self._vectors[rows]) if rows else np.zeros((0, 0), dtype=np.float32)
+                ) if "embeddings" in include else None,
+                "include": list(include)
+            }
+
+    def query(
+        self,
+        query_embeddings: Optional[Sequence[Any]] = None,
+        query_texts: Optional[Sequence[str]] = None,
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        include: Sequence[str] = ("metadatas", "documents", "distances")
+    ) -> Dict[str, Any]:
+        """Find the stored records closest to each query.
+
+        Args:
+            query_embeddings: Query vectors
+            query_texts: Query texts, embedded if no vectors are given
+            n_results: Number of records per query
+            where: Optional metadata filter applied to every query
+            include: Fields to return ("documents", "metadatas", "distances",
+                "embeddings")
+
+        Returns:
+            ChromaDB-style result with one row of records per query
+        """
+        if query_embeddings is None:
+            query_embeddings = self._embed(query_texts or [], is_query=True)
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        queries = queries.reshape(len(queries), -1)
+
+        with self._lock:
+            used = len(self._ids)
+            allowed = self._live[:used].copy()
+            if where:
+                allowed = self._where_mask(where, allowed)
+            # The records as of the mask; writers copy the lists from now on
+            ids, documents, metadatas = self._ids, self._documents, self._metadatas
+            self._records_shared = True
+            vectors = self._vectors
+            norms = self._row_norms()
+            codes, scales = self._codes, self._scales
+            assignments = self._ivf_assignments(int(allowed.sum()))
+
+        # A quantized scan keeps more candidates, which are re-scored exactly
+        scanned = (vectors, None) if codes is None else (codes, scales)
+        scan_results = n_results if codes is None else n_results * self.rescore_factor
+
+        found: List[Tuple[np.ndarray, np.ndarray]] = []
+        if vectors is None or not allowed.any() or n_results < 1:
+            found = [(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32))] * len(queries)
+        elif assignments is None:
+            found = self._top_k(*scanned, norms, queries, allowed, scan_results)
+        else:
+            probes = self._nearest_lists(queries, min(self.ivf_probes, self.ivf_lists))
+            for query, probed in zip(queries, probes):
+                candidates = allowed & np.isin(assignments, probed)
+                # Too few vectors in the probed clusters: score all
+                if candidates.sum() < n_results:
+                    candidates = allowed
+                found.extend(self._top_k(*scanned, norms, query.reshape(1, -1), candidates, scan_results))
+        if codes is not None:
+            found = [
+                self._rescore(vectors, norms, query, rows, n_results)
+                for query, (rows, _) in zip(queries, found)
+            ]
+
+        result: Dict[str, Any] = {"ids": [], "include": list(include)}
+        for field in ("documents", "metadatas", "distances", "embeddings"):
+            result[field] = [] if field in include else None
+        with self._lock:
+            # Drop rows whose record was deleted, or replaced by a record
+            # reusing the row, since the snapshot was taken
+            found = [
+                [
+                    (int(row), float(distance)) for row, distance in zip(rows, distances)
+                    if self._ids[row] == ids[row]
+                ]
+                for rows, distances in found
+            ]
+        for hits in found:
+            result["ids"].append([ids[row] for row, _ in hits])
+            if "documents" in include:
+                result["documents"].append([documents[row] for row, _ in hits])
+            if "metadatas" in include:
+                result["metadatas"].append([
+                    dict(metadatas[row]) if metadatas[row] else None for row, _ in hits
+                ])
+            if "distances" in include:
+                result["distances"].append([distance for _, distance in hits])
+            if "embeddings" in include:
+                result["embeddings"].append([np.array(vectors[row]) for row, _ in hits])
+        return result
+
+    def _where_mask(self, where: Dict[str, Any], allowed: np.ndarray) -> np.ndarray:
+        """Narrow a row mask to the records matching a filter.
+
+        Conditions on indexed keys are answered from the inverted index
+        first; the remaining conditions are evaluated with ``matches_where``
+        on the rows still allowed. The caller holds the lock.
+
+        Args:
+            where: Metadata filter
+            allowed: Candidate rows; not modified
+
+        Returns:
+            Mask of the candidate rows that match
+        """
+        mask = allowed.copy()
+        remaining: Dict[str, Dict[str, Any]] = {}
+        for key, condition in where.items():
+            if key == "$and":
+                for part in condition:
+                    mask = self._where_mask(part, mask)
+            elif key == "$or":
+                matched = np.zeros_like(mask)
+                for part in condition:
+                    matched |= self._where_mask(part, mask)
+                mask = matched
+            else:
+                if not isinstance(condition, dict):
+                    condition = {"$eq": condition}
+                for operator, operand in condition.items():
+                    rows = self._indexed_rows(key, operator, operand)
+                    if rows is None:
+                        remaining.setdefault(key, {})[operator] = operand
+                        continue
+                    indexed = np.zeros_like(mask)
+                    indexed[np.fromiter(rows, dtype=np.int64, count=len(rows))] = True
+                    mask &= indexed
+        if remaining:
+            for row in np.flatnonzero(mask):
+                if not matches_where(self._metadatas[row], remaining):
+                    mask[row] = False
+        return mask
+
+    def _indexed_rows(self, key: str, operator: str, operand: Any) -> Optional[Set[int]]:
+        """Rows matching one condition according to the inverted index.
+
+        Returns:
+            Matching rows, or None if the index cannot answer the condition
+        """
+        if key not in self._values:
+            return None
+        values, members = self._values[key], self._members[key]
+        try:
+            if operator == "$eq":
+                return values.get(operand, set())
+            if operator == "$in":
+                return set().union(*(values.get(value, ()) for value in operand))
+            if operator == "$contains":
+                rows = set(members.get(operand, ()))
+                if isinstance(operand, str):
+                    # Substrings of string values; checked per distinct value
+                    for value, value_rows in values.items():
+                        if isinstance(value, str) and operand in value:
+                            rows |= value_rows
+                return rows
+        except TypeError:
+            # Unhashable operand
+            return None
+        return None
+
+    def _row_norms(self) -> Optional[np.ndarray]:
+        """Squared norms of all rows, computed once; the caller holds the lock.
+
+        With quantization the quantized vectors are built in the same pass
+        over the float32 matrix.
+        """
+        if self._vectors is None:
+            return None
+        if self._norms is None:
+            capacity, dimension = self._vectors.shape
+            norms = np.zeros(capacity, dtype=np.float32)
+            codes = scales = None
+            if self.quantization is not None:
+                codes = np.zeros((capacity, dimension), dtype=np.float16 if self.quantization == "float16" else np.int8)
+                scales = np.ones(capacity, dtype=np.float32) if self.quantization == "int8" else None
+            for start in range(0, len(self._ids), self.block_size):
+                block = np.asarray(self._vectors[start:start + self.block_size])
+                norms[start:start + len(block)] = np.einsum("ij,ij->i", block, block)
+                if codes is not None:
+                    block_codes, block_scales = quantize(block, self.quantization)
+                    codes[start:start + len(block)] = block_codes
+                    if scales is not None:
+                        scales[start:start + len(block)] = block_scales
+            self._norms, self._codes, self._scales = norms, codes, scales
+        return self._norms
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Get the size of the arrays scanned by queries.
+
+        Returns:
+            Bytes of the scanned vectors (quantized codes and scales, or the
+            float32 matrix) and of the row norms
+        """
+        with self._lock:
+            used = len(self._ids)
+            if self._vectors is None:
+                return {"vectors": 0, "norms": 0}
+            if self._codes is not None:
+                vectors = self._codes[:used].nbytes
+                if self._scales is not None:
+                    vectors += self._scales[:used].nbytes
+            else:
+                vectors = used * self._vectors.shape[1] * 4
+            return {"vectors": vectors, "norms": used * 4}
+
+    def _rescore(
+        self,
+        vectors: np.ndarray,
+        norms: np.ndarray,
+        query: np.ndarray,
+        rows: np.ndarray,
+        n: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Re-rank candidate rows of a quantized scan with exact distances."""
+        rows = np.sort(rows)
+        query = query.reshape(1, -1)
+        distances = self._distances(
+            query @ np.asarray(vectors[rows]).T,
+            np.einsum("ij,ij->i", query, query),
+            norms[rows]
+        )[0]
+        order = np.argsort(distances, kind="stable")[:n]
+        return rows[order], distances[order].astype(np.float32)
+
+    def _distances(
+        self,
+        products: np.ndarray,
+        query_norms: np.ndarray,
+        block_norms: np.ndarray
+    ) -> np.ndarray:
+        """Distances between queries and stored vectors from their dot products."""
+        if self.space == "l2":
+            return np.maximum(query_norms[:, None] + block_norms[None, :] - 2.0 * products, 0.0)
+        if self.space == "ip":
+            return 1.0 - products
+        scale = np.sqrt(query_norms)[:, None] * np.sqrt(block_norms)[None, :]
+        scale[scale == 0] = 1.0
+        return 1.0 - products / scale
+
+    def _top_k(
+        self,
+        vectors: np.ndarray,
+        scales: Optional[np.ndarray],
+        norms: np.ndarray,
+        queries: np.ndarray,
+        candidates: np.ndarray,
+        n: int
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Score candidate rows block by block, keeping the n closest per query.
+
+        Dense candidate sets are scored over contiguous slices of the matrix
+        with non-candidates masked; sparse ones (filters, IVF probes) gather
+        only the candidate rows. Quantized vectors are converted to float32
+        one block at a time, so the scan never holds a float32 copy of the
+        whole matrix.
+        """
+        query_norms = np.einsum("ij,ij->i", queries, queries)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        best_distances = np.zeros((len(queries), 0), dtype=np.float32)
+
+        rows = np.flatnonzero(candidates)
+        gather = len(rows) < GATHER_FRACTION * len(candidates)
+        total = len(rows) if gather else len(candidates)
+        for start in range(0, total, self.block_size):
+            if gather:
+                block_rows = rows[start:start + self.block_size]
+                block = vectors[block_rows]
+            else:
+                block_rows = np.arange(start, min(start + self.block_size, total))
+                block = vectors[start:start + len(block_rows)]
+            products = queries @ block.astype(np.float32, copy=False).T
+            if scales is not None:
+                products *= scales[block_rows][None, :]
+            distances = self._distances(products, query_norms, norms[block_rows])
+            if not gather:
+                distances[:, ~candidates[block_rows]] = np.inf
+
+            merged_rows = np.concatenate(
+                [best_rows, np.broadcast_to(block_rows, (len(queries), len(block_rows)))], axis=1
+            )
+            merged_distances = np.concatenate([best_distances, distances.astype(np.float32)], axis=1)
+            if merged_distances.shape[1] > n:
+                keep = np.argpartition(merged_distances, n - 1, axis=1)[:, :n]
+                merged_rows = np.take_along_axis(merged_rows, keep, axis=1)
+                merged_distances = np.take_along_axis(merged_distances, keep, axis=1)
+            best_rows, best_distances = merged_rows, merged_distances
+
+        order = np.argsort(best_distances, axis=1, kind="stable")
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+        best_distances = np.take_along_axis(best_distances, order, axis=1)
+        return [
+            (query_rows[np.isfinite(query_distances)], query_distances[np.isfinite(query_distances)])
+            for query_rows, query_distances in zip(best_rows, best_distances)
+        ]
+
+    def _quantizer_space(self, vectors: np.ndarray) -> np.ndarray:
+        """Vectors as clustered by the quantizer: unit length for cosine."""
+        if self.space != "cosine":
+            return vectors
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _nearest_lists(self, vectors: np.ndarray, count: int) -> np.ndarray:
+        """Indices of the ``count`` nearest IVF clusters of each vector."""
+        vectors = self._quantizer_space(np.asarray(vectors, dtype=np.float32))
+        products = vectors @ self._centroids.T
+        if self.space == "ip":
+            scores = -products
+        else:
+            scores = np.einsum("ij,ij->i", self._centroids, self._centroids)[None, :] - 2.0 * products
+        if count >= scores.shape[1]:
+            return np.argsort(scores, axis=1)
+        return np.argpartition(scores, count - 1, axis=1)[:, :count]
+
+    def _ivf_assignments(self, live: int) -> Optional[np.ndarray]:
+        """Cluster of every row, training the quantizer when due.
+
+        The caller holds the lock. Small stores are searched exactly; the
+        quantizer is trained once the store is large enough and retrained
+        whenever it has doubled since.
+
+        Returns:
+            Cluster index by row (-1 for unused rows), or None for exact search
+        """
+        if not self.ivf_lists or self._vectors is None or live < self.ivf_lists * IVF_TRAIN_FACTOR:
+            return None
+        if self._centroids is None or live > 2 * self._trained_at:
+            self._train_ivf(live)
+        if self._assignments is None:
+            assignments = np.full(self._vectors.shape[0], -1, dtype=np.int32)
+            rows = np.flatnonzero(self._live[:len(self._ids)])
+            for start in range(0, len(rows), self.block_size):
+                block_rows = rows[start:start + self.block_size]
+                assignments[block_rows] = self._nearest_lists(self._vectors[block_rows], 1)[:, 0]
+            self._assignments = assignments
+        return self._assignments[:len(self._ids)].copy()
+
+    def _train_ivf(self, live: int) -> None:
+        """Train the IVF centroids with k-means on a sample of stored vectors."""
+        rng = np.random.default_rng(0)
+        rows = np.flatnonzero(self._live[:len(self._ids)])
+        sample = np.sort(rng.choice(rows, min(len(rows), self.ivf_lists * IVF_SAMPLE_FACTOR), replace=False))
+        data = self._quantizer_space(np.asarray(self._vectors[sample], dtype=np.float32))
+        centroids = data[rng.choice(len(data), self.ivf_lists, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            nearest = np.argmin(
+                np.einsum("ij,ij->i", centroids, centroids)[None, :] - 2.0 * (data @ centroids.T),
+                axis=1
+            )
+            counts = np.bincount(nearest, minlength=self.ivf_lists)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, nearest, data)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+
+        self._centroids = centroids
+        self._assignments = None
+        self._trained_at = live
+        if self.path is not None:
+            tmp_path = self._ivf_file.with_name("ivf.tmp.npz")
+            with open(tmp_path, "wb") as f:
+                np.savez(f, centroids=centroids, trained_at=np.array(live))
+            os.replace(tmp_path, self._ivf_file)
+        logger.info(f"Trained IVF quantizer with {self.ivf_lists} lists on {len(sample)} of {live} vectors")
+
+
+class NumpyRepository(ChromaRepository):
+    """Repository backed by a ``LocalCollection`` instead of ChromaDB."""
+
+    def __init__(
+        self,
+        collection_name: str,
+        persist_directory: Optional[str] = "data/vectors",
+        embedding_function = None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        executor: Optional[RepositoryExecutor] = None,
+        query_cache: Optional[QueryEmbeddingCache] = None,
+        space: str = "l2",
+        block_size: int = 16384,
+        ivf_lists: Optional[int] = None,
+        ivf_probes: int = 8,
+        quantization: Optional[str] = None
+    ):
+        """Initialize the repository.
+
+        Args:
+            collection_name: Name of the collection
+            persist_directory: Directory holding one subdirectory per
+                collection; None keeps the collection in memory
+            embedding_function: Optional custom embedding function
+            embedding_cache: Optional persistent cache consulted before the
+                embedding function is called
+            executor: Optional thread pool running the blocking calls of the
+                async methods
+            query_cache: Optional in-memory cache of query embeddings
+            space: Distance function: "l2" (squared, as ChromaDB's
+                default), "cosine" or "ip"
+            block_size: Number of stored vectors scored per matrix product
+            ivf_lists: Optional number of IVF clusters for large vaults
+            ivf_probes: Number of clusters scored per query
+            quantization: Optional "float16" or "int8" scan of the vectors,
+                with exact re-scoring of the best candidates
+        """
+        self.space = space
+        self.quantization = quantization
+        self.block_size = block_size
+        self.ivf_lists = ivf_lists
+        self.ivf_probes = ivf_probes
+        super().__init__(
+            collection_name,
+            persist_directory=persist_directory,
+            embedding_function=embedding_function,
+            embedding_cache=embedding_cache,
+            executor=executor,
+            query_cache=query_cache
+        )
+
+    def _open_collection(
+        self,
+        collection_name: str,
+        persist_directory: Optional[str],
+        embedding_function: Any
+    ) -> LocalCollection:
+        return LocalCollection(
+            collection_name,
+            path=Path(persist_directory) / collection_name if persist_directory else None,
+            embedding_function=embedding_function,
+            space=self.space,
+            block_size=self.block_size,
+            ivf_lists=self.ivf_lists,
+            ivf_probes=self.ivf_probes,
+            quantization=self.quantization
+        )
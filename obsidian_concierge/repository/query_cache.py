@@ -0,0 +1,143 @@
+"""
+In-process cache of query embeddings.
+
+Search queries repeat far more often than note contents change. This module
+keeps the vectors of recent queries in memory, keyed by embedding model and
+normalized query text, so that a repeated search skips the embedding round
+trip. The cache is bounded by entry count and vector bytes and entries expire
+after a time to live.
+"""
+
+import logging
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(text: str) -> str:
+    """Normalize a query so that trivially different spellings share a key.
+
+    Applies NFKC normalization and collapses whitespace. Case is kept,
+    because embedding models are case sensitive.
+
+    Args:
+        text: Query text
+
+    Returns:
+        Normalized query text
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class QueryEmbeddingCache:
+    """Thread-safe LRU cache of query vectors with a time to live."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None
+    ):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached vectors
+            max_bytes: Maximum total size of cached vectors in bytes
+            ttl: Seconds after which a cached vector expires
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._bytes = 0
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[np.ndarray, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, model: str, query: str) -> Optional[np.ndarray]:
+        """Look up the vector of a normalized query.
+
+        Args:
+            model: Embedding model key
+            query: Normalized query text
+
+        Returns:
+            The cached vector, or None on a miss
+        """
+        key = (model, query)
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and self.ttl is not None and item[1] + self.ttl <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, model: str, query: str, vector: Any) -> None:
+        """Store the vector of a normalized query.
+
+        Args:
+            model: Embedding model key
+            query: Normalized query text
+            vector: Query embedding
+        """
+        key = (model, query)
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (vector, time.monotonic())
+            self._bytes += vector.nbytes
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        """Drop an entry; the caller holds the lock."""
+        vector, _ = self._entries.pop(key)
+        self._bytes -= vector.nbytes
+
+    def clear(self) -> None:
+        """Remove all cached vectors."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters.
+
+        Returns:
+            Entry count, stored bytes, hits, misses, hit rate, evictions and
+            expirations
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,77 @@
+"""
+Tokenizer for lexical search over mixed Japanese and Latin text.
+
+Text is normalized first: NFKC folds full-width Latin letters and digits to
+their ASCII forms and half-width katakana to full-width, katakana is mapped
+to hiragana so that either spelling of a word matches, and case is folded.
+The text is then split into runs: CJK runs (kanji, kana, hangul), which have
+no spaces between words, are indexed as overlapping character bi-grams, and
+every other run of word characters is one token.
+"""
+
+import re
+import unicodedata
+from typing import List
+
+import numpy as np
+
+# Changes whenever the terms produced for the same text change, so that
+# indexes built with an older tokenizer are rebuilt
+TOKENIZER_VERSION = 1
+
+# Katakana letters ァ (U+30A1) to ヶ (U+30F6) map onto hiragana ぁ (U+3041)
+# to ゖ (U+3096); the prolonged sound mark ー is kept as is
+KATAKANA_FIRST = 0x30A1
+KATAKANA_LAST = 0x30F6
+KANA_OFFSET = 0x60
+
+# Characters written without spaces between words: hiragana, katakana
+# (without the middle dot ・), CJK ideographs with their extensions and
+# compatibility forms, the iteration mark 々 and hangul syllables
+CJK_CHARS = (
+    "\u3005\u3041-\u309f\u30a0-\u30fa\u30fc-\u30ff\u3400-\u4dbf\u4e00-\u9fff"
+    "\uf900-\ufaff\uac00-\ud7af\U00020000-\U0002fa1f"
+)
+
+# A CJK run, or a run of other word characters
+RUN_PATTERN = re.compile(f"([{CJK_CHARS}]+)|([^\\W{CJK_CHARS}]+)")
+
+
+def normalize(text: str) -> str:
+    """Normalize text for indexing and querying.
+
+    Args:
+        text: Text to normalize
+
+    Returns:
+        NFKC-normalized, case-folded text with katakana mapped to hiragana
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    # Shift katakana code points in one vectorized pass; str.translate
+    # looks every character up in a dict
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).copy()
+    codes[(codes >= KATAKANA_FIRST) & (codes <= KATAKANA_LAST)] -= KANA_OFFSET
+    return codes.tobytes().decode("utf-32-le")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into index terms.
+
+    CJK runs yield their character bi-grams, or the run itself when it is a
+    single character; other runs yield one word token each.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        Terms in text order
+    """
+    tokens: List[str] = []
+    for cjk, word in RUN_PATTERN.findall(normalize(text)):
+        if word:
+            tokens.append(word)
+        elif len(cjk) == 1:
+            tokens.append(cjk)
+        else:
+            tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+    return tokens
@@ -0,0 +1,297 @@
+"""
+Index job service.
+
+This module runs vault indexing as background jobs so that API handlers
+return immediately while the index is built on a worker thread.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional
+
+from ..indexer.vault_indexer import IndexingCancelled, VaultIndexer
+from ..utils.config import config
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+    """Lifecycle state of an index job."""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class JobConflictError(Exception):
+    """Raised when an index job is started while another one is active."""
+
+    def __init__(self, job: "IndexJob"):
+        super().__init__(f"Index job {job.id} is already {job.status.value}")
+        self.job = job
+
+
+@dataclass
+class IndexJob:
+    """A background indexing run."""
+    id: str
+    full: bool
+    resume: bool = True
+    status: JobStatus = JobStatus.PENDING
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    counts: Optional[Dict[str, int]] = None
+    indexer: Optional[VaultIndexer] = field(default=None, repr=False)
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def active(self) -> bool:
+        """Whether the job is pending or running."""
+        return self.status in (JobStatus.PENDING, JobStatus.RUNNING)
+
+    def progress(self) -> Dict[str, Any]:
+        """
+        Summarize the progress of the job.
+
+        The ETA is only estimated once the vault scan has finished, because
+        the number of files to process is unknown before that.
+
+        Returns:
+            Files scanned, skipped, parsed and written, documents embedded,
+            throughput and estimated seconds remaining
+        """
+        stats = self.indexer.last_stats if self.indexer else None
+        if stats is None:
+            return {
+                "files_scanned": 0,
+                "files_skipped": 0,
+                "files_parsed": 0,
+                "files_written": 0,
+                "documents_embedded": 0,
+                "scan_complete": False,
+                "elapsed_seconds": 0.0,
+                "files_per_sec": 0.0,
+                "eta_seconds": None
+            }
+
+        scanned = stats.files("scan")
+        skipped = stats.files("skip")
+        written = stats.files("write")
+        elapsed = stats.wall_seconds
+        rate = written / elapsed if elapsed > 0 else 0.0
+        scan_complete = stats.is_complete("scan")
+        eta = None
+        if scan_complete and self.active:
+            remaining = max(scanned - skipped - written, 0)
+            eta = round(remaining / rate, 1) if rate > 0 else None
+        return {
+            "files_scanned": scanned,
+            "files_skipped": skipped,
+            "files_parsed": stats.files("read"),
+            "files_written": written,
+            "documents_embedded": stats.files("embed"),
+            "scan_complete": scan_complete,
+            "elapsed_seconds": round(elapsed, 1),
+            "files_per_sec": round(rate, 1),
+            "eta_seconds": eta
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serialize the job for API responses.
+
+        Returns:
+            Job state and progress
+        """
+        counts = self.counts
+        if counts is None and self.indexer is not None and self.indexer.last_counts is not None:
+            counts = dict(self.indexer.last_counts)
+        return {
+            "job_id": self.id,
+            "full": self.full,
+            "status": self.status.value,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "counts": counts,
+            "progress": self.progress()
+        }
+
+
+class IndexJobManager:
+    """Runs at most one indexing job at a time on a background thread."""
+
+    def __init__(
+        self,
+        indexer_factory: Callable[[], VaultIndexer],
+        batch_size: Optional[int] = None,
+        max_history: int = 20,
+        write_lock: Optional[threading.Lock] = None
+    ):
+        """
+        Initialize the job manager.
+
+        Args:
+            indexer_factory: Function creating the indexer used by a job;
+                called on the job's thread
+            batch_size: Number of documents written per batch (defaults to
+                config.VAULT_INDEX_BATCH_SIZE)
+            max_history: Number of finished jobs kept for status queries
+            write_lock: Lock held while a job writes the index; share it with
+                other index writers such as the vault watcher
+        """
+        self.indexer_factory = indexer_factory
+        self.batch_size = batch_size or config.VAULT_INDEX_BATCH_SIZE
+        self.max_history = max_history
+        self._jobs: "OrderedDict[str, IndexJob]" = OrderedDict()
+        self._threads: Dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+        self.write_lock = write_lock or threading.Lock()
+
+    @property
+    def active_job(self) -> Optional[IndexJob]:
+        """The pending or running job, if any."""
+        with self._lock:
+            return next((job for job in self._jobs.values() if job.active), None)
+
+    def start(self, full: bool = False, resume: bool = True) -> IndexJob:
+        """
+        Start an indexing job in the background.
+
+        Args:
+            full: Re-index every file instead of only changes since the last run
+            resume: Continue an interrupted run recorded in the checkpoint
+
+        Returns:
+            The started job
+
+        Raises:
+            JobConflictError: If another job is pending or running
+        """
+        with self._lock:
+            active = next((job for job in self._jobs.values() if job.active), None)
+            if active is not None:
+                raise JobConflictError(active)
+
+            job = IndexJob(id=uuid.uuid4().hex, full=full, resume=resume)
+            self._jobs[job.id] = job
+            self._prune()
+            thread = threading.Thread(
+                target=self._run,
+                args=(job,),
+                name=f"index-job-{job.id[:8]}",
+                daemon=True
+            )
+            self._threads[job.id] = thread
+
+        thread.start()
+        logger.info(f"Started index job {job.id} (full={full})")
+        return job
+
+    def _run(self, job: IndexJob) -> None:
+        """Execute a job on the current thread."""
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+        try:
+            with self.write_lock:
+                # Created under the lock so that the manifest is loaded after
+                # any concurrent watcher flush has saved it
+                job.indexer = self.indexer_factory()
+                job.counts = job.indexer.index_vault(
+                    batch_size=self.batch_size,
+                    incremental=not job.full,
+                    resume=job.resume,
+                    cancel=job.cancel_event
+                )
+            job.status = JobStatus.COMPLETED
+        except IndexingCancelled:
+            job.status = JobStatus.CANCELLED
+        except Exception as e:
+            logger.error(f"Index job {job.id} failed: {e}")
+            job.error = str(e)
+            job.status = JobStatus.FAILED
+        finally:
+            if job.counts is None and job.indexer is not None and job.indexer.last_counts:
+                job.counts = dict(job.indexer.last_counts)
+            job.finished_at = time.time()
+            with self._lock:
+                self._threads.pop(job.id, None)
+            logger.info(f"Index job {job.id} finished with status {job.status.value}")
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs beyond ``max_history``."""
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        for job_id in finished[:max(len(self._jobs) - self.max_history, 0)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[IndexJob]:
+        """
+        Look up a job.
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            The job, or None if it is unknown
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[IndexJob]:
+        """
+        List known jobs, newest first.
+
+        Returns:
+            Jobs in reverse creation order
+        """
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def cancel(self, job_id: str) -> IndexJob:
+        """
+        Request cancellation of a job.
+
+        The job stops after committing the documents it has already read.
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            The job
+
+        Raises:
+            KeyError: If the job is unknown
+        """
+        job = self.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        if job.active:
+            job.cancel_event.set()
+            logger.info(f"Cancellation requested for index job {job_id}")
+        return job
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[IndexJob]:
+        """
+        Wait for a job to finish.
+
+        Args:
+            job_id: Job ID
+            timeout: Maximum number of seconds to wait
+
+        Returns:
+            The job, or None if it is unknown
+        """
+        with self._lock:
+            thread = self._threads.get(job_id)
+        if thread is not None:
+            thread.join(timeout)
+        return self.get(job_id)
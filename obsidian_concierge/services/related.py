@@ -0,0 +1,207 @@
+"""
+Related notes service.
+
+This module maintains the precomputed nearest-neighbour graph of notes in the
+background and serves "related notes" lookups from it. The graph is brought
+up to date whenever the repository has been written to since the last sync,
+recomputing only the rows affected by changed notes. The notes to revisit
+come from the repository's change log, so that a sync does not scan every
+note.
+"""
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..repository.chroma import ChromaRepository
+from ..repository.knn_graph import KnnGraph
+
+logger = logging.getLogger(__name__)
+
+
+class RelatedNotesService:
+    """Keeps a related-notes graph in sync with the repository."""
+
+    def __init__(
+        self,
+        repo: ChromaRepository,
+        graph_path: Optional[str] = None,
+        k: int = 20,
+        block_size: int = 1024,
+        min_interval: float = 0.0
+    ):
+        """
+        Initialize the service.
+
+        Args:
+            repo: Repository holding the note embeddings
+            graph_path: Optional file the graph is persisted to
+            k: Number of related notes kept per note
+            block_size: Number of notes compared against all others at once
+            min_interval: Minimum seconds between background syncs, so that
+                an indexing run does not trigger one sync per batch
+        """
+        self.repo = repo
+        self.graph_path = Path(graph_path) if graph_path else None
+        self.k = k
+        self.block_size = block_size
+        self.min_interval = min_interval
+        self.graph: Optional[KnnGraph] = None
+        if self.graph_path is not None:
+            graph = KnnGraph.load(self.graph_path, block_size=block_size)
+            if graph is not None and graph.k == k:
+                self.graph = graph
+        self.synced_generation: Optional[int] = None
+        self.last_sync: Optional[Dict[str, Any]] = None
+        self._sync_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._last_started = 0.0
+
+    @property
+    def stale(self) -> bool:
+        """Whether the repository changed since the last sync."""
+        return self.synced_generation != self.repo.generation
+
+    def sync(self) -> Dict[str, Any]:
+        """
+        Bring the graph up to date with the repository.
+
+        The first sync without a stored graph builds it from all note
+        vectors. Later syncs compare note signatures, fetch vectors only for
+        added and changed notes and update the graph incrementally. Only the
+        signatures of notes written to since the last sync are read, unless
+        the repository does not know them (as after a restart), in which case
+        all signatures are compared. The new graph replaces the served one
+        once complete.
+
+        Returns:
+            Counts of added, changed and removed notes, recomputed rows and
+            the duration of the sync
+        """
+        with self._sync_lock:
+            start = time.perf_counter()
+            # Read before scanning, so that writes during the sync leave the
+            # graph marked stale
+            generation = self.repo.generation
+
+            if self.graph is None:
+                signatures = self.repo.note_signatures()
+                vectors = self.repo.note_vectors()
+                ids = [note_id for note_id in vectors if note_id in signatures]
+                graph = KnnGraph(k=self.k, block_size=self.block_size)
+                graph.build(
+                    ids,
+                    np.array([vectors[note_id] for note_id in ids]).reshape(len(ids), -1),
+                    [signatures[note_id] for note_id in ids]
+                )
+                counts = {"added": len(ids), "changed": 0, "removed": 0, "recomputed": len(ids)}
+            else:
+                graph = self.graph.copy()
+                candidates = None
+                if self.synced_generation is not None:
+                    candidates = self.repo.changed_notes(self.synced_generation)
+                if candidates is None:
+                    signatures = self.repo.note_signatures()
+                    candidates = graph.ids
+                else:
+                    signatures = self.repo.note_signatures(sorted(candidates))
+                added = [note_id for note_id in signatures if note_id not in graph]
+                changed = [
+                    note_id for note_id, signature in signatures.items()
+                    if note_id in graph and graph.signature(note_id) != signature
+                ]
+                removed = [
+                    note_id for note_id in candidates
+                    if note_id in graph and note_id not in signatures
+                ]
+                vectors = self.repo.note_vectors(added + changed)
+                recomputed = graph.update(vectors, removed, signatures)
+                counts = {
+                    "added": len(added),
+                    "changed": len(changed),
+                    "removed": len(removed),
+                    "recomputed": recomputed
+                }
+
+            if self.graph_path is not None:
+                graph.save(self.graph_path)
+            self.graph = graph
+            self.synced_generation = generation
+            self.last_sync = {
+                **counts,
+                "notes": len(graph),
+                "seconds": round(time.perf_counter() - start, 3),
+                "finished_at": time.time()
+            }
+            logger.info(
+                f"Synced related notes: {counts['added']} added, {counts['changed']} changed, "
+                f"{counts['removed']} removed, {counts['recomputed']} rows recomputed"
+            )
+            return self.last_sync
+
+    def start_sync(self) -> bool:
+        """
+        Sync the graph on a background thread.
+
+        Returns:
+            True if a sync was started, False if one is already running or
+            the previous one started less than ``min_interval`` ago
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return False
+        if time.monotonic() - self._last_started < self.min_interval:
+            return False
+        self._last_started = time.monotonic()
+        self._thread = threading.Thread(target=self._run_sync, name="related-notes-sync", daemon=True)
+        self._thread.start()
+        return True
+
+    def _run_sync(self) -> None:
+        """Run a sync, logging failures instead of raising them."""
+        try:
+            self.sync()
+        except Exception as e:
+            logger.error(f"Related notes sync failed: {e}")
+
+    def related(self, note_id: str, limit: Optional[int] = None) -> Optional[List[Tuple[str, float]]]:
+        """
+        Look up the related notes of a note.
+
+        A stale graph is still served, and a background sync is started to
+        refresh it.
+
+        Args:
+            note_id: Note ID
+            limit: Maximum number of related notes
+
+        Returns:
+            (note ID, cosine distance) pairs, closest first, or None if the
+            note is not in the graph
+        """
+        if self.stale:
+            self.start_sync()
+        graph = self.graph
+        if graph is None or note_id not in graph:
+            return None
+        return graph.get(note_id, limit)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the state of the graph.
+
+        Returns:
+            Note count, k, staleness, whether a sync is running and the
+            result of the last sync
+        """
+        graph = self.graph
+        return {
+            "notes": len(graph) if graph is not None else 0,
+            "k": self.k,
+            "stale": self.stale,
+            "syncing": self._thread is not None and self._thread.is_alive(),
+            "last_sync": self.last_sync
+        }
@@ -4,40 +4,436 @@ Search service.
 This module provides functionality for searching the indexed vault content.
 """
 
-from typing import List, Optional, Dict, Any
+import asyncio
+import json
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, Tuple, Union
+
+from ..repository.chroma import (CHUNK_OVERFETCH, ChromaRepository, Document, SearchQuery,
+                                 collapse_chunks)
+from ..repository.lexical_index import LexicalIndex
+from ..repository.query_cache import normalize_query
+from .related import RelatedNotesService
+
+CacheKey = Tuple[str, str, Optional[int], bool, str]
+# Repository generation, paired with the lexical index generation for
+# searches that read the lexical index
+Generation = Union[int, Tuple[int, int]]
+
+# Ranking used by a search: vector similarity, BM25 over the inverted index
+# or both fused by reciprocal rank
+SEARCH_MODES = ("vector", "lexical", "hybrid")
+
+# Number of lexical candidates fetched per requested chunk when filters
+# may reject some of them
+LEXICAL_FILTER_PAGE = 4
+
+
+def reciprocal_rank_fusion(
+    rankings: List[List[Dict[str, Any]]],
+    k: int = 60,
+    limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Fuse ranked result lists by reciprocal rank.
+    
+    Each result scores ``sum(1 / (k + rank))`` over the lists it appears in,
+    with ranks starting at 1, so that results ranked well by several lists
+    come first without comparing their incompatible raw scores.
+    
+    Args:
+        rankings: Result lists ordered by relevance, at most one result per
+            note each
+        k: Rank offset damping the weight of the top ranks
+        limit: Optional maximum number of results to return
+        
+    Returns:
+        Results with their fused score as "score", best first; a result
+        appearing in several lists is taken from the first of them
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, result in enumerate(ranking, start=1):
+            metadata = result["metadata"] or {}
+            key = metadata.get("parent_id") or metadata.get("path") or result["id"]
+            fused.setdefault(key, result)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    order = sorted(scores, key=lambda key: -scores[key])
+    if limit is not None:
+        order = order[:limit]
+    return [{**fused[key], "score": scores[key]} for key in order]
+
+
+class SearchResultCache:
+    """LRU cache of search results tagged with the repository generation.
+    
+    An entry is only served while the repository generation it was stored
+    under is still current, so any write to the collection invalidates every
+    cached result at once without touching the entries.
+    """
+    
+    def __init__(self, max_entries: int = 512):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_entries: Maximum number of cached result lists
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[CacheKey, Tuple[Generation, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key(
+        query: str,
+        limit: Optional[int],
+        filters: Optional[Dict[str, Any]],
+        include_content: bool = True,
+        mode: str = "vector"
+    ) -> CacheKey:
+        """
+        Build the cache key of a search.
+        
+        Args:
+            query: Search query
+            limit: Maximum number of results
+            filters: Optional metadata filters
+            include_content: Whether results carry document content
+            mode: Search mode
+            
+        Returns:
+            Key of normalized query, canonical filters, limit, projection
+            and mode
+        """
+        canonical = json.dumps(filters, sort_keys=True, default=str) if filters else ""
+        return normalize_query(query), canonical, limit, include_content, mode
+    
+    def get(self, key: CacheKey, generation: Generation) -> Optional[List[Dict[str, Any]]]:
+        """
+        Look up cached results.
+        
+        Args:
+            key: Cache key
+            generation: Current repository generation
+            
+        Returns:
+            A copy of the cached results, or None if absent or stale
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != generation:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[1])
+    
+    def put(self, key: CacheKey, generation: Generation, results: List[Dict[str, Any]]) -> None:
+        """
+        Store results.
+        
+        Args:
+            key: Cache key
+            generation: Repository generation read before the search ran
+            results: Search results
+        """
+        with self._lock:
+            self._entries[key] = (generation, list(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Remove all cached results."""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
+        
+        Returns:
+            Entry count, hits, misses and hit rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
 
-from ..repository.chroma import ChromaRepository
 
 class SearchService:
     """Search service."""
     
-    def __init__(self, repo: ChromaRepository):
-        """Initialize the service."""
+    def __init__(
+        self,
+        repo: ChromaRepository,
+        result_cache: Optional[SearchResultCache] = None,
+        related: Optional[RelatedNotesService] = None,
+        lexical: Optional[LexicalIndex] = None,
+        rrf_k: int = 60
+    ):
+        """
+        Initialize the service.
+        
+        Args:
+            repo: Repository to search
+            result_cache: Optional cache of results, invalidated whenever the
+                repository is written to
+            related: Optional precomputed related-notes graph consulted
+                before running a similarity query
+            lexical: Optional inverted index of the repository's documents,
+                required by the "lexical" and "hybrid" search modes
+            rrf_k: Rank offset of the reciprocal rank fusion of hybrid search
+        """
         self.repo = repo
+        self.result_cache = result_cache
+        self.related = related
+        self.lexical = lexical
+        self.rrf_k = rrf_k
     
     async def search(
         self,
         query: str,
         limit: Optional[int] = 10,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        include_content: bool = True,
+        mode: str = "vector"
     ) -> List[Dict[str, Any]]:
         """
         Search the indexed vault content.
         
+        The "vector" mode ranks by embedding distance, so that a lower
+        score is better. The "lexical" mode ranks by BM25 over the inverted
+        index without embedding the query; its score is the BM25 score. The
+        "hybrid" mode runs both and fuses their note rankings by reciprocal
+        rank; its score is the fused score. Higher is better for both.
+        
         Args:
             query: Search query
             limit: Maximum number of results to return
             filters: Optional filters to apply
+            include_content: Return the content of each hit; without it
+                "text" is None and the stored excerpt is in the metadata
+            mode: "vector", "lexical" or "hybrid"
             
         Returns:
-            List of search results
+            List of search results, one per note
+            
+        Raises:
+            ValueError: If the mode is unknown, or needs a lexical index and
+                the service has none
         """
-        results = await self.repo.search(
-            query=query,
-            limit=limit,
-            filters=filters
-        )
+        self._check_mode(mode)
+        
+        # Read the generation before searching, so that results of a search
+        # racing with a write are stored under the older generation
+        generation = self._generation(mode)
+        if self.result_cache is not None:
+            key = self.result_cache.key(query, limit, filters, include_content, mode)
+            cached = self.result_cache.get(key, generation)
+            if cached is not None:
+                return cached
+        
+        chunk_limit = limit * CHUNK_OVERFETCH if limit else limit
+        vector_results = lexical_results = None
+        if mode == "vector":
+            vector_results = await self.repo.search(
+                query=query,
+                limit=chunk_limit,
+                filters=filters,
+                include_content=include_content
+            )
+        elif mode == "lexical":
+            lexical_results = await self._lexical_search(query, chunk_limit, filters, include_content)
+        else:
+            vector_results, lexical_results = await asyncio.gather(
+                self.repo.search(
+                    query=query,
+                    limit=chunk_limit,
+                    filters=filters,
+                    include_content=include_content
+                ),
+                self._lexical_search(query, chunk_limit, filters, include_content)
+            )
+        results = self._rank(vector_results, lexical_results, limit)
+        if self.result_cache is not None:
+            self.result_cache.put(key, generation, results)
         return results
+    
+    def _check_mode(self, mode: str) -> None:
+        """
+        Check that the service can search in a mode.
+        
+        Raises:
+            ValueError: If the mode is unknown, or needs a lexical index and
+                the service has none
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        if mode != "vector" and self.lexical is None:
+            raise ValueError(f"Search mode '{mode}' requires a lexical index")
+    
+    def _generation(self, mode: str) -> Generation:
+        """Get the generation that results of a search in a mode are cached under."""
+        if mode == "vector":
+            return self.repo.generation
+        return (self.repo.generation, self.lexical.generation)
+    
+    def _rank(
+        self,
+        vector_results: Optional[List[Dict[str, Any]]],
+        lexical_results: Optional[List[Dict[str, Any]]],
+        limit: Optional[int]
+    ) -> List[Dict[str, Any]]:
+        """
+        Rank chunk hits by note.
+        
+        Args:
+            vector_results: Chunk hits of the vector search, if one ran
+            lexical_results: Chunk hits of the lexical search, if one ran
+            limit: Maximum number of notes to return
+            
+        Returns:
+            The hits of the one search collapsed to one per note, or both
+            fused by reciprocal rank
+        """
+        if lexical_results is None:
+            return collapse_chunks(vector_results, lambda result: result["metadata"], limit)
+        if vector_results is None:
+            return collapse_chunks(lexical_results, lambda result: result["metadata"], limit)
+        return reciprocal_rank_fusion(
+            [
+                collapse_chunks(vector_results, lambda result: result["metadata"]),
+                collapse_chunks(lexical_results, lambda result: result["metadata"])
+            ],
+            k=self.rrf_k,
+            limit=limit
+        )
+    
+    async def _lexical_search(
+        self,
+        query: str,
+        limit: Optional[int],
+        filters: Optional[Dict[str, Any]],
+        include_content: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        Rank chunks with the inverted index and fetch them from the repository.
+        
+        Without filters only the top chunks are fetched. With filters,
+        candidates are fetched page by page in rank order until enough of
+        them match.
+        
+        Args:
+            query: Search query
+            limit: Maximum number of chunks to return
+            filters: Optional metadata filters
+            include_content: Fetch the content of each chunk
+            
+        Returns:
+            Search results with BM25 scores, best first
+        """
+        ranked = await self.repo.executor.run(
+            self.lexical.search, query, None if filters else limit
+        )
+        page = max(limit * LEXICAL_FILTER_PAGE, 100) if limit and filters else len(ranked)
+        results: List[Dict[str, Any]] = []
+        for start in range(0, len(ranked), page or 1):
+            candidates = ranked[start:start + page]
+            found = await self.repo.afetch_results(
+                [doc_id for doc_id, _ in candidates], where=filters, include_content=include_content
+            )
+            # Chunks removed from the repository since ranking are skipped
+            results.extend(
+                {**found[doc_id], "score": score}
+                for doc_id, score in candidates
+                if doc_id in found
+            )
+            if limit is not None and len(results) >= limit:
+                break
+        return results[:limit] if limit is not None else results
+
+    async def search_batch(self, queries: List[SearchQuery]) -> List[List[Dict[str, Any]]]:
+        """
+        Run several searches as one embedding batch and vector query.
+        
+        Each query is ranked in its own mode, as by ``search``. The vector
+        searches of "vector" and "hybrid" queries share one repository
+        batch, which runs alongside the lexical searches.
+        
+        Args:
+            queries: Queries with their own limits, filters and modes
+            
+        Returns:
+            Search results of each query, one per note, in query order
+            
+        Raises:
+            ValueError: If a mode is unknown, or needs a lexical index and
+                the service has none
+        """
+        for query in queries:
+            self._check_mode(query.mode)
+        generations = [self._generation(query.mode) for query in queries]
+        batch_results: List[Optional[List[Dict[str, Any]]]] = [None] * len(queries)
+        keys: List[Optional[CacheKey]] = [None] * len(queries)
+        if self.result_cache is not None:
+            for i, query in enumerate(queries):
+                keys[i] = self.result_cache.key(
+                    query.query, query.limit, query.filters, query.include_content, query.mode
+                )
+                batch_results[i] = self.result_cache.get(keys[i], generations[i])
+        
+        # Only queries missing from the cache reach the repository
+        missing = [i for i, results in enumerate(batch_results) if results is None]
+        if not missing:
+            return batch_results
+        chunk_limits = {
+            i: queries[i].limit * CHUNK_OVERFETCH if queries[i].limit else queries[i].limit
+            for i in missing
+        }
+        vector = [i for i in missing if queries[i].mode != "lexical"]
+        lexical = [i for i in missing if queries[i].mode != "vector"]
+        
+        async def vector_batch() -> List[List[Dict[str, Any]]]:
+            if not vector:
+                return []
+            return await self.repo.search_batch([
+                SearchQuery(
+                    query=queries[i].query,
+                    limit=chunk_limits[i],
+                    filters=queries[i].filters,
+                    include_content=queries[i].include_content
+                )
+                for i in vector
+            ])
+        
+        vector_hits, *lexical_hits = await asyncio.gather(
+            vector_batch(),
+            *(
+                self._lexical_search(
+                    queries[i].query, chunk_limits[i], queries[i].filters, queries[i].include_content
+                )
+                for i in lexical
+            )
+        )
+        vector_results = dict(zip(vector, vector_hits))
+        lexical_results = dict(zip(lexical, lexical_hits))
+        for i in missing:
+            batch_results[i] = self._rank(
+                vector_results.get(i), lexical_results.get(i), queries[i].limit
+            )
+            if self.result_cache is not None:
+                self.result_cache.put(keys[i], generations[i], batch_results[i])
+        return batch_results
 
     async def get_similar_documents(
         self,
@@ -47,6 +443,10 @@ class SearchService:
         """
         Find documents similar to a given document.
         
+        Notes in the related-notes graph are answered from the graph; the
+        neighbours' first chunks are then fetched by ID. Other documents
+        fall back to a similarity query.
+        
         Args:
             document_id: ID of the document to find similar ones for
             limit: Maximum number of similar documents to return
@@ -62,21 +462,64 @@ class SearchService:
             raise ValueError("Document ID cannot be empty")
             
         try:
-            results = await self.repo.find_similar(
-                document_id=document_id,
+            neighbors = self.related.related(document_id, limit) if self.related else None
+            if neighbors is not None:
+                notes = await self.repo.get_notes([note_id for note_id, _ in neighbors])
+                results = [
+                    (notes[note_id], distance)
+                    for note_id, distance in neighbors
+                    if note_id in notes
+                ]
+            else:
+                results = await self.repo.find_similar(
+                    document_id=document_id,
+                    limit=limit
+                )
+            
+            return self._format_similar(results)
+            
+        except Exception as e:
+            raise Exception(f"Similarity search failed: {str(e)}")
+
+    async def get_similar_documents_many(
+        self,
+        document_ids: List[str],
+        limit: Optional[int] = 5
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Find documents similar to each of several documents.
+        
+        Args:
+            document_ids: IDs of the documents to find similar ones for
+            limit: Maximum number of similar documents per document
+            
+        Returns:
+            Similar documents by source document ID; unknown IDs are omitted
+            
+        Raises:
+            Exception: If similarity search fails
+        """
+        try:
+            results = await self.repo.find_similar_many(
+                document_ids=[document_id for document_id in document_ids if document_id.strip()],
                 limit=limit
             )
-            
-            # Process and format results
-            formatted_results = []
-            for doc, score in results:
-                formatted_results.append({
-                    "content": doc.page_content,
-                    "metadata": doc.metadata,
-                    "score": float(score)
-                })
-                
-            return formatted_results
+            return {
+                document_id: self._format_similar(similar)
+                for document_id, similar in results.items()
+            }
             
         except Exception as e:
-            raise Exception(f"Similarity search failed: {str(e)}") 
\ No newline at end of file
+            raise Exception(f"Similarity search failed: {str(e)}")
+
+    @staticmethod
+    def _format_similar(results: List[Tuple[Document, float]]) -> List[Dict[str, Any]]:
+        """Format (document, score) pairs for API responses."""
+        return [
+            {
+                "content": doc.content,
+                "metadata": doc.metadata,
+                "score": float(score)
+            }
+            for doc, score in results
+        ]
@@ -6,8 +6,9 @@ logging, file system operations, and other common functionality.
 """
 
 from .config import AppConfig, config, load_config
-from .fs import (ensure_dir, get_file_extension, get_file_size, is_text_file,
-                list_files, safe_remove)
+from .fs import (DEFAULT_IGNORED_DIRS, ensure_dir, get_file_extension,
+                get_file_size, is_ignored, is_text_file, list_files,
+                read_text_file, safe_remove, walk_files)
 from .logging import LogConfig, logger, setup_logging
 
 __all__ = [
@@ -22,10 +23,14 @@ __all__ = [
     "setup_logging",
     
     # File system
+    "DEFAULT_IGNORED_DIRS",
     "ensure_dir",
     "get_file_extension",
     "get_file_size",
+    "is_ignored",
     "is_text_file",
     "list_files",
-    "safe_remove"
+    "read_text_file",
+    "safe_remove",
+    "walk_files"
 ] 
\ No newline at end of file
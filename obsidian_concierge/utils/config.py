@@ -7,7 +7,7 @@ from various sources (YAML files, environment variables).
 
 import os
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 import yaml
 from pydantic import BaseModel, Field
@@ -47,6 +47,134 @@ class AppConfig(BaseModel):
         default="obsidian_notes",
         description="Name of the ChromaDB collection"
     )
+    CHROMA_MAX_CONCURRENCY: int = Field(
+        default=4,
+        description="Maximum number of ChromaDB queries running at once off the event loop"
+    )
+    
+    # Vector store settings
+    VECTOR_BACKEND: str = Field(
+        default="chroma",
+        description="Vector store: 'chroma' or 'numpy' (local memory-mapped matrix)"
+    )
+    NUMPY_STORE_DIR: str = Field(
+        default="data/vectors",
+        description="Directory of the numpy vector store"
+    )
+    NUMPY_STORE_BLOCK_SIZE: int = Field(
+        default=16384,
+        description="Number of stored vectors scored per matrix product by the numpy vector store"
+    )
+    NUMPY_STORE_IVF_LISTS: Optional[int] = Field(
+        default=None,
+        description="Optional number of IVF clusters of the numpy vector store, for large vaults"
+    )
+    NUMPY_STORE_IVF_PROBES: int = Field(
+        default=8,
+        description="Number of IVF clusters scored per query by the numpy vector store"
+    )
+    NUMPY_STORE_QUANTIZATION: Optional[str] = Field(
+        default=None,
+        description="Optional 'float16' or 'int8' quantization of the vectors scanned by the numpy vector store"
+    )
+    
+    # Search settings
+    SEARCH_BATCH_MAX_QUERIES: int = Field(
+        default=100,
+        description="Maximum number of queries accepted by one batch search request"
+    )
+    SEARCH_CACHE_MAX_ENTRIES: int = Field(
+        default=512,
+        description="Maximum number of search result lists kept in memory"
+    )
+    LEXICAL_INDEX_PATH: str = Field(
+        default="data/lexical_index.npz",
+        description="File storing the inverted index used by lexical and hybrid search"
+    )
+    LEXICAL_BM25_K1: float = Field(
+        default=1.2,
+        description="BM25 term frequency saturation of lexical search"
+    )
+    LEXICAL_BM25_B: float = Field(
+        default=0.75,
+        description="BM25 document length normalization of lexical search"
+    )
+    SEARCH_RRF_K: int = Field(
+        default=60,
+        description="Rank offset of the reciprocal rank fusion used by hybrid search"
+    )
+    RELATED_NOTES_PATH: str = Field(
+        default="data/related_notes.npz",
+        description="File storing the precomputed related-notes graph"
+    )
+    RELATED_NOTES_K: int = Field(
+        default=20,
+        description="Number of related notes precomputed per note"
+    )
+    RELATED_NOTES_BLOCK_SIZE: int = Field(
+        default=1024,
+        description="Number of notes compared against all others at once when computing related notes"
+    )
+    RELATED_NOTES_SYNC_INTERVAL: float = Field(
+        default=30.0,
+        description="Minimum seconds between background syncs of the related-notes graph"
+    )
+    
+    # Embedding settings
+    EMBEDDING_PROVIDER: str = Field(
+        default="default",
+        description="Embedding backend: 'default' (ChromaDB's bundled model) or 'ollama'"
+    )
+    OLLAMA_BASE_URL: str = Field(
+        default="http://localhost:11434",
+        description="Ollama API base URL"
+    )
+    OLLAMA_EMBED_MODEL: str = Field(
+        default="nomic-embed-text",
+        description="Ollama model used for embeddings"
+    )
+    OLLAMA_EMBED_BATCH_SIZE: int = Field(
+        default=64,
+        description="Maximum number of texts sent to Ollama in one embedding request"
+    )
+    OLLAMA_EMBED_BATCH_CHARS: int = Field(
+        default=65_536,
+        description="Maximum total characters sent to Ollama in one embedding request"
+    )
+    OLLAMA_EMBED_CONCURRENCY: int = Field(
+        default=4,
+        description="Maximum number of Ollama embedding requests in flight"
+    )
+    OLLAMA_EMBED_TIMEOUT: float = Field(
+        default=120.0,
+        description="Timeout in seconds of one Ollama embedding request"
+    )
+    
+    # Embedding cache settings
+    EMBEDDING_CACHE_PATH: str = Field(
+        default="data/embedding_cache.sqlite",
+        description="SQLite file caching embeddings by model and text hash"
+    )
+    EMBEDDING_CACHE_MAX_ENTRIES: int = Field(
+        default=500_000,
+        description="Maximum number of cached embeddings"
+    )
+    EMBEDDING_CACHE_MAX_BYTES: int = Field(
+        default=1_073_741_824,  # 1GB
+        description="Maximum total size of cached embedding vectors"
+    )
+    QUERY_CACHE_MAX_ENTRIES: int = Field(
+        default=1024,
+        description="Maximum number of query embeddings kept in memory"
+    )
+    QUERY_CACHE_MAX_BYTES: int = Field(
+        default=16_777_216,  # 16MB
+        description="Maximum total size of query embeddings kept in memory"
+    )
+    QUERY_CACHE_TTL: float = Field(
+        default=3600.0,
+        description="Seconds after which a cached query embedding expires"
+    )
     
     # Vault settings
     VAULT_PATH: str = Field(
@@ -56,7 +184,71 @@ class AppConfig(BaseModel):
     )
     VAULT_INDEX_BATCH_SIZE: int = Field(
         default=100,
-        description="Number of documents to process in each indexing batch"
+        description="Maximum number of documents written in one indexing batch"
+    )
+    VAULT_INDEX_BATCH_BYTES: int = Field(
+        default=262_144,
+        description="Initial content size in bytes of an indexing batch; adapted to observed throughput"
+    )
+    VAULT_INDEX_BATCH_MIN_BYTES: int = Field(
+        default=16_384,
+        description="Smallest content size in bytes the adaptive indexing batch may shrink to"
+    )
+    VAULT_INDEX_BATCH_MAX_BYTES: int = Field(
+        default=4_194_304,
+        description="Largest content size in bytes sent to the embedder in one request"
+    )
+    VAULT_INDEX_BATCH_MAX_TOKENS: Optional[int] = Field(
+        default=None,
+        description="Optional limit on the estimated tokens sent to the embedder in one request"
+    )
+    VAULT_INDEX_BATCH_MAX_SECONDS: Optional[float] = Field(
+        default=30.0,
+        description="Batch latency in seconds above which the indexing batch budget always shrinks"
+    )
+    VAULT_INDEX_WORKERS: int = Field(
+        default=4,
+        description="Number of threads reading and parsing files during indexing"
+    )
+    VAULT_INDEX_QUEUE_SIZE: int = Field(
+        default=256,
+        description="Maximum number of parsed documents buffered for the index writer"
+    )
+    VAULT_CHUNK_SIZE: int = Field(
+        default=1000,
+        description="Maximum number of characters per indexed note chunk"
+    )
+    VAULT_CHUNK_OVERLAP: int = Field(
+        default=200,
+        description="Number of characters shared by consecutive chunks of a long section"
+    )
+    VAULT_WATCH_ENABLED: bool = Field(
+        default=False,
+        description="Watch the vault and update the index while the API server runs"
+    )
+    VAULT_WATCH_DEBOUNCE: float = Field(
+        default=2.0,
+        description="Seconds without new file events before the watcher flushes changes"
+    )
+    VAULT_WATCH_MAX_DELAY: float = Field(
+        default=30.0,
+        description="Maximum seconds the watcher holds changes during continuous activity"
+    )
+    VAULT_WATCH_POLL_INTERVAL: float = Field(
+        default=1.0,
+        description="Seconds between vault scans when native file events are unavailable"
+    )
+    VAULT_IGNORE_PATTERNS: List[str] = Field(
+        default_factory=list,
+        description="Glob patterns of vault paths excluded from indexing (e.g. 'templates/*')"
+    )
+    VAULT_MANIFEST_PATH: str = Field(
+        default="data/vault_manifest.json",
+        description="File recording indexed file state for incremental indexing"
+    )
+    VAULT_INDEX_CHECKPOINT_PATH: str = Field(
+        default="data/index_checkpoint.jsonl",
+        description="Log of committed batches used to resume an interrupted indexing run"
     )
 
     class Config:
@@ -5,13 +5,22 @@ This module provides helper functions for common file system operations used
 throughout the application.
 """
 
+import codecs
+import fnmatch
+import mmap
 import os
 import shutil
 from pathlib import Path
-from typing import List, Optional, Set
+from typing import Iterable, Iterator, List, Optional, Set
 
 from .logging import logger
 
+# Directories that never contain vault content
+DEFAULT_IGNORED_DIRS = frozenset({".obsidian", ".trash", ".git"})
+
+# Files at least this large are decoded from a memory map instead of a copy
+MMAP_THRESHOLD = 1_048_576  # 1MB
+
 
 def ensure_dir(path: str | Path) -> Path:
     """
@@ -56,6 +65,128 @@ def list_files(
     return list(directory.glob(pattern))
 
 
+def is_ignored(
+    rel_path: str | Path,
+    ignored_dirs: Iterable[str] = DEFAULT_IGNORED_DIRS,
+    ignore_patterns: Iterable[str] = ()
+) -> bool:
+    """
+    Check whether a relative path is excluded by ignore rules.
+    
+    A path is ignored if any of its components is an ignored directory name,
+    or if a glob pattern matches its relative POSIX path, its name or any of
+    its parent directories.
+    
+    Args:
+        rel_path: Path relative to the walked root
+        ignored_dirs: Directory names to exclude
+        ignore_patterns: Glob patterns to exclude
+        
+    Returns:
+        True if the path should be skipped
+    """
+    parts = Path(rel_path).parts
+    if any(part in ignored_dirs for part in parts):
+        return True
+    patterns = [pattern.rstrip("/") for pattern in ignore_patterns]
+    for i in range(1, len(parts) + 1):
+        prefix = "/".join(parts[:i])
+        if any(
+            fnmatch.fnmatch(prefix, pattern) or fnmatch.fnmatch(parts[i - 1], pattern)
+            for pattern in patterns
+        ):
+            return True
+    return False
+
+
+def walk_files(
+    directory: str | Path,
+    suffixes: Optional[Iterable[str]] = None,
+    ignored_dirs: Iterable[str] = DEFAULT_IGNORED_DIRS,
+    ignore_patterns: Iterable[str] = (),
+    follow_symlinks: bool = True,
+    root: Optional[str | Path] = None
+) -> Iterator[os.DirEntry]:
+    """
+    Lazily walk a directory tree with ``os.scandir``.
+    
+    Ignored directories are pruned without being listed and files are
+    filtered by suffix on their name alone, so no file is opened or stat'ed
+    by the walk itself. The yielded ``DirEntry`` objects cache their
+    ``stat()`` result, so callers needing size and mtime pay for exactly one
+    stat per file. Every directory is visited at most once, which guards
+    against symlink loops.
+    
+    Args:
+        directory: Directory to walk
+        suffixes: Optional lowercase file suffixes to keep (e.g. ``{".md"}``)
+        ignored_dirs: Directory names to prune
+        ignore_patterns: Glob patterns matched against paths relative to ``root``
+        follow_symlinks: Whether to descend into symlinked directories
+        root: Directory that ignore patterns are relative to (defaults to ``directory``)
+        
+    Yields:
+        Directory entries of matching files
+        
+    Raises:
+        FileNotFoundError: If directory doesn't exist
+    """
+    directory = Path(directory)
+    if not directory.is_dir():
+        raise FileNotFoundError(f"Directory not found: {directory}")
+        
+    suffixes = tuple(suffix.lower() for suffix in suffixes) if suffixes is not None else None
+    ignored_dirs = frozenset(ignored_dirs)
+    ignore_patterns = [pattern.rstrip("/") for pattern in ignore_patterns]
+    root_str = os.fspath(root if root is not None else directory)
+    
+    def ignored(entry: os.DirEntry) -> bool:
+        if not ignore_patterns:
+            return False
+        rel_path = os.path.relpath(entry.path, root_str).replace(os.sep, "/")
+        return any(
+            fnmatch.fnmatch(rel_path, pattern) or fnmatch.fnmatch(entry.name, pattern)
+            for pattern in ignore_patterns
+        )
+    
+    start = directory.stat()
+    visited = {(start.st_dev, start.st_ino)}
+    stack = [os.fspath(directory)]
+    while stack:
+        try:
+            scanner = os.scandir(stack.pop())
+        except OSError as e:
+            logger.warning(f"Skipping unreadable directory: {e}")
+            continue
+            
+        subdirs = []
+        with scanner:
+            for entry in scanner:
+                try:
+                    if entry.is_dir(follow_symlinks=follow_symlinks):
+                        if entry.name in ignored_dirs or ignored(entry):
+                            continue
+                        stat = entry.stat(follow_symlinks=follow_symlinks)
+                        key = (stat.st_dev, stat.st_ino)
+                        if key in visited:
+                            logger.warning(f"Skipping already visited directory: {entry.path}")
+                            continue
+                        visited.add(key)
+                        subdirs.append(entry.path)
+                    elif entry.is_file(follow_symlinks=follow_symlinks):
+                        if suffixes is not None and not entry.name.lower().endswith(suffixes):
+                            continue
+                        if ignored(entry):
+                            continue
+                        yield entry
+                except OSError as e:
+                    # Broken symlinks and entries removed during the walk
+                    logger.debug(f"Skipping {entry.path}: {e}")
+                    
+        # Visit subdirectories in listing order
+        stack.extend(reversed(subdirs))
+
+
 def safe_remove(path: str | Path) -> None:
     """
     Safely remove a file or directory.
@@ -90,6 +221,9 @@ def is_text_file(path: str | Path, max_check_size: int = 8000) -> bool:
     """
     Check if a file appears to be a text file.
     
+    A file is considered binary if its first bytes contain a NUL byte or are
+    not valid UTF-8, so non-ASCII text such as CJK or emoji is accepted.
+    
     Args:
         path: File path to check
         max_check_size: Maximum number of bytes to check
@@ -100,9 +234,73 @@ def is_text_file(path: str | Path, max_check_size: int = 8000) -> bool:
     try:
         with open(path, "rb") as f:
             chunk = f.read(max_check_size)
-            return not bool(chunk.translate(None, bytes(range(32, 127)) + b"\n\r\t\f\b"))
     except Exception:
         return False
+    if b"\0" in chunk:
+        return False
+    try:
+        # The check may end inside a multi-byte character
+        codecs.getincrementaldecoder("utf-8")().decode(chunk, final=False)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def _decode_text(buffer: bytes | memoryview) -> Optional[str]:
+    """
+    Decode a UTF-8 buffer, rejecting binary content.
+    
+    Args:
+        buffer: Raw file content
+        
+    Returns:
+        Text with universal newlines, or None if the buffer is binary
+    """
+    try:
+        text = str(buffer, "utf-8-sig")
+    except UnicodeDecodeError:
+        return None
+    if "\0" in text:
+        return None
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def read_text_file(
+    path: str | Path,
+    mmap_threshold: int = MMAP_THRESHOLD
+) -> Optional[str]:
+    """
+    Read and decode a text file with a single open.
+    
+    Binary detection (NUL bytes and UTF-8 validity) runs on the same buffer
+    that is decoded. Files of at least ``mmap_threshold`` bytes are decoded
+    straight from a memory map, so that only the decoded text is held in
+    memory. Newlines are normalized as in text mode.
+    
+    Args:
+        path: File path to read
+        mmap_threshold: Minimum size in bytes for memory-mapped reads
+        
+    Returns:
+        File content, or None if the file is binary
+        
+    Raises:
+        OSError: If the file cannot be read
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < mmap_threshold or size == 0:
+            return _decode_text(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if mapped.find(b"\0") != -1:
+                return None
+            view = memoryview(mapped)
+            try:
+                return _decode_text(view)
+            finally:
+                view.release()
 
 
 def get_file_size(path: str | Path) -> int:
@@ -0,0 +1,77 @@
+"""
+Tests for the core search service.
+"""
+
+import asyncio
+import threading
+import types
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from obsidian_concierge.core.search import SearchService
+from obsidian_concierge.repository.chroma import ChromaRepository, Document
+from obsidian_concierge.repository.executor import RepositoryExecutor
+
+
+def test_convert_filters_tags_and_aliases():
+    """Test that tag and alias filters match list metadata."""
+    service = SearchService(Mock(spec=ChromaRepository))
+    
+    assert service._convert_filters({"tags": "#project"}) == {"tags": {"$contains": "project"}}
+    assert service._convert_filters({"tags": ["a", "b"], "status": "active"}) == {
+        "$and": [
+            {"$or": [{"tags": {"$contains": "a"}}, {"tags": {"$contains": "b"}}]},
+            {"status": "active"},
+        ]
+    }
+    assert service._convert_filters({"aliases": "Roadmap"}) == {
+        "aliases": {"$contains": "Roadmap"}
+    }
+
+
+@pytest.mark.asyncio
+async def test_search_uses_stored_excerpts():
+    """Test that search results use stored excerpts and only fetch missing content."""
+    repository = Mock(spec=ChromaRepository)
+    repository.aquery = AsyncMock(return_value=[
+        Document(id="a-0", content="", metadata={"parent_id": "a", "excerpt": "Stored", "path": "a.md"}),
+        Document(id="b", content="", metadata={"path": "b.md"}),
+    ])
+    repository.afetch_content = AsyncMock(return_value={"b": "x" * 300})
+    service = SearchService(repository)
+    
+    results = await service.search("query", limit=2)
+    
+    assert repository.aquery.call_args.kwargs["include_content"] is False
+    repository.afetch_content.assert_awaited_once_with(["b"])
+    assert [result.id for result in results] == ["a", "b"]
+    assert results[0].excerpt == "Stored"
+    assert results[1].excerpt == "x" * 200 + "..."
+
+
+@pytest.mark.asyncio
+async def test_slow_query_does_not_block_other_searches():
+    """Test that queries run on the repository executor, off the event loop."""
+    release = threading.Event()
+    
+    def query(query_text, n_results, where, include_content):
+        if query_text == "slow":
+            # Blocks a worker thread until the fast search has finished
+            assert release.wait(timeout=5)
+        return [Document(id=query_text, content="", metadata={"excerpt": query_text})]
+    
+    repository = Mock(spec=ChromaRepository)
+    repository.executor = RepositoryExecutor(max_workers=2)
+    repository.query = Mock(side_effect=query)
+    repository.aquery = types.MethodType(ChromaRepository.aquery, repository)
+    service = SearchService(repository)
+    
+    slow = asyncio.create_task(service.search("slow", limit=1))
+    fast = await asyncio.wait_for(service.search("fast", limit=1), timeout=2)
+    assert [result.id for result in fast] == ["fast"]
+    assert not slow.done()
+    
+    release.set()
+    assert [result.id for result in await slow] == ["slow"]
+    assert repository.executor.stats()["completed"] == 2
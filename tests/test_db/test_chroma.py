@@ -4,9 +4,35 @@ Tests for ChromaDB repository implementation.
 
 import pytest
 from typing import List
+from unittest.mock import patch
 import uuid
 
-from obsidian_concierge.db.chroma import ChromaRepository, Document
+from chromadb import EmbeddingFunction
+
+from obsidian_concierge.repository.chroma import (CONTENT_HASH_KEY, EXCERPT_LENGTH, ChromaRepository,
+                                                 Document, SearchQuery, make_excerpt)
+
+
+class FakeEmbeddingFunction(EmbeddingFunction):
+    """Deterministic embedding function that records embedded texts."""
+    
+    def __init__(self):
+        self.embedded: List[str] = []
+    
+    def __call__(self, input):
+        self.embedded.extend(input)
+        return [[float(len(text)), float(sum(map(ord, text)) % 97), 1.0] for text in input]
+    
+    @staticmethod
+    def name() -> str:
+        return "fake"
+    
+    def get_config(self):
+        return {}
+    
+    @staticmethod
+    def build_from_config(config):
+        return FakeEmbeddingFunction()
 
 
 @pytest.fixture
@@ -18,6 +44,22 @@ def chroma_repo():
     repo.client.delete_collection(repo.collection.name)
 
 
+@pytest.fixture
+def fake_embedder() -> FakeEmbeddingFunction:
+    """Fixture for a recording embedding function."""
+    return FakeEmbeddingFunction()
+
+
+@pytest.fixture
+def local_repo(tmp_path, fake_embedder):
+    """Fixture for a repository that does not need a downloaded model."""
+    return ChromaRepository(
+        collection_name="test_collection",
+        persist_directory=str(tmp_path / "chroma"),
+        embedding_function=fake_embedder
+    )
+
+
 @pytest.fixture
 def sample_documents() -> List[Document]:
     """Fixture for sample documents."""
@@ -119,4 +161,225 @@ def test_empty_operations(chroma_repo: ChromaRepository):
     chroma_repo.delete_documents([])
     
     results = chroma_repo.query("test")
-    assert len(results) == 0 
\ No newline at end of file
+    assert len(results) == 0
+
+
+def test_upsert_skips_unchanged_documents(
+    local_repo: ChromaRepository,
+    fake_embedder: FakeEmbeddingFunction,
+    sample_documents: List[Document]
+):
+    """Test that only new or changed content is sent to the embedder."""
+    assert local_repo.upsert_documents(sample_documents) == 3
+    assert len(fake_embedder.embedded) == 3
+    
+    # Re-running with identical documents embeds nothing
+    fake_embedder.embedded.clear()
+    assert local_repo.upsert_documents(sample_documents) == 0
+    assert fake_embedder.embedded == []
+    
+    # Only the changed document is re-embedded
+    changed = Document(id="doc2", content="FastAPI rewritten.", metadata={"type": "note"})
+    assert local_repo.upsert_documents(sample_documents[:1] + [changed]) == 1
+    assert fake_embedder.embedded == ["FastAPI rewritten."]
+    
+    stored = local_repo.collection.get(ids=["doc2"])
+    assert stored["documents"] == ["FastAPI rewritten."]
+    assert stored["metadatas"][0] == {"type": "note", CONTENT_HASH_KEY: stored["metadatas"][0][CONTENT_HASH_KEY]}
+
+
+def test_upsert_metadata_only_change(
+    local_repo: ChromaRepository,
+    fake_embedder: FakeEmbeddingFunction,
+    sample_documents: List[Document]
+):
+    """Test that metadata changes are applied without re-embedding."""
+    local_repo.upsert_documents(sample_documents)
+    before = local_repo.collection.get(ids=["doc1"], include=["embeddings"])["embeddings"][0]
+    fake_embedder.embedded.clear()
+    
+    relabeled = Document(id="doc1", content=sample_documents[0].content, metadata={"type": "draft"})
+    assert local_repo.upsert_documents([relabeled]) == 0
+    assert fake_embedder.embedded == []
+    
+    stored = local_repo.collection.get(ids=["doc1"], include=["metadatas", "documents", "embeddings"])
+    metadata = stored["metadatas"][0]
+    assert metadata["type"] == "draft"
+    # Keys missing from the new metadata are removed rather than merged,
+    # and the record is rewritten with its stored embedding
+    assert "tags" not in metadata
+    assert stored["documents"] == [sample_documents[0].content]
+    assert list(stored["embeddings"][0]) == list(before)
+
+
+def test_move_documents_reuses_embeddings(
+    local_repo: ChromaRepository,
+    fake_embedder: FakeEmbeddingFunction,
+    sample_documents: List[Document]
+):
+    """Test that moved documents keep their embeddings without re-embedding."""
+    local_repo.upsert_documents(sample_documents)
+    before = local_repo.collection.get(ids=["doc1"], include=["embeddings"])["embeddings"][0]
+    fake_embedder.embedded.clear()
+    
+    moved = Document(id="moved1", content=sample_documents[0].content, metadata={"path": "new.md"})
+    edited = Document(id="moved2", content="Edited while moving.", metadata={"path": "other.md"})
+    assert local_repo.move_documents([("doc1", moved), ("doc2", edited)]) == 1
+    assert fake_embedder.embedded == ["Edited while moving."]
+    
+    stored = local_repo.collection.get(ids=["moved1"], include=["embeddings", "metadatas"])
+    assert list(stored["embeddings"][0]) == list(before)
+    assert stored["metadatas"][0]["path"] == "new.md"
+    assert local_repo.collection.get(ids=["doc1", "doc2"])["ids"] == []
+
+
+def test_search_batch(
+    local_repo: ChromaRepository,
+    fake_embedder: FakeEmbeddingFunction,
+    sample_documents: List[Document]
+):
+    """Test that a batch search embeds once and queries once per filter."""
+    local_repo.upsert_documents(sample_documents)
+    fake_embedder.embedded.clear()
+    queries = [
+        SearchQuery(query="Python programming", limit=2),
+        SearchQuery(query="vector database", limit=1, filters={"type": "note"}),
+        SearchQuery(query="web framework", limit=3)
+    ]
+    
+    with patch.object(local_repo.collection, "query", wraps=local_repo.collection.query) as query:
+        results = local_repo.search_batch_sync(queries)
+    
+    assert fake_embedder.embedded == [q.query for q in queries]
+    assert query.call_count == 2
+    assert [len(hits) for hits in results] == [2, 1, 3]
+    for q, hits in zip(queries, results):
+        expected = local_repo.search_sync(q.query, limit=q.limit, filters=q.filters)
+        assert [hit["id"] for hit in hits] == [hit["id"] for hit in expected]
+    assert local_repo.search_batch_sync([]) == []
+
+
+def test_writes_bump_generation(local_repo: ChromaRepository, sample_documents: List[Document]):
+    """Test that every write advances the repository generation."""
+    assert local_repo.generation == 0
+    local_repo.upsert_documents(sample_documents)
+    after_upsert = local_repo.generation
+    assert after_upsert > 0
+    
+    # Nothing is written for unchanged documents
+    local_repo.upsert_documents(sample_documents)
+    assert local_repo.generation == after_upsert
+    
+    local_repo.delete_documents(["doc1"])
+    assert local_repo.generation == after_upsert + 1
+
+
+@pytest.fixture
+def chunked_documents() -> List[Document]:
+    """Fixture for notes split into chunks."""
+    documents = []
+    for note, texts in {
+        "note-a": ["Alpha one", "Alpha two"],
+        "note-b": ["Beta", "Beta two"],
+        "note-c": ["Gamma three"],
+    }.items():
+        for index, text in enumerate(texts):
+            documents.append(Document(
+                id=f"{note}#{index}",
+                content=text,
+                metadata={"parent_id": note, "chunk_index": index, "path": f"{note}.md"}
+            ))
+    return documents
+
+
+def test_find_similar_uses_stored_embeddings(
+    local_repo: ChromaRepository,
+    fake_embedder: FakeEmbeddingFunction,
+    chunked_documents: List[Document]
+):
+    """Test that related notes are found without re-embedding the source."""
+    local_repo.upsert_documents(chunked_documents)
+    fake_embedder.embedded.clear()
+    
+    similar = local_repo.find_similar_sync("note-a", limit=5)
+    assert fake_embedder.embedded == []
+    assert sorted(doc.metadata["parent_id"] for doc, _ in similar) == ["note-b", "note-c"]
+    
+    by_chunk = local_repo.find_similar_sync("note-b#1", limit=1)
+    assert len(by_chunk) == 1
+    assert by_chunk[0][0].metadata["parent_id"] != "note-b"
+    
+    with pytest.raises(ValueError):
+        local_repo.find_similar_sync("missing")
+
+
+def test_find_similar_many(local_repo: ChromaRepository, chunked_documents: List[Document]):
+    """Test batched related-note lookups."""
+    local_repo.upsert_documents(chunked_documents)
+    
+    similar = local_repo.find_similar_many_sync(["note-a", "note-c#0", "missing"], limit=2)
+    assert set(similar) == {"note-a", "note-c#0"}
+    for source, note in (("note-a", "note-a"), ("note-c#0", "note-c")):
+        assert len(similar[source]) == 2
+        assert note not in {doc.metadata["parent_id"] for doc, _ in similar[source]}
+
+
+def test_projected_search_and_fetch_content(
+    local_repo: ChromaRepository,
+    sample_documents: List[Document]
+):
+    """Test that projected queries skip content and fetch_content loads it."""
+    local_repo.upsert_documents(sample_documents)
+    
+    with patch.object(local_repo.collection, "query", wraps=local_repo.collection.query) as query:
+        hits = local_repo.search_sync("Python programming", limit=2, include_content=False)
+    assert query.call_args.kwargs["include"] == ["metadatas", "distances"]
+    assert len(hits) == 2
+    assert all(hit["text"] is None and hit["score"] is not None for hit in hits)
+    
+    documents = local_repo.query("Python programming", n_results=2, include_content=False)
+    assert [doc.id for doc in documents] == [hit["id"] for hit in hits]
+    assert all(doc.content == "" for doc in documents)
+    
+    contents = local_repo.fetch_content([doc.id for doc in documents] + ["missing"])
+    by_id = {doc.id: doc.content for doc in sample_documents}
+    assert contents == {doc.id: by_id[doc.id] for doc in documents}
+    assert local_repo.fetch_content([]) == {}
+    
+    assert local_repo.get_document("doc2").content == by_id["doc2"]
+    assert local_repo.get_document("missing") is None
+
+
+def test_make_excerpt():
+    """Test that excerpts are cut with an ellipsis."""
+    assert make_excerpt("short") == "short"
+    assert make_excerpt("x" * (EXCERPT_LENGTH + 1)) == "x" * EXCERPT_LENGTH + "..."
+
+
+class QueryAwareEmbeddingFunction(FakeEmbeddingFunction):
+    """Embedding function recording the queries embedded with ``embed_query``."""
+    
+    def __init__(self):
+        super().__init__()
+        self.queries: List[str] = []
+    
+    def embed_query(self, input):
+        self.queries.extend(input)
+        return self(input)
+
+
+def test_embed_queries_calls_embedding_function(tmp_path):
+    """Test that queries are embedded by the configured function, not the collection."""
+    embedder = QueryAwareEmbeddingFunction()
+    repo = ChromaRepository(
+        collection_name="test_collection",
+        persist_directory=str(tmp_path / "chroma"),
+        embedding_function=embedder
+    )
+    
+    with patch.object(type(repo.collection), "_embed", side_effect=AssertionError("private API")):
+        vectors = repo.embed_queries(["alpha", "beta"])
+    assert embedder.queries == ["alpha", "beta"]
+    assert [[float(value) for value in vector] for vector in vectors] == [
+        [float(value) for value in vector] for vector in embedder(["alpha", "beta"])
+    ]
@@ -0,0 +1,163 @@
+"""
+Tests for the persistent embedding cache.
+"""
+
+import sqlite3
+
+import numpy as np
+import pytest
+
+from obsidian_concierge.repository.chroma import ChromaRepository, Document
+from obsidian_concierge.repository.embedding_cache import (CachedEmbeddingFunction,
+                                                           EmbeddingCache, text_hash)
+
+from .test_chroma import FakeEmbeddingFunction, QueryAwareEmbeddingFunction
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Fixture for an unbounded embedding cache."""
+    cache = EmbeddingCache(tmp_path / "cache.sqlite")
+    yield cache
+    cache.close()
+
+
+def test_get_and_put(cache):
+    """Test storing and looking up vectors with hit/miss counters."""
+    assert cache.get_many("model", ["a", "b"]) == {}
+    cache.put_many("model", [("a", [1.0, 2.0]), ("b", np.array([3.0, 4.0]))])
+
+    found = cache.get_many("model", ["a", "b", "c"])
+    assert set(found) == {"a", "b"}
+    np.testing.assert_array_equal(found["a"], np.array([1.0, 2.0], dtype=np.float32))
+    assert cache.get_many("other-model", ["a"]) == {}
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] == 16
+    assert stats["hits"] == 2
+    assert stats["misses"] == 4
+
+
+def test_persistence(tmp_path):
+    """Test that cached vectors survive reopening the cache."""
+    cache = EmbeddingCache(tmp_path / "cache.sqlite")
+    cache.put_many("model", [("a", [1.0])])
+    cache.close()
+
+    reopened = EmbeddingCache(tmp_path / "cache.sqlite")
+    assert set(reopened.get_many("model", ["a"])) == {"a"}
+    reopened.close()
+
+
+def test_lru_eviction_by_entries(tmp_path):
+    """Test that the least recently used entries are evicted first."""
+    cache = EmbeddingCache(tmp_path / "cache.sqlite", max_entries=2)
+    cache.put_many("model", [("a", [1.0])])
+    cache.put_many("model", [("b", [2.0])])
+    cache.get_many("model", ["a"])  # "b" is now least recently used
+    cache.put_many("model", [("c", [3.0])])
+
+    assert set(cache.get_many("model", ["a", "b", "c"])) == {"a", "c"}
+    assert cache.stats()["evictions"] == 1
+    cache.close()
+
+
+def test_eviction_by_bytes(tmp_path):
+    """Test that the cache is bounded by stored vector bytes."""
+    cache = EmbeddingCache(tmp_path / "cache.sqlite", max_bytes=32)
+    for key in "abc":
+        cache.put_many("model", [(key, [0.0] * 4)])
+
+    assert cache.stats()["bytes"] <= 32
+    assert set(cache.get_many("model", ["a", "b", "c"])) == {"b", "c"}
+    cache.close()
+
+
+def test_counters_track_replacements(tmp_path):
+    """Test that the in-memory entry and byte counts follow stores and evictions."""
+    cache = EmbeddingCache(tmp_path / "cache.sqlite", max_entries=3)
+    cache.put_many("model", [("a", [1.0, 2.0]), ("a", [1.0, 2.0]), ("b", [3.0])])
+    cache.put_many("model", [("a", [5.0])])
+    assert (len(cache), cache.stats()["bytes"]) == (2, 8)
+    cache.put_many("model", [("c", [1.0]), ("d", [1.0])])
+    assert (len(cache), cache.stats()["bytes"]) == (3, 12)
+    cache.close()
+
+    reopened = EmbeddingCache(tmp_path / "cache.sqlite")
+    assert (len(reopened), reopened.stats()["bytes"]) == (3, 12)
+    reopened.close()
+
+
+def test_lookups_write_last_used_lazily(tmp_path):
+    """Test that lookups only write last-used times with the next store or on close."""
+    path = tmp_path / "cache.sqlite"
+    cache = EmbeddingCache(path)
+    cache.put_many("model", [("a", [1.0])])
+    reader = sqlite3.connect(path)
+    stored = reader.execute("SELECT last_used FROM embeddings").fetchone()[0]
+
+    cache.get_many("model", ["a"])
+    assert reader.execute("SELECT last_used FROM embeddings").fetchone()[0] == stored
+    cache.close()
+    assert reader.execute("SELECT last_used FROM embeddings").fetchone()[0] > stored
+    reader.close()
+
+
+def test_cached_embedding_function(cache):
+    """Test that only cache misses reach the wrapped embedding function."""
+    inner = FakeEmbeddingFunction()
+    embed = CachedEmbeddingFunction(inner, cache)
+    assert embed.name() == "fake"
+
+    first = embed(["alpha", "beta", "alpha"])
+    assert inner.embedded == ["alpha", "beta"]
+
+    inner.embedded.clear()
+    second = embed(["beta", "gamma"])
+    assert inner.embedded == ["gamma"]
+    np.testing.assert_array_equal(second[0], first[1])
+    assert set(cache.get_many(embed.model, [text_hash("gamma")])) == {text_hash("gamma")}
+
+
+def test_queries_reach_wrapped_embed_query(tmp_path, cache):
+    """Test that queries bypass the cache and use the wrapped query embedding."""
+    inner = QueryAwareEmbeddingFunction()
+    repo = ChromaRepository(
+        collection_name="test_collection",
+        persist_directory=str(tmp_path / "chroma"),
+        embedding_function=inner,
+        embedding_cache=cache
+    )
+
+    repo.embed_queries(["alpha"])
+    assert inner.queries == ["alpha"]
+    assert len(cache) == 0
+
+
+def test_collection_rebuild_hits_cache(tmp_path, cache):
+    """Test that rebuilding a collection from scratch is served from the cache."""
+    documents = [
+        Document(id=f"doc{i}", content=f"Note number {i}", metadata={"index": i})
+        for i in range(5)
+    ]
+    inner = FakeEmbeddingFunction()
+    repo = ChromaRepository(
+        collection_name="first",
+        persist_directory=str(tmp_path / "chroma"),
+        embedding_function=inner,
+        embedding_cache=cache
+    )
+    repo.upsert_documents(documents)
+    assert len(inner.embedded) == 5
+
+    inner.embedded.clear()
+    rebuilt = ChromaRepository(
+        collection_name="second",
+        persist_directory=str(tmp_path / "chroma"),
+        embedding_function=inner,
+        embedding_cache=cache
+    )
+    rebuilt.upsert_documents(documents)
+    assert inner.embedded == []
+    assert rebuilt.collection.count() == 5
@@ -0,0 +1,100 @@
+"""
+Tests for the repository thread pool.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from obsidian_concierge.repository.chroma import ChromaRepository, Document
+from obsidian_concierge.repository.executor import RepositoryExecutor
+
+from .test_chroma import FakeEmbeddingFunction
+
+
+@pytest.fixture
+def executor():
+    """Fixture for a two-thread executor."""
+    executor = RepositoryExecutor(max_workers=2)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_blocking_calls_do_not_block_event_loop(executor):
+    """Test that the event loop keeps running while calls block."""
+    ticks = 0
+    
+    async def ticker():
+        nonlocal ticks
+        for _ in range(5):
+            await asyncio.sleep(0.01)
+            ticks += 1
+    
+    await asyncio.gather(executor.run(time.sleep, 0.1), ticker())
+    assert ticks == 5
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_and_queue_metrics(executor):
+    """Test that at most max_workers calls run at once and waits are measured."""
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+    
+    def work():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return threading.current_thread().name
+    
+    names = await asyncio.gather(*(executor.run(work) for _ in range(6)))
+    assert peak == 2
+    assert all(name.startswith("chroma") for name in names)
+    
+    stats = executor.stats()
+    assert stats["submitted"] == stats["completed"] == 6
+    assert stats["running"] == stats["queued"] == 0
+    # The last calls waited for two earlier rounds
+    assert stats["queue_ms"]["max"] >= 80
+    assert stats["run_ms"]["p50"] >= 40
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate(executor):
+    """Test that exceptions reach the caller and are counted."""
+    def fail():
+        raise ValueError("boom")
+    
+    with pytest.raises(ValueError, match="boom"):
+        await executor.run(fail)
+    assert executor.stats()["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_repository_search_runs_on_executor(tmp_path, executor):
+    """Test that async repository queries run on the repository threads."""
+    repo = ChromaRepository(
+        collection_name="test_collection",
+        persist_directory=str(tmp_path / "chroma"),
+        embedding_function=FakeEmbeddingFunction(),
+        executor=executor
+    )
+    repo.upsert_documents([Document(id="a", content="alpha", metadata={"path": "a.md"})])
+    
+    results = await repo.search("alpha", limit=1)
+    assert [result["id"] for result in results] == ["a"]
+    assert await repo.count() == 1
+    assert executor.stats()["completed"] == 2
+
+
+def test_invalid_worker_count():
+    """Test that a pool needs at least one thread."""
+    with pytest.raises(ValueError):
+        RepositoryExecutor(max_workers=0)
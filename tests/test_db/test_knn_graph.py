@@ -0,0 +1,75 @@
+"""
+Tests for the precomputed related-notes graph.
+"""
+
+import numpy as np
+import pytest
+
+from obsidian_concierge.repository.knn_graph import KnnGraph
+
+
+def _brute_force(vectors: np.ndarray, k: int) -> np.ndarray:
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    similarity = normalized @ normalized.T
+    np.fill_diagonal(similarity, -np.inf)
+    return np.argsort(-similarity, axis=1)[:, :k]
+
+
+@pytest.fixture
+def vectors() -> np.ndarray:
+    """Fixture for random note vectors."""
+    return np.random.default_rng(0).normal(size=(200, 8)).astype(np.float32)
+
+
+def test_build_matches_brute_force(vectors):
+    """Test that blocked computation finds the exact top-k neighbours."""
+    ids = [f"note{i}" for i in range(len(vectors))]
+    graph = KnnGraph(k=5, block_size=32)
+    graph.build(ids, vectors)
+    
+    np.testing.assert_array_equal(graph.neighbors, _brute_force(vectors, 5))
+    related = graph.get("note0", limit=3)
+    assert len(related) == 3
+    assert [distance for _, distance in related] == sorted(distance for _, distance in related)
+
+
+def test_incremental_update_matches_rebuild(vectors):
+    """Test that updating changed, added and removed notes equals a full rebuild."""
+    rng = np.random.default_rng(1)
+    notes = {f"note{i}": vector for i, vector in enumerate(vectors)}
+    graph = KnnGraph(k=5, block_size=32)
+    graph.build(list(notes), vectors)
+    
+    upserts = {f"note{i}": rng.normal(size=8).astype(np.float32) for i in range(0, 40, 4)}
+    upserts.update({f"new{i}": rng.normal(size=8).astype(np.float32) for i in range(3)})
+    removals = [f"note{i}" for i in range(100, 110)]
+    recomputed = graph.update(upserts, removals)
+    
+    notes.update(upserts)
+    for note_id in removals:
+        del notes[note_id]
+    rebuilt = KnnGraph(k=5)
+    rebuilt.build(list(notes), np.array(list(notes.values())))
+    
+    assert len(graph) == len(rebuilt)
+    assert recomputed < len(graph)
+    for note_id in notes:
+        assert [n for n, _ in graph.get(note_id)] == [n for n, _ in rebuilt.get(note_id)]
+
+
+def test_small_graph_and_persistence(tmp_path):
+    """Test graphs with fewer notes than k and saving and loading."""
+    graph = KnnGraph(k=3)
+    graph.build(["a", "b"], np.eye(2), signatures=["sa", "sb"])
+    assert graph.get("a") == [("b", 1.0)]
+    
+    graph.update({"c": np.array([1.0, 1.0])}, signatures={"c": "sc"})
+    assert [note_id for note_id, _ in graph.get("a")] == ["c", "b"]
+    assert graph.get("missing") == []
+    
+    graph.save(tmp_path / "graph.npz")
+    loaded = KnnGraph.load(tmp_path / "graph.npz")
+    assert loaded.ids == graph.ids
+    assert loaded.signature("c") == "sc"
+    assert loaded.get("c") == graph.get("c")
+    assert KnnGraph.load(tmp_path / "missing.npz") is None
@@ -0,0 +1,158 @@
+"""
+Tests for the inverted index and its BM25 scoring.
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from obsidian_concierge.repository.chroma import Document
+from obsidian_concierge.repository.lexical_index import LexicalIndex
+from obsidian_concierge.repository.tokenizer import TOKENIZER_VERSION
+
+
+def _doc(doc_id: str, content: str) -> Document:
+    return Document(id=doc_id, content=content, metadata={"parent_id": doc_id.split("#")[0]})
+
+
+@pytest.fixture
+def index() -> LexicalIndex:
+    """Fixture for an index of three short notes."""
+    index = LexicalIndex()
+    index.add_documents([
+        _doc("a#0", "Kubernetes cluster upgrade notes"),
+        _doc("a#1", "Rolling back a failed upgrade"),
+        _doc("b#0", "Sourdough starter feeding schedule"),
+        _doc("c#0", "Cluster headache remedies"),
+    ])
+    return index
+
+
+def test_bm25_matches_reference(index: LexicalIndex):
+    """Test scores against a direct BM25 computation."""
+    hits = dict(index.search("cluster upgrade"))
+
+    lengths = {"a#0": 4, "a#1": 5, "b#0": 4, "c#0": 3}
+    average = sum(lengths.values()) / 4
+
+    def bm25(doc_id: str, terms: int) -> float:
+        norm = 1.2 * (1 - 0.75 + 0.75 * lengths[doc_id] / average)
+        return terms * math.log(1 + (4 - 2 + 0.5) / (2 + 0.5)) * 2.2 / (1 + norm)
+
+    assert set(hits) == {"a#0", "a#1", "c#0"}
+    assert hits["a#0"] == pytest.approx(bm25("a#0", 2), rel=1e-5)
+    assert hits["c#0"] == pytest.approx(bm25("c#0", 1), rel=1e-5)
+    assert index.search("cluster upgrade", limit=1) == [("a#0", pytest.approx(hits["a#0"]))]
+    assert index.search("unknown words") == []
+
+
+def test_replace_and_remove_notes(index: LexicalIndex):
+    """Test that replaced and removed notes stop matching."""
+    generation = index.generation
+    index.replace_notes([_doc("a#0", "Only a short note now")])
+    assert index.generation > generation
+    assert [doc_id for doc_id, _ in index.search("upgrade")] == []
+    assert [doc_id for doc_id, _ in index.search("short")] == ["a#0"]
+
+    index.remove_notes(["c"])
+    assert "c" not in index and "a" in index
+    assert index.search("cluster") == []
+    index.remove(["b#0"])
+    assert len(index) == 1
+
+
+def test_merge_keeps_results(index: LexicalIndex):
+    """Test that merging pending postings and dropping removed rows keeps scores."""
+    index.remove(["a#1"])
+    before = index.search("cluster upgrade sourdough")
+    index.merge()
+    assert index.stats()["pending_postings"] == 0
+    assert index.search("cluster upgrade sourdough") == before
+
+    index.add_documents([_doc("d#0", "cluster upgrade")])
+    assert index.search("upgrade")[0][0] == "d#0"
+
+
+def test_save_and_load(tmp_path, index: LexicalIndex):
+    """Test that a saved index answers queries like the original."""
+    path = tmp_path / "lexical.npz"
+    expected = index.search("cluster upgrade")
+    index.save(path)
+
+    loaded = LexicalIndex.load(path)
+    assert loaded.search("cluster upgrade") == expected
+    assert "a" in loaded
+    assert LexicalIndex.load(tmp_path / "missing.npz") is None
+
+    with np.load(path) as data:
+        arrays = dict(data)
+    np.savez(path, **{**arrays, "tokenizer_version": np.array(TOKENIZER_VERSION + 1)})
+    assert LexicalIndex.load(path) is None
+
+
+def test_save_writes_delta_until_merge(tmp_path, index: LexicalIndex):
+    """Test that saves after an update only write the changes since the segment."""
+    path = tmp_path / "lexical.npz"
+    delta_path = tmp_path / "lexical.npz.delta"
+    index.save(path)
+    segment = path.read_bytes()
+    assert not delta_path.exists()
+
+    index.replace_notes([_doc("a#0", "Cluster migration checklist")])
+    index.add_documents([_doc("d#0", "Sourdough discard crackers")])
+    index.save(path)
+    assert path.read_bytes() == segment
+    assert delta_path.exists()
+
+    loaded = LexicalIndex.load(path)
+    for query in ("cluster", "upgrade", "sourdough crackers", "migration"):
+        assert loaded.search(query) == index.search(query)
+    assert "a" in loaded and len(loaded) == len(index)
+
+    # A merge rewrites the segment and drops the delta
+    index.merge()
+    index.save(path)
+    assert path.read_bytes() != segment
+    assert not delta_path.exists()
+    assert LexicalIndex.load(path).search("migration") == index.search("migration")
+
+
+def test_incremental_updates_match_rebuild():
+    """Test that an index updated in many steps scores like one built at once."""
+    rng = np.random.default_rng(0)
+    words = [f"w{i}" for i in range(50)]
+    notes = {
+        f"n{i}": " ".join(rng.choice(words, size=int(rng.integers(3, 20))))
+        for i in range(200)
+    }
+    incremental = LexicalIndex(merge_threshold=100)
+    for note_id, content in notes.items():
+        incremental.add_documents([_doc(f"{note_id}#0", content)])
+    for i in range(0, 200, 3):
+        notes[f"n{i}"] = " ".join(rng.choice(words, size=5))
+        incremental.replace_notes([_doc(f"n{i}#0", notes[f"n{i}"])])
+    rebuilt = LexicalIndex()
+    rebuilt.add_documents([_doc(f"{note_id}#0", content) for note_id, content in notes.items()])
+
+    for query in ("w1 w2", "w7", "w10 w20 w30"):
+        expected = dict(rebuilt.search(query, limit=None))
+        found = dict(incremental.search(query, limit=None))
+        assert found.keys() == expected.keys()
+        for doc_id, score in found.items():
+            assert score == pytest.approx(expected[doc_id], rel=1e-5)
+
+
+def test_japanese_search():
+    """Test that Japanese notes match queries in any kana or width variant."""
+    index = LexicalIndex()
+    index.add_documents([
+        _doc("a#0", "東京タワーの夜景を見に行った"),
+        _doc("b#0", "京都の紅葉とＰｙｔｈｏｎの勉強会"),
+        _doc("c#0", "大阪でたこ焼きを食べた"),
+    ])
+
+    assert [doc_id for doc_id, _ in index.search("とうきょう東京")] == ["a#0"]
+    assert [doc_id for doc_id, _ in index.search("ﾀﾜｰ")] == ["a#0"]
+    assert [doc_id for doc_id, _ in index.search("python 勉強")] == ["b#0"]
+    assert [doc_id for doc_id, _ in index.search("タコ焼き")] == ["c#0"]
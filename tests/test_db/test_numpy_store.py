@@ -0,0 +1,267 @@
+"""
+Tests for the local NumPy vector store.
+"""
+
+from typing import List
+
+import numpy as np
+import pytest
+
+from obsidian_concierge.repository.chroma import Document, SearchQuery
+from obsidian_concierge.repository.numpy_store import LocalCollection, NumpyRepository, matches_where, quantize
+
+from .test_chroma import FakeEmbeddingFunction
+
+
+@pytest.fixture
+def numpy_repo(tmp_path) -> NumpyRepository:
+    """Fixture for a persistent numpy repository with a fake embedder."""
+    return NumpyRepository(
+        collection_name="test_collection",
+        persist_directory=str(tmp_path / "vectors"),
+        embedding_function=FakeEmbeddingFunction()
+    )
+
+
+@pytest.fixture
+def notes() -> List[Document]:
+    """Fixture for chunked notes."""
+    return [
+        Document(id="a#0", content="Alpha one", metadata={"parent_id": "a", "chunk_index": 0, "tags": ["x"]}),
+        Document(id="a#1", content="Alpha two", metadata={"parent_id": "a", "chunk_index": 1}),
+        Document(id="b#0", content="Beta", metadata={"parent_id": "b", "chunk_index": 0, "tags": ["y"]}),
+        Document(id="c#0", content="Gamma three", metadata={"parent_id": "c", "chunk_index": 0}),
+    ]
+
+
+def test_matches_where():
+    """Test evaluation of ChromaDB metadata filters."""
+    metadata = {"tags": ["a", "b"], "path": "notes/x.md", "size": 5, "parent_id": "p"}
+
+    assert matches_where(metadata, None)
+    assert matches_where(metadata, {"tags": {"$contains": "a"}})
+    assert matches_where(metadata, {"path": {"$contains": "notes/"}})
+    assert matches_where(metadata, {"$and": [{"size": {"$gte": 5}}, {"parent_id": "p"}]})
+    assert matches_where(metadata, {"$or": [{"size": {"$lt": 1}}, {"parent_id": {"$in": ["p", "q"]}}]})
+    assert not matches_where(metadata, {"parent_id": {"$ne": "p"}})
+    # Negated conditions match missing keys, as in ChromaDB
+    assert matches_where({}, {"parent_id": {"$ne": "p"}})
+    assert not matches_where({}, {"size": {"$gt": 1}})
+    with pytest.raises(ValueError):
+        matches_where(metadata, {"size": {"$regex": "x"}})
+
+
+def test_repository_surface(numpy_repo: NumpyRepository, notes: List[Document]):
+    """Test that the repository methods behave as with ChromaDB."""
+    assert numpy_repo.upsert_documents(notes) == 4
+    assert numpy_repo.upsert_documents(notes) == 0
+
+    hits = numpy_repo.search_sync("Alpha one", limit=2)
+    assert hits[0]["id"] == "a#0" and hits[0]["score"] == pytest.approx(0.0, abs=1e-3)
+    assert [hit["id"] for hit in numpy_repo.search_sync("Beta", limit=5, filters={"tags": {"$contains": "y"}})] == ["b#0"]
+
+    batch = numpy_repo.search_batch_sync([SearchQuery("Beta", 1), SearchQuery("Gamma three", 1)])
+    assert [hits[0]["id"] for hits in batch] == ["b#0", "c#0"]
+
+    similar = numpy_repo.find_similar_sync("a", limit=5)
+    assert {doc.metadata["parent_id"] for doc, _ in similar} == {"b", "c"}
+
+    numpy_repo.update_document(Document(id="b#0", content="Beta v2", metadata={"status": "done"}))
+    updated = numpy_repo.get_document("b#0")
+    assert updated.content == "Beta v2"
+    assert updated.metadata["status"] == "done" and updated.metadata["tags"] == ["y"]
+    numpy_repo.delete_documents(where={"parent_id": "a"})
+    assert numpy_repo.get_document("a#0") is None
+    assert numpy_repo.collection.count() == 2
+    assert set(numpy_repo.note_vectors()) == {"b", "c"}
+
+
+def test_metadata_merges_and_none_removes(tmp_path):
+    """Test ChromaDB's metadata merge semantics."""
+    collection = LocalCollection("c", embedding_function=FakeEmbeddingFunction())
+    collection.add(ids=["1"], documents=["one"], metadatas=[{"a": 1, "b": 2}])
+    collection.update(ids=["1"], metadatas=[{"b": None, "c": 3}])
+    collection.add(ids=["1"], documents=["ignored"], metadatas=[{"a": 9}])
+
+    stored = collection.get(ids=["1", "missing"])
+    assert stored["ids"] == ["1"]
+    assert stored["documents"] == ["one"]
+    assert stored["metadatas"] == [{"a": 1, "c": 3}]
+
+
+def test_persistence_and_row_reuse(tmp_path, notes: List[Document]):
+    """Test that a reopened store sees every committed write."""
+    path = tmp_path / "store"
+    collection = LocalCollection("c", path=path, embedding_function=FakeEmbeddingFunction())
+    collection.upsert(
+        ids=[doc.id for doc in notes],
+        documents=[doc.content for doc in notes],
+        metadatas=[doc.metadata for doc in notes]
+    )
+    collection.delete(ids=["a#1"])
+    collection.upsert(ids=["d#0"], embeddings=[[1.0, 2.0, 3.0]], documents=["Delta"], metadatas=[{"k": 1}])
+
+    reopened = LocalCollection("c", path=path)
+    assert reopened.count() == 4
+    stored = reopened.get(ids=["d#0", "a#1"], include=["embeddings", "documents"])
+    assert stored["ids"] == ["d#0"]
+    assert stored["documents"] == ["Delta"]
+    assert stored["embeddings"][0].tolist() == [1.0, 2.0, 3.0]
+    # The deleted record's row was reused
+    assert len(reopened._ids) == 4
+
+    paged = [reopened.get(limit=3, offset=offset)["ids"] for offset in (0, 3)]
+    assert sorted(paged[0] + paged[1]) == ["a#0", "b#0", "c#0", "d#0"]
+
+
+@pytest.mark.parametrize("space", ["l2", "cosine", "ip"])
+def test_query_matches_brute_force(space: str):
+    """Test that blocked exact search returns the true nearest neighbours."""
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(500, 16)).astype(np.float32)
+    queries = rng.normal(size=(3, 16)).astype(np.float32)
+    collection = LocalCollection("c", space=space, block_size=64)
+    collection.add(ids=[str(i) for i in range(500)], embeddings=vectors, documents=[""] * 500)
+
+    results = collection.query(query_embeddings=queries, n_results=10)
+
+    for query, ids, distances in zip(queries, results["ids"], results["distances"]):
+        if space == "l2":
+            expected = ((vectors - query) ** 2).sum(axis=1)
+        elif space == "ip":
+            expected = 1.0 - vectors @ query
+        else:
+            expected = 1.0 - (vectors @ query) / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+        assert [int(i) for i in ids] == np.argsort(expected)[:10].tolist()
+        assert distances == pytest.approx(np.sort(expected)[:10].tolist(), rel=1e-4, abs=1e-4)
+
+
+def test_ivf_recall():
+    """Test that IVF search finds most true neighbours on clustered data."""
+    rng = np.random.default_rng(2)
+    centers = rng.normal(size=(8, 16)) * 5
+    vectors = (centers[rng.integers(0, 8, size=2000)] + rng.normal(size=(2000, 16))).astype(np.float32)
+    exact = LocalCollection("exact")
+    ivf = LocalCollection("ivf", ivf_lists=16, ivf_probes=4)
+    for collection in (exact, ivf):
+        collection.add(ids=[str(i) for i in range(2000)], embeddings=vectors, documents=[""] * 2000)
+    queries = vectors[:20] + rng.normal(size=(20, 16)).astype(np.float32) * 0.1
+
+    truth = exact.query(query_embeddings=queries, n_results=10)["ids"]
+    approx = ivf.query(query_embeddings=queries, n_results=10)["ids"]
+
+    assert ivf._centroids is not None
+    recall = np.mean([len(set(a) & set(t)) / 10 for a, t in zip(approx, truth)])
+    assert recall >= 0.9
+
+    # Writes after training are assigned to clusters
+    ivf.upsert(ids=["new"], embeddings=[vectors[0]], documents=[""])
+    assert "new" in ivf.query(query_embeddings=vectors[:1], n_results=2)["ids"][0]
+
+
+def test_quantize_round_trip():
+    """Test that quantized vectors approximate the originals."""
+    vectors = np.random.default_rng(3).normal(size=(50, 32)).astype(np.float32)
+
+    half, no_scales = quantize(vectors, "float16")
+    assert half.dtype == np.float16 and no_scales is None
+    codes, scales = quantize(vectors, "int8")
+    assert codes.dtype == np.int8 and np.abs(codes).max() == 127
+    assert np.abs(codes * scales[:, None] - vectors).max() <= scales.max() / 2 + 1e-6
+
+
+@pytest.mark.parametrize("quantization", ["float16", "int8"])
+def test_quantized_query_rescores_exactly(quantization: str):
+    """Test that quantized queries return exact distances and high recall."""
+    rng = np.random.default_rng(4)
+    vectors = rng.normal(size=(1000, 32)).astype(np.float32)
+    queries = rng.normal(size=(10, 32)).astype(np.float32)
+    exact = LocalCollection("exact", block_size=128)
+    quantized = LocalCollection("quantized", block_size=128, quantization=quantization)
+    for collection in (exact, quantized):
+        collection.add(ids=[str(i) for i in range(900)], embeddings=vectors[:900], documents=[""] * 900)
+    # Vectors written after the first query are quantized on write
+    quantized.query(query_embeddings=queries, n_results=10)
+    for collection in (exact, quantized):
+        collection.upsert(ids=[str(i) for i in range(900, 1000)], embeddings=vectors[900:], documents=[""] * 100)
+    truth = exact.query(query_embeddings=queries, n_results=10)
+    approx = quantized.query(query_embeddings=queries, n_results=10)
+
+    recall = np.mean([len(set(a) & set(t)) / 10 for a, t in zip(approx["ids"], truth["ids"])])
+    assert recall >= 0.95
+    by_id = [dict(zip(ids, distances)) for ids, distances in zip(truth["ids"], truth["distances"])]
+    for ids, distances, expected in zip(approx["ids"], approx["distances"], by_id):
+        for doc_id, distance in zip(ids, distances):
+            if doc_id in expected:
+                assert distance == pytest.approx(expected[doc_id], rel=1e-5)
+    assert quantized.memory_usage()["vectors"] < exact.memory_usage()["vectors"] / (1.9 if quantization == "float16" else 3.0)
+
+
+def test_indexed_filters_match_brute_force(tmp_path):
+    """Test that filters answered from the inverted index match matches_where."""
+    rng = np.random.default_rng(5)
+    path = tmp_path / "store"
+    collection = LocalCollection("c", path=path)
+    metadatas = [
+        {
+            "parent_id": f"n{i % 7}",
+            "path": f"{['inbox', 'projects', 'archive'][i % 3]}/n{i % 7}.md",
+            "tags": [f"t{j}" for j in rng.choice(4, size=rng.integers(0, 3), replace=False)],
+            "chunk_index": i % 3
+        }
+        for i in range(60)
+    ]
+    for metadata in metadatas[::5]:
+        # Plain string tags as well as lists
+        metadata["tags"] = "t1 t2"
+    collection.add(ids=[str(i) for i in range(60)], embeddings=rng.normal(size=(60, 4)), metadatas=metadatas)
+    collection.delete(where={"parent_id": "n3"})
+    collection.update(ids=["1", "2"], metadatas=[{"tags": ["t9"]}, {"parent_id": "n0"}])
+
+    filters = [
+        {"parent_id": "n1"},
+        {"parent_id": {"$in": ["n0", "n2"]}},
+        {"tags": {"$contains": "t1"}},
+        {"tags": {"$contains": "t9"}},
+        {"path": {"$contains": "projects/"}},
+        {"$or": [{"tags": {"$contains": "t0"}}, {"parent_id": {"$eq": "n4"}}]},
+        {"$and": [{"parent_id": {"$in": ["n0", "n1"]}}, {"chunk_index": {"$gte": 1}}]},
+        {"parent_id": {"$ne": "n1"}, "tags": {"$contains": "t2"}},
+        {"tags": {"$eq": ["t9"]}},
+    ]
+    for store in (collection, LocalCollection("c", path=path)):
+        stored = store.get(include=["metadatas"])
+        for where in filters:
+            expected = {
+                doc_id for doc_id, metadata in zip(stored["ids"], stored["metadatas"])
+                if matches_where(metadata, where)
+            }
+            assert set(store.get(where=where)["ids"]) == expected, where
+            hits = store.query(query_embeddings=[[0.0, 0.0, 0.0, 1.0]], n_results=60, where=where)
+            assert set(hits["ids"][0]) == expected, where
+
+
+def test_query_drops_rows_reused_while_scoring(monkeypatch):
+    """Test that a row reused by another record during scoring is not returned."""
+    collection = LocalCollection("c")
+    collection.add(
+        ids=["a", "b"],
+        embeddings=[[1.0, 0.0], [0.0, 1.0]],
+        documents=["A", "B"],
+        metadatas=[{"name": "a"}, {"name": "b"}]
+    )
+    top_k = collection._top_k
+
+    def racing_top_k(*args):
+        found = top_k(*args)
+        # Another thread deletes a scored record and a new one takes its row
+        collection.delete(ids=["a"])
+        collection.add(ids=["c"], embeddings=[[0.5, 0.5]], documents=["C"], metadatas=[{"name": "c"}])
+        return found
+
+    monkeypatch.setattr(collection, "_top_k", racing_top_k)
+    result = collection.query(query_embeddings=[[1.0, 0.0]], n_results=2)
+    assert result["ids"] == [["b"]]
+    assert result["documents"] == [["B"]]
+    assert result["metadatas"] == [[{"name": "b"}]]
+    assert collection.get(ids=["c"])["metadatas"] == [{"name": "c"}]
@@ -0,0 +1,72 @@
+"""
+Tests for the in-memory query embedding cache.
+"""
+
+from unittest.mock import patch
+
+import numpy as np
+
+from obsidian_concierge.repository.chroma import ChromaRepository, Document
+from obsidian_concierge.repository.query_cache import QueryEmbeddingCache, normalize_query
+
+from .test_chroma import FakeEmbeddingFunction
+
+
+def test_normalize_query():
+    """Test that whitespace and compatibility forms are normalized."""
+    assert normalize_query("  Project\t plans \n") == "Project plans"
+    assert normalize_query("ＡＢＣ") == "ABC"
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    """Test that least recently used entries are evicted first."""
+    cache = QueryEmbeddingCache(max_entries=2)
+    cache.put("model", "a", [1.0])
+    cache.put("model", "b", [2.0])
+    assert cache.get("model", "a") is not None  # "b" is now least recently used
+    cache.put("model", "c", [3.0])
+    assert cache.get("model", "b") is None
+    assert len(cache) == 2
+    
+    sized = QueryEmbeddingCache(max_entries=10, max_bytes=32)
+    for key in "abc":
+        sized.put("model", key, [0.0] * 4)
+    assert sized.stats()["bytes"] == 32
+    assert sized.get("model", "a") is None
+    assert sized.stats()["evictions"] == 1
+
+
+def test_ttl_expiry():
+    """Test that entries expire after the time to live."""
+    cache = QueryEmbeddingCache(ttl=10)
+    with patch("obsidian_concierge.repository.query_cache.time.monotonic", return_value=100.0):
+        cache.put("model", "a", [1.0])
+    with patch("obsidian_concierge.repository.query_cache.time.monotonic", return_value=105.0):
+        np.testing.assert_array_equal(cache.get("model", "a"), np.array([1.0], dtype=np.float32))
+    with patch("obsidian_concierge.repository.query_cache.time.monotonic", return_value=111.0):
+        assert cache.get("model", "a") is None
+    
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["entries"] == 0
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_repository_search_skips_embedding_on_hit(tmp_path):
+    """Test that repeated searches are served from the query cache."""
+    embedder = FakeEmbeddingFunction()
+    cache = QueryEmbeddingCache()
+    repo = ChromaRepository(
+        collection_name="test_collection",
+        persist_directory=str(tmp_path / "chroma"),
+        embedding_function=embedder,
+        query_cache=cache
+    )
+    repo.upsert_documents([Document(id="a", content="alpha beta", metadata={"path": "a.md"})])
+    embedder.embedded.clear()
+    
+    first = repo.search_sync("alpha  beta", limit=1)
+    second = repo.search_sync(" alpha beta", limit=1)
+    assert embedder.embedded == ["alpha beta"]
+    assert [hit["id"] for hit in first] == [hit["id"] for hit in second] == ["a"]
+    assert cache.stats()["hit_rate"] == 0.5
@@ -0,0 +1,28 @@
+"""
+Tests for the mixed Japanese and Latin tokenizer.
+"""
+
+from obsidian_concierge.repository.tokenizer import normalize, tokenize
+
+
+def test_normalize():
+    """Test width, kana and case folding."""
+    assert normalize("Ｐｙｔｈｏｎ３") == "python3"
+    assert normalize("ｶﾀｶﾅ") == normalize("カタカナ") == "かたかな"
+    assert normalize("ﾃﾞｰﾀ") == "でーた"
+
+
+def test_latin_words():
+    """Test that non-CJK text is split into word tokens."""
+    assert tokenize("Hello, World! foo_bar 42") == ["hello", "world", "foo_bar", "42"]
+    assert tokenize("Ｃａｆé crème") == ["café", "crème"]
+
+
+def test_cjk_bigrams():
+    """Test that CJK runs are indexed as overlapping bi-grams."""
+    assert tokenize("東京タワー") == ["東京", "京た", "たわ", "わー"]
+    assert tokenize("日本語とEnglishの混在") == ["日本", "本語", "語と", "english", "の混", "混在"]
+    # Punctuation ends a run; a single character is kept as a unigram
+    assert tokenize("猫。犬、鳥") == ["猫", "犬", "鳥"]
+    assert tokenize("今日々") == ["今日", "日々"]
+    assert tokenize("한국어") == ["한국", "국어"]
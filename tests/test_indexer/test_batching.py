@@ -0,0 +1,82 @@
+"""
+Tests for adaptive write batching.
+"""
+
+import pytest
+
+from obsidian_concierge.repository.chroma import Document
+from obsidian_concierge.indexer.batching import AdaptiveBatchSizer, estimate_tokens
+
+
+def _doc(size: int) -> Document:
+    return Document(id=f"doc-{size}", content="x" * size, metadata={})
+
+
+def test_is_full_by_bytes_and_count():
+    """Test that a batch is full at the byte budget or the count limit."""
+    sizer = AdaptiveBatchSizer(initial_bytes=100, min_bytes=10, max_bytes=1000, max_count=5)
+    assert not sizer.is_full(1, 50)
+    assert sizer.is_full(1, 100)
+    assert sizer.is_full(5, 1)
+
+
+def test_split_respects_hard_limits():
+    """Test that requests never exceed the byte, token or count limits."""
+    sizer = AdaptiveBatchSizer(
+        initial_bytes=100, min_bytes=10, max_bytes=100, max_count=3, max_tokens=20
+    )
+    docs = [_doc(40), _doc(40), _doc(30), _doc(200), _doc(1), _doc(1), _doc(1), _doc(1)]
+    parts = list(sizer.split(docs))
+
+    assert [len(part) for part in parts] == [2, 1, 1, 3, 1]
+    # An oversized document is sent on its own
+    assert parts[2][0].content == "x" * 200
+    for part in parts:
+        if len(part) > 1:
+            nbytes = sum(len(doc.content) for doc in part)
+            assert nbytes <= 100 and estimate_tokens(nbytes) <= 20
+
+
+def test_budget_climbs_to_throughput_optimum():
+    """Test that the budget converges on the size with the best throughput."""
+    sizer = AdaptiveBatchSizer(initial_bytes=1_000, min_bytes=100, max_bytes=1_000_000)
+
+    def latency(nbytes: int) -> float:
+        # Fixed overhead per request and a slowdown past 64 KB
+        return 0.05 + nbytes / 1e6 + max(nbytes - 65_536, 0) ** 2 / 1e10
+
+    budgets = []
+    for _ in range(60):
+        nbytes = sizer.budget_bytes
+        sizer.observe(nbytes, latency(nbytes))
+        budgets.append(sizer.budget_bytes)
+
+    settled = budgets[-10:]
+    assert all(30_000 < budget < 200_000 for budget in settled)
+
+
+def test_slow_batches_shrink_budget():
+    """Test that batches over the latency limit shrink the budget."""
+    sizer = AdaptiveBatchSizer(
+        initial_bytes=10_000, min_bytes=1_000, max_bytes=100_000, max_latency=1.0
+    )
+    sizer.observe(10_000, 5.0)
+    assert sizer.budget_bytes < 10_000
+    for _ in range(20):
+        sizer.observe(sizer.budget_bytes, 5.0)
+    assert sizer.budget_bytes == 1_000
+
+
+def test_small_batches_are_ignored():
+    """Test that batches cut short by the count limit do not move the budget."""
+    sizer = AdaptiveBatchSizer(initial_bytes=10_000, min_bytes=1_000, max_bytes=100_000)
+    sizer.observe(100, 0.001)
+    assert sizer.budget_bytes == 10_000
+
+
+def test_invalid_limits():
+    """Test that inconsistent limits are rejected."""
+    with pytest.raises(ValueError):
+        AdaptiveBatchSizer(min_bytes=100, max_bytes=10)
+    with pytest.raises(ValueError):
+        AdaptiveBatchSizer(max_count=0)
@@ -0,0 +1,67 @@
+"""
+Tests for index job checkpoints.
+"""
+
+from obsidian_concierge.indexer.checkpoint import IndexCheckpoint
+from obsidian_concierge.indexer.manifest import ManifestEntry, hash_content
+
+
+def _entry(path: str) -> ManifestEntry:
+    return ManifestEntry(
+        path=path,
+        size=10,
+        mtime_ns=123,
+        content_hash=hash_content(path),
+        document_id=f"id-{path}"
+    )
+
+
+def test_checkpoint_roundtrip(tmp_path):
+    """Test recording and loading committed batches."""
+    checkpoint = IndexCheckpoint(tmp_path / "nested" / "checkpoint.jsonl")
+    assert checkpoint.load() is None
+    
+    checkpoint.start(incremental=True)
+    checkpoint.commit([_entry("a.md"), _entry("b.md")])
+    checkpoint.commit([_entry("c.md")])
+    checkpoint.commit([])
+    
+    state = IndexCheckpoint(checkpoint.checkpoint_path).load()
+    assert state.incremental
+    assert state.batches == 2
+    assert set(state.committed) == {"a.md", "b.md", "c.md"}
+    assert state.committed["a.md"] == _entry("a.md")
+    assert state.last_batch == ["c.md"]
+    
+    checkpoint.complete()
+    assert not checkpoint.exists()
+    assert checkpoint.load() is None
+
+
+def test_checkpoint_truncated_record(tmp_path):
+    """Test that a partially written last record is ignored."""
+    checkpoint = IndexCheckpoint(tmp_path / "checkpoint.jsonl")
+    checkpoint.start(incremental=False)
+    checkpoint.commit([_entry("a.md")])
+    with open(checkpoint.checkpoint_path, "a", encoding="utf-8") as f:
+        f.write('{"type": "batch", "batch": 2, "files": [{"pa')
+    
+    state = checkpoint.load()
+    assert not state.incremental
+    assert state.batches == 1
+    assert set(state.committed) == {"a.md"}
+
+
+def test_checkpoint_resume_appends(tmp_path):
+    """Test that resuming continues the batch numbering of the log."""
+    checkpoint = IndexCheckpoint(tmp_path / "checkpoint.jsonl")
+    checkpoint.start(incremental=False)
+    checkpoint.commit([_entry("a.md")])
+    
+    resumed = IndexCheckpoint(checkpoint.checkpoint_path)
+    resumed.start(incremental=False, resume_from=resumed.load())
+    resumed.commit([_entry("b.md")])
+    
+    state = resumed.load()
+    assert state.batches == 2
+    assert set(state.committed) == {"a.md", "b.md"}
@@ -0,0 +1,101 @@
+"""
+Tests for the heading-aware markdown chunker.
+"""
+
+import pytest
+
+from obsidian_concierge.indexer.chunker import MarkdownChunker, chunk_id
+from obsidian_concierge.repository.chroma import collapse_chunks
+
+
+def test_short_note_is_single_chunk():
+    """Test that a note within budget is returned unchanged."""
+    text = "# Title\nShort body.\n## Sub\nMore."
+    chunks = MarkdownChunker(max_chars=1000).split(text)
+    
+    assert len(chunks) == 1
+    assert chunks[0].content == text
+    assert chunks[0].heading_path == ["Title"]
+
+
+def test_empty_note_has_no_chunks():
+    """Test that blank notes produce no chunks."""
+    assert MarkdownChunker().split("  \n\n") == []
+
+
+def test_split_on_headings_with_paths():
+    """Test splitting on headings and tracking the heading path."""
+    text = (
+        "Preamble text.\n"
+        "# Top\n"
+        "Top body text.\n"
+        "## Child\n"
+        "### Grandchild\n"
+        "Grandchild body.\n"
+        "## Sibling\n"
+        "Sibling body.\n"
+    )
+    chunks = MarkdownChunker(max_chars=45, overlap=5).split(text)
+    
+    # The preamble and the small "Top" section are packed together
+    assert [c.heading_path for c in chunks] == [
+        [], ["Top", "Child", "Grandchild"], ["Top", "Sibling"]
+    ]
+    # The empty "Child" heading stays with its first subsection
+    assert chunks[1].content == "## Child\n### Grandchild\nGrandchild body.\n"
+    assert "".join(c.content for c in chunks) == text
+    assert [c.ordinal for c in chunks] == [0, 1, 2]
+
+
+def test_headings_in_code_fences_are_ignored():
+    """Test that '#' lines inside fenced code do not start sections."""
+    text = "# Real\n```bash\n# not a heading\necho hi\n```\n" + "x" * 40
+    chunks = MarkdownChunker(max_chars=60, overlap=0).split(text)
+    
+    assert all(c.heading_path == ["Real"] for c in chunks)
+
+
+def test_oversized_section_is_windowed_with_overlap():
+    """Test splitting a long section on the character budget."""
+    words = " ".join(f"word{i}" for i in range(200))
+    chunks = MarkdownChunker(max_chars=100, overlap=20).split("# Big\n" + words)
+    
+    assert len(chunks) > 1
+    assert all(len(c.content) <= 100 for c in chunks)
+    # Consecutive windows share text and end on word boundaries
+    for left, right in zip(chunks, chunks[1:]):
+        assert left.content[-10:].strip() in right.content
+        assert left.content.endswith(" ")
+
+
+def test_small_sections_are_packed():
+    """Test that consecutive small sections share a chunk up to the budget."""
+    text = "".join(f"## S{i}\nbody {i}\n" for i in range(10))
+    chunks = MarkdownChunker(max_chars=50, overlap=0).split(text)
+    
+    assert len(chunks) < 10
+    assert chunks[0].heading_path == ["S0"]
+    assert "".join(c.content for c in chunks) == text
+
+
+def test_invalid_settings():
+    """Test chunker argument validation."""
+    with pytest.raises(ValueError):
+        MarkdownChunker(max_chars=0)
+    with pytest.raises(ValueError):
+        MarkdownChunker(max_chars=100, overlap=100)
+
+
+def test_chunk_id_and_collapse():
+    """Test chunk IDs and collapsing chunk hits back to notes."""
+    assert chunk_id("abc", 2) == "abc-2"
+    
+    hits = [
+        {"id": "a-1", "metadata": {"parent_id": "a"}},
+        {"id": "b-0", "metadata": {"parent_id": "b"}},
+        {"id": "a-0", "metadata": {"parent_id": "a"}},
+        {"id": "c", "metadata": {"path": "c.md"}},
+    ]
+    collapsed = collapse_chunks(hits, lambda h: h["metadata"])
+    assert [h["id"] for h in collapsed] == ["a-1", "b-0", "c"]
+    assert len(collapse_chunks(hits, lambda h: h["metadata"], limit=2)) == 2
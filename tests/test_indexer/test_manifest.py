@@ -0,0 +1,64 @@
+"""
+Tests for the vault file manifest.
+"""
+
+import os
+
+from obsidian_concierge.indexer.manifest import FileManifest, ManifestEntry, hash_content
+
+
+def _entry(path: str = "note.md") -> ManifestEntry:
+    return ManifestEntry(
+        path=path,
+        size=10,
+        mtime_ns=123,
+        content_hash=hash_content("content"),
+        document_id="doc-id"
+    )
+
+
+def test_manifest_roundtrip(tmp_path):
+    """Test saving and loading manifest entries."""
+    manifest_path = tmp_path / "nested" / "manifest.json"
+    manifest = FileManifest(manifest_path)
+    manifest.set(_entry("a.md"))
+    manifest.set(_entry("b/c.md"))
+    manifest.save()
+    
+    loaded = FileManifest(manifest_path)
+    loaded.load()
+    assert len(loaded) == 2
+    assert loaded.get("b/c.md") == _entry("b/c.md")
+    
+    loaded.remove("a.md")
+    assert "a.md" not in loaded
+
+
+def test_manifest_missing_or_corrupt(tmp_path):
+    """Test that missing or corrupt manifests load empty."""
+    manifest_path = tmp_path / "manifest.json"
+    manifest = FileManifest(manifest_path)
+    manifest.load()
+    assert len(manifest) == 0
+    
+    manifest_path.write_text("{not json")
+    manifest.load()
+    assert len(manifest) == 0
+
+
+def test_matches_stat(tmp_path):
+    """Test stat comparison against a recorded entry."""
+    file_path = tmp_path / "note.md"
+    file_path.write_text("content")
+    stat = os.stat(file_path)
+    entry = ManifestEntry(
+        path="note.md",
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        content_hash=hash_content("content"),
+        document_id="doc-id"
+    )
+    assert entry.matches_stat(stat)
+    
+    file_path.write_text("changed content")
+    assert not entry.matches_stat(os.stat(file_path))
@@ -0,0 +1,86 @@
+"""
+Tests for the Obsidian note parser.
+"""
+
+from obsidian_concierge.indexer.parser import WikiLink, parse_note
+
+NOTE = """---
+title: Project Plan
+tags: [project, "#active"]
+aliases: Plan, Roadmap
+status: draft
+due: 2023-03-15
+owner: {name: someone}
+---
+# Plan
+Work on #backend/api and #design, see [[Architecture#Storage|storage notes]].
+Related: [[Meeting Notes]] and ![[diagram.png]].
+%% private comment with #secret %%
+Issue #123 is not a tag, nor is http://example.com/#anchor.
+`#inline-code` stays.
+```python
+# comment, not a heading #nottag [[notalink]]
+```
+"""
+
+
+def test_frontmatter_is_stripped_and_parsed():
+    """Test frontmatter extraction."""
+    note = parse_note(NOTE)
+    
+    assert not note.body.startswith("---")
+    assert note.body.startswith("# Plan\n")
+    assert note.frontmatter["title"] == "Project Plan"
+    assert note.aliases == ["Plan", "Roadmap"]
+
+
+def test_tags_from_frontmatter_and_body():
+    """Test tag extraction outside of code, comments and URLs."""
+    note = parse_note(NOTE)
+    
+    assert note.tags == ["project", "active", "backend/api", "design"]
+
+
+def test_links_and_embeds():
+    """Test wikilink and embed extraction and body rewriting."""
+    note = parse_note(NOTE)
+    
+    assert note.links == [
+        WikiLink(target="Architecture", alias="storage notes", heading="Storage"),
+        WikiLink(target="Meeting Notes"),
+    ]
+    assert note.embeds == ["diagram.png"]
+    assert "see storage notes." in note.body
+    assert "Related: Meeting Notes and ." in note.body
+    assert "private comment" not in note.body
+    assert "# comment, not a heading #nottag [[notalink]]" in note.body
+
+
+def test_metadata():
+    """Test conversion of the parsed note to repository metadata."""
+    metadata = parse_note(NOTE).metadata()
+    
+    assert metadata["status"] == "draft"
+    assert metadata["due"] == "2023-03-15"
+    assert "owner" not in metadata
+    assert metadata["tags"] == ["project", "active", "backend/api", "design"]
+    assert metadata["links"] == ["Architecture", "Meeting Notes"]
+    assert "title" in metadata
+
+
+def test_plain_note_is_unchanged():
+    """Test that notes without Obsidian syntax pass through untouched."""
+    text = "# Title\nJust text.\n"
+    note = parse_note(text)
+    
+    assert note.body == text
+    assert note.metadata() == {}
+
+
+def test_invalid_frontmatter():
+    """Test that broken YAML does not prevent parsing the body."""
+    note = parse_note("---\nkey: [unclosed\n---\nBody #tag\n")
+    
+    assert note.frontmatter == {}
+    assert note.body == "Body #tag\n"
+    assert note.tags == ["tag"]
@@ -0,0 +1,59 @@
+"""
+Tests for the staged indexing pipeline.
+"""
+
+import pytest
+
+from obsidian_concierge.indexer.pipeline import IndexPipeline
+
+
+def test_pipeline_processes_all_items():
+    """Test that every non-None result reaches the consumer."""
+    pipeline = IndexPipeline(workers=4, queue_size=2)
+    consumed = []
+    
+    stats = pipeline.run(
+        range(100),
+        process=lambda i: None if i % 10 == 0 else i * 2,
+        consume=consumed.append,
+        size_of=lambda r: 8
+    )
+    
+    assert sorted(consumed) == [i * 2 for i in range(100) if i % 10 != 0]
+    summary = stats.summary()
+    assert summary["workers"] == 4
+    assert summary["stages"]["read"]["files"] == 100
+    assert summary["stages"]["write"]["files"] == 90
+    assert summary["stages"]["write"]["bytes"] == 90 * 8
+
+
+def test_pipeline_worker_error_propagates():
+    """Test that a worker exception stops the pipeline and is re-raised."""
+    pipeline = IndexPipeline(workers=2, queue_size=1)
+    
+    def process(i: int) -> int:
+        if i == 50:
+            raise RuntimeError("boom")
+        return i
+    
+    with pytest.raises(RuntimeError, match="boom"):
+        pipeline.run(range(1000), process=process, consume=lambda r: None)
+
+
+def test_pipeline_consumer_error_propagates():
+    """Test that a consumer exception does not deadlock blocked workers."""
+    pipeline = IndexPipeline(workers=2, queue_size=1)
+    
+    def consume(result: int) -> None:
+        raise ValueError("write failed")
+    
+    with pytest.raises(ValueError, match="write failed"):
+        pipeline.run(range(1000), process=lambda i: i, consume=consume)
+
+
+def test_pipeline_invalid_settings():
+    """Test pipeline argument validation."""
+    with pytest.raises(ValueError):
+        IndexPipeline(workers=0)
+    with pytest.raises(ValueError):
+        IndexPipeline(queue_size=0)
@@ -6,10 +6,15 @@ import os
 import pytest
 from pathlib import Path
 from typing import Generator
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, call, patch
 
-from obsidian_concierge.db.chroma import ChromaRepository, Document
+from obsidian_concierge.repository.chroma import ChromaRepository, Document
+from obsidian_concierge.indexer.batching import AdaptiveBatchSizer, document_bytes
+from obsidian_concierge.indexer.chunker import MarkdownChunker
 from obsidian_concierge.indexer.vault_indexer import VaultIndexer
+from obsidian_concierge.repository.lexical_index import LexicalIndex
+
+from ..test_db.test_chroma import FakeEmbeddingFunction
 
 
 @pytest.fixture
@@ -60,6 +65,25 @@ def test_read_markdown_file(temp_vault, mock_repo):
     assert content == "# Test Note 1\nThis is a test note."
 
 
+def test_read_non_ascii_and_binary_notes(temp_vault, mock_repo):
+    """Test that non-ASCII notes are read and binary notes are skipped."""
+    (temp_vault / "日本語.md").write_text("# 日本語\n絵文字 🚀", encoding="utf-8")
+    (temp_vault / "binary.md").write_bytes(b"\x89PNG\r\n\x1a\n\0\0")
+    
+    indexer = VaultIndexer(str(temp_vault), mock_repo)
+    assert indexer._read_markdown_file(temp_vault / "日本語.md") == "# 日本語\n絵文字 🚀"
+    assert indexer._build_documents(temp_vault / "binary.md") is None
+    
+    indexer.index_vault()
+    paths = {
+        doc.metadata["path"]
+        for call in mock_repo.upsert_documents.call_args_list
+        for doc in call[0][0]
+    }
+    assert "日本語.md" in paths
+    assert "binary.md" not in paths
+
+
 def test_generate_document_id(temp_vault, mock_repo):
     """Test document ID generation."""
     indexer = VaultIndexer(str(temp_vault), mock_repo)
@@ -102,17 +126,78 @@ def test_scan_vault_files(temp_vault, mock_repo):
     assert file_paths == {"note1.md", "folder1/note2.md", "folder1/note3.md"}
 
 
+def test_scan_vault_files_ignore_rules(temp_vault, mock_repo):
+    """Test that ignored directories and patterns are pruned from the scan."""
+    (temp_vault / ".obsidian").mkdir()
+    (temp_vault / ".obsidian" / "hidden.md").write_text("# Hidden")
+    (temp_vault / "templates").mkdir()
+    (temp_vault / "templates" / "daily.md").write_text("# Daily")
+    
+    indexer = VaultIndexer(str(temp_vault), mock_repo, ignore_patterns=["templates"])
+    file_paths = {str(f.relative_to(temp_vault)) for f in indexer._scan_vault_files()}
+    assert file_paths == {"note1.md", "folder1/note2.md", "folder1/note3.md"}
+    assert indexer.is_ignored(temp_vault / "templates" / "daily.md")
+    assert not indexer.is_ignored(temp_vault / "note1.md")
+
+
+def test_scan_vault_files_does_not_open_files(temp_vault, mock_repo):
+    """Test that scanning never opens a file."""
+    indexer = VaultIndexer(str(temp_vault), mock_repo)
+    with patch("builtins.open", side_effect=AssertionError("file opened during scan")):
+        entries = list(indexer.scan_vault_entries())
+    assert len(entries) == 3
+
+
 def test_index_vault(temp_vault, mock_repo):
     """Test indexing entire vault."""
     indexer = VaultIndexer(str(temp_vault), mock_repo)
     indexer.index_vault(batch_size=2)
     
     # Check that add_documents was called with correct number of documents
-    calls = mock_repo.add_documents.call_args_list
+    calls = mock_repo.upsert_documents.call_args_list
     total_docs = sum(len(args[0][0]) for args in calls)
     assert total_docs == 3  # Should have processed 3 markdown files
 
 
+def test_index_vault_batches_by_bytes(temp_vault, mock_repo):
+    """Test that large notes fill a batch before the document count limit."""
+    for i in range(3):
+        (temp_vault / f"large{i}.md").write_text(f"# Large {i}\n" + "word " * 4000)
+    
+    indexer = VaultIndexer(str(temp_vault), mock_repo)
+    indexer.index_vault(batch_size=100, batch_bytes=16_384)
+    
+    calls = mock_repo.upsert_documents.call_args_list
+    assert len(calls) >= 3
+    for call in calls:
+        assert sum(len(doc.content.encode("utf-8")) for doc in call[0][0]) <= 4_194_304
+
+
+def test_changed_files_share_batches_with_new_files(temp_vault, mock_repo, tmp_path):
+    """Test that changed files are written in the same batches as new files."""
+    indexer = VaultIndexer(str(temp_vault), mock_repo, manifest_path=str(tmp_path / "manifest.json"))
+    indexer.index_vault()
+    mock_repo.reset_mock()
+    (temp_vault / "note1.md").write_text("# Test Note 1\nChanged content.")
+    (temp_vault / "folder1/note2.md").write_text("# Test Note 2\nChanged as well.")
+    (temp_vault / "new.md").write_text("# New\nBrand new note.")
+    
+    # Only the first document of each write is embedded
+    def upsert(docs, on_embedded=None, **kwargs):
+        on_embedded(docs[:1])
+        return 1
+    mock_repo.upsert_documents.side_effect = upsert
+    
+    with patch.object(AdaptiveBatchSizer, "observe") as observe:
+        counts = indexer.index_vault(incremental=True, batch_size=100)
+    assert (counts["added"], counts["updated"]) == (1, 2)
+    mock_repo.upsert_documents.assert_called_once()
+    docs = mock_repo.upsert_documents.call_args[0][0]
+    assert len(docs) == 3
+    observe.assert_called_once()
+    assert observe.call_args[0][0] == document_bytes(docs[0])
+
+
 def test_reindex_file(temp_vault, mock_repo):
     """Test reindexing a single file."""
     indexer = VaultIndexer(str(temp_vault), mock_repo)
@@ -120,11 +205,50 @@ def test_reindex_file(temp_vault, mock_repo):
     
     indexer.reindex_file(str(file_path))
     
-    # Check that update_document was called with correct document
-    mock_repo.update_document.assert_called_once()
-    doc = mock_repo.update_document.call_args[0][0]
+    # Check that the note's single chunk was upserted
+    mock_repo.upsert_documents.assert_called_once()
+    docs = mock_repo.upsert_documents.call_args[0][0]
+    assert len(docs) == 1
+    doc = docs[0]
     assert doc.content == "# Test Note 1\nThis is a test note."
     assert doc.metadata["path"] == "note1.md"
+    assert doc.metadata["parent_id"] == indexer._generate_document_id(file_path)
+    
+    # Chunks beyond the new end of the note are removed
+    where = mock_repo.delete_documents.call_args[1]["where"]
+    assert {"chunk_index": {"$gte": 1}} in where["$and"]
+
+
+def test_rewrite_drops_pre_chunking_documents(temp_vault, tmp_path):
+    """Test that (re)written notes replace documents stored before chunking."""
+    repo = ChromaRepository(
+        collection_name="test_collection",
+        persist_directory=str(tmp_path / "chroma"),
+        embedding_function=FakeEmbeddingFunction()
+    )
+    indexer = VaultIndexer(str(temp_vault), repo, manifest_path=str(tmp_path / "manifest.json"))
+    
+    # Notes indexed before chunking are stored once under the bare note ID
+    legacy_ids = {}
+    for name in ("note1.md", "folder1/note2.md", "folder1/note3.md"):
+        legacy_ids[name] = indexer._generate_document_id(temp_vault / name)
+    repo.add_documents([
+        Document(id=doc_id, content=(temp_vault / name).read_text(), metadata={"path": name})
+        for name, doc_id in legacy_ids.items()
+    ])
+    
+    def stored_ids():
+        return set(repo.collection.get()["ids"])
+    
+    indexer.reindex_file(str(temp_vault / "folder1/note2.md"))
+    assert legacy_ids["folder1/note2.md"] not in stored_ids()
+    assert f"{legacy_ids['folder1/note2.md']}-0" in stored_ids()
+    
+    indexer.apply_changes([temp_vault / "folder1/note3.md"], [])
+    assert legacy_ids["folder1/note3.md"] not in stored_ids()
+    
+    indexer.index_vault()
+    assert stored_ids() == {f"{doc_id}-0" for doc_id in legacy_ids.values()}
 
 
 def test_remove_file(temp_vault, mock_repo):
@@ -134,10 +258,13 @@ def test_remove_file(temp_vault, mock_repo):
     
     indexer.remove_file(str(file_path))
     
-    # Check that delete_documents was called with correct ID
-    mock_repo.delete_documents.assert_called_once()
+    # Check that all chunks of the note and any unchunked legacy document
+    # stored under the bare note ID were deleted
     doc_id = indexer._generate_document_id(file_path)
-    assert mock_repo.delete_documents.call_args[0][0] == [doc_id]
+    assert mock_repo.delete_documents.call_args_list == [
+        call(where={"parent_id": {"$in": [doc_id]}}),
+        call([doc_id])
+    ]
 
 
 def test_error_handling(temp_vault, mock_repo):
@@ -145,10 +272,270 @@ def test_error_handling(temp_vault, mock_repo):
     indexer = VaultIndexer(str(temp_vault), mock_repo)
     
     # Simulate error during document addition
-    mock_repo.add_documents.side_effect = Exception("Test error")
+    mock_repo.upsert_documents.side_effect = Exception("Test error")
     
     with pytest.raises(Exception):
         indexer.index_vault()
     
     # Should still attempt to add any documents in the current batch
-    assert mock_repo.add_documents.called 
\ No newline at end of file
+    assert mock_repo.upsert_documents.called 
+
+def test_incremental_requires_manifest(temp_vault, mock_repo):
+    """Test incremental indexing without a manifest path."""
+    indexer = VaultIndexer(str(temp_vault), mock_repo)
+    
+    with pytest.raises(ValueError):
+        indexer.index_vault(incremental=True)
+
+
+def test_incremental_index_vault(temp_vault, mock_repo, tmp_path):
+    """Test that incremental indexing only touches changed files."""
+    manifest_path = tmp_path / "manifest.json"
+    indexer = VaultIndexer(str(temp_vault), mock_repo, manifest_path=str(manifest_path))
+    counts = indexer.index_vault()
+    assert counts["added"] == 3
+    assert manifest_path.exists()
+    
+    # A fresh indexer with no vault changes does no repository work
+    mock_repo.reset_mock()
+    indexer = VaultIndexer(str(temp_vault), mock_repo, manifest_path=str(manifest_path))
+    counts = indexer.index_vault(incremental=True)
+    assert counts == {"added": 0, "updated": 0, "renamed": 0, "deleted": 0, "unchanged": 3}
+    mock_repo.upsert_documents.assert_not_called()
+    mock_repo.delete_documents.assert_not_called()
+    
+    # Add, change and remove one file each
+    mock_repo.reset_mock()
+    (temp_vault / "new.md").write_text("# New\nBrand new note.")
+    (temp_vault / "note1.md").write_text("# Test Note 1\nChanged content.")
+    removed_id = indexer._generate_document_id(temp_vault / "folder1/note3.md")
+    (temp_vault / "folder1/note3.md").unlink()
+    
+    counts = indexer.index_vault(incremental=True)
+    assert counts == {"added": 1, "updated": 1, "renamed": 0, "deleted": 1, "unchanged": 1}
+    upserted = {
+        doc.metadata["path"]: doc.content
+        for call in mock_repo.upsert_documents.call_args_list
+        for doc in call[0][0]
+    }
+    assert upserted == {
+        "new.md": "# New\nBrand new note.",
+        "note1.md": "# Test Note 1\nChanged content."
+    }
+    # Written notes drop any document stored before they were chunked
+    written_ids = {
+        indexer._generate_document_id(temp_vault / name) for name in ("new.md", "note1.md")
+    }
+    assert set(mock_repo.delete_documents.call_args_list[0][0][0]) == written_ids
+    assert mock_repo.delete_documents.call_args_list[1:] == [
+        call(where={"parent_id": {"$in": [removed_id]}}),
+        call([removed_id])
+    ]
+
+
+def test_incremental_rename_moves_embeddings(temp_vault, mock_repo, tmp_path):
+    """Test that a moved folder is migrated instead of re-embedded."""
+    manifest_path = tmp_path / "manifest.json"
+    indexer = VaultIndexer(str(temp_vault), mock_repo, manifest_path=str(manifest_path))
+    indexer.index_vault()
+    old_ids = {
+        indexer._generate_document_id(temp_vault / "folder1" / name)
+        for name in ("note2.md", "note3.md")
+    }
+    
+    mock_repo.reset_mock()
+    (temp_vault / "folder1").rename(temp_vault / "archive")
+    counts = indexer.index_vault(incremental=True)
+    
+    assert counts == {"added": 0, "updated": 0, "renamed": 2, "deleted": 0, "unchanged": 1}
+    mock_repo.upsert_documents.assert_not_called()
+    new_ids = {
+        indexer._generate_document_id(temp_vault / "archive" / name)
+        for name in ("note2.md", "note3.md")
+    }
+    assert set(mock_repo.delete_documents.call_args[0][0]) == old_ids | new_ids
+    moves = mock_repo.move_documents.call_args[0][0]
+    assert {old_id.rsplit("-", 1)[0] for old_id, _ in moves} == old_ids
+    assert {doc.metadata["path"] for _, doc in moves} == {"archive/note2.md", "archive/note3.md"}
+    assert "archive/note2.md" in indexer.manifest
+    assert "folder1/note2.md" not in indexer.manifest
+
+
+def test_resume_interrupted_index(temp_vault, mock_repo, tmp_path):
+    """Test that an interrupted run resumes after its last committed batch."""
+    manifest_path = tmp_path / "manifest.json"
+    checkpoint_path = tmp_path / "checkpoint.jsonl"
+    indexer = VaultIndexer(
+        str(temp_vault), mock_repo,
+        manifest_path=str(manifest_path),
+        checkpoint_path=str(checkpoint_path)
+    )
+    mock_repo.upsert_documents.side_effect = [None, Exception("Embedding server restarted")]
+    with pytest.raises(Exception):
+        indexer.index_vault(batch_size=1, workers=1)
+    assert checkpoint_path.exists()
+    committed = {
+        doc.metadata["path"] for doc in mock_repo.upsert_documents.call_args_list[0][0][0]
+    }
+    
+    mock_repo.reset_mock(side_effect=True)
+    indexer = VaultIndexer(
+        str(temp_vault), mock_repo,
+        manifest_path=str(manifest_path),
+        checkpoint_path=str(checkpoint_path)
+    )
+    counts = indexer.index_vault(batch_size=1, workers=1, resume=True)
+    
+    written = {
+        doc.metadata["path"]
+        for call in mock_repo.upsert_documents.call_args_list
+        for doc in call[0][0]
+    }
+    assert written == {"note1.md", "folder1/note2.md", "folder1/note3.md"} - committed
+    assert counts["added"] == 2
+    assert counts["unchanged"] == 1
+    assert len(indexer.manifest) == 3
+    assert not checkpoint_path.exists()
+
+
+def test_unchanged_files_are_checkpointed_with_batches(temp_vault, mock_repo, tmp_path):
+    """Test that touched but unchanged files add no checkpoint records of their own."""
+    indexer = VaultIndexer(
+        str(temp_vault), mock_repo,
+        manifest_path=str(tmp_path / "manifest.json"),
+        checkpoint_path=str(tmp_path / "checkpoint.jsonl")
+    )
+    indexer.index_vault()
+    
+    for name in ("note1.md", "folder1/note2.md"):
+        os.utime(temp_vault / name, ns=(0, 10**18))
+    (temp_vault / "folder1/note3.md").write_text("# Test Note 3\nChanged.")
+    with patch.object(indexer.checkpoint, "commit", wraps=indexer.checkpoint.commit) as commit:
+        counts = indexer.index_vault(incremental=True, workers=1)
+    
+    assert counts["unchanged"] == 2
+    commit.assert_called_once()
+    assert {entry.path for entry in commit.call_args[0][0]} == {
+        "note1.md", "folder1/note2.md", "folder1/note3.md"
+    }
+    assert indexer.manifest.get("note1.md").mtime_ns == 10**18
+
+
+def test_incremental_touch_without_change(temp_vault, mock_repo, tmp_path):
+    """Test that a changed mtime with identical content is not re-indexed."""
+    manifest_path = tmp_path / "manifest.json"
+    indexer = VaultIndexer(str(temp_vault), mock_repo, manifest_path=str(manifest_path))
+    indexer.index_vault()
+    
+    mock_repo.reset_mock()
+    note = temp_vault / "note1.md"
+    stat = note.stat()
+    os.utime(note, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    
+    counts = indexer.index_vault(incremental=True)
+    assert counts["unchanged"] == 3
+    mock_repo.upsert_documents.assert_not_called()
+    assert indexer.manifest.get("note1.md").mtime_ns == note.stat().st_mtime_ns
+
+
+def test_index_vault_stats(temp_vault, mock_repo):
+    """Test that indexing reports per-stage throughput."""
+    indexer = VaultIndexer(str(temp_vault), mock_repo)
+    indexer.index_vault(batch_size=2, workers=2, queue_size=1)
+    
+    summary = indexer.last_stats.summary()
+    assert summary["workers"] == 2
+    assert summary["stages"]["scan"]["files"] == 3
+    assert summary["stages"]["read"]["files"] == 3
+    assert summary["stages"]["read"]["bytes"] > 0
+
+
+def test_long_note_is_chunked(temp_vault, mock_repo, tmp_path):
+    """Test that long notes are stored as chunks and shrinking removes stale ones."""
+    manifest_path = tmp_path / "manifest.json"
+    indexer = VaultIndexer(
+        str(temp_vault), mock_repo,
+        manifest_path=str(manifest_path),
+        chunker=MarkdownChunker(max_chars=60, overlap=10)
+    )
+    long_note = temp_vault / "long.md"
+    long_note.write_text(
+        "# Long\nIntro paragraph for the long note.\n"
+        "## Part A\nDetails about the first part of it.\n"
+        "## Part B\nDetails about the second part of it.\n"
+    )
+    indexer.index_vault()
+    
+    docs = [
+        doc for call in mock_repo.upsert_documents.call_args_list for doc in call[0][0]
+        if doc.metadata["path"] == "long.md"
+    ]
+    parent_id = indexer._generate_document_id(long_note)
+    assert [doc.id for doc in docs] == [f"{parent_id}-{i}" for i in range(3)]
+    assert [doc.metadata["heading_path"] for doc in docs] == [
+        "Long", "Long > Part A", "Long > Part B"
+    ]
+    assert all(doc.metadata["chunk_count"] == 3 for doc in docs)
+    assert all(doc.metadata["excerpt"] == doc.content for doc in docs)
+    assert indexer.manifest.get("long.md").chunk_count == 3
+    
+    mock_repo.reset_mock()
+    long_note.write_text("# Long\nNow short.")
+    indexer.index_vault(incremental=True)
+    mock_repo.delete_documents.assert_called_once_with(
+        [parent_id, f"{parent_id}-1", f"{parent_id}-2"]
+    )
+
+
+def test_note_metadata_is_indexed(temp_vault, mock_repo):
+    """Test that frontmatter, tags and links end up in chunk metadata."""
+    (temp_vault / "tagged.md").write_text(
+        "---\ntags: [project]\nstatus: active\n---\n# Tagged\nSee [[note1]] #inline\n"
+    )
+    indexer = VaultIndexer(str(temp_vault), mock_repo)
+    indexer.index_vault()
+    
+    docs = [doc for call in mock_repo.upsert_documents.call_args_list for doc in call[0][0]]
+    doc = next(doc for doc in docs if doc.metadata["path"] == "tagged.md")
+    assert doc.content == "# Tagged\nSee note1 #inline\n"
+    assert doc.metadata["tags"] == ["project", "inline"]
+    assert doc.metadata["links"] == ["note1"]
+    assert doc.metadata["status"] == "active"
+
+
+def test_lexical_index_follows_writes(temp_vault, mock_repo, tmp_path):
+    """Test that the lexical index is kept in step with repository writes."""
+    manifest_path = tmp_path / "manifest.json"
+    index_path = tmp_path / "lexical.npz"
+    indexer = VaultIndexer(str(temp_vault), mock_repo, manifest_path=str(manifest_path))
+    indexer.index_vault()
+
+    # An index added to an indexed vault is filled in without re-embedding
+    mock_repo.reset_mock()
+    lexical = LexicalIndex()
+    indexer = VaultIndexer(
+        str(temp_vault), mock_repo, manifest_path=str(manifest_path),
+        lexical_index=lexical, lexical_index_path=str(index_path)
+    )
+    counts = indexer.index_vault(incremental=True)
+    assert counts["unchanged"] == 3
+    mock_repo.upsert_documents.assert_not_called()
+    assert len(lexical) == 3 and index_path.exists()
+
+    def matches(query: str) -> set:
+        return {lexical._parents[lexical._rows[doc_id]] for doc_id, _ in lexical.search(query, limit=None)}
+
+    note1 = indexer._generate_document_id(temp_vault / "note1.md")
+    (temp_vault / "note1.md").write_text("# Test Note 1\nQuasar telescope.")
+    indexer.reindex_file(str(temp_vault / "note1.md"))
+    assert matches("quasar") == {note1}
+    assert note1 not in matches("this")
+
+    (temp_vault / "folder1").rename(temp_vault / "archive")
+    indexer.index_vault(incremental=True)
+    archived = indexer._generate_document_id(temp_vault / "archive/note2.md")
+    assert matches("2") == {archived}
+
+    indexer.remove_file(str(temp_vault / "note1.md"))
+    assert matches("quasar") == set()
+    assert LexicalIndex.load(index_path).search("quasar") == []
@@ -0,0 +1,174 @@
+"""
+Tests for the debounced vault watcher.
+"""
+
+import os
+import shutil
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from obsidian_concierge.repository.chroma import ChromaRepository
+from obsidian_concierge.indexer.vault_indexer import VaultIndexer
+from obsidian_concierge.indexer.watcher import VaultWatcher
+
+
+@pytest.fixture
+def mock_repo():
+    """Fixture for mock ChromaRepository."""
+    return Mock(spec=ChromaRepository)
+
+
+@pytest.fixture
+def indexed_vault(tmp_path, mock_repo):
+    """Fixture for an indexed vault with a manifest."""
+    vault_dir = tmp_path / "vault"
+    (vault_dir / "folder").mkdir(parents=True)
+    (vault_dir / ".obsidian").mkdir()
+    (vault_dir / "note1.md").write_text("# Note 1\nFirst note.")
+    (vault_dir / "folder" / "note2.md").write_text("# Note 2\nSecond note.")
+    (vault_dir / "folder" / "note3.md").write_text("# Note 3\nThird note.")
+    
+    indexer = VaultIndexer(str(vault_dir), mock_repo, manifest_path=str(tmp_path / "manifest.json"))
+    indexer.index_vault()
+    mock_repo.reset_mock()
+    return indexer
+
+
+def _watcher(indexer: VaultIndexer) -> VaultWatcher:
+    watcher = VaultWatcher(indexer, debounce=0.5, max_delay=5.0, use_native=False)
+    watcher.poll()
+    return watcher
+
+
+def test_burst_is_flushed_as_one_batch(indexed_vault, mock_repo):
+    """Test that many events produce a single upsert and batched deletes."""
+    watcher = _watcher(indexed_vault)
+    vault = indexed_vault.vault_path
+    
+    for i in range(20):
+        (vault / f"new{i}.md").write_text(f"# New {i}")
+    for _ in range(3):
+        (vault / "note1.md").write_text(f"# Note 1\nEdited {time.time()}")
+    (vault / "folder" / "note3.md").unlink()
+    (vault / ".obsidian" / "workspace.md").write_text("ignored")
+    
+    assert watcher.poll() == 22
+    assert not watcher.is_due()
+    assert watcher.is_due(now=time.monotonic() + 1.0)
+    
+    counts = watcher.flush()
+    assert counts["upserted"] == 21
+    assert counts["deleted"] == 1
+    mock_repo.upsert_documents.assert_called_once()
+    # Stale documents of written notes, then chunks and legacy documents of
+    # the deleted note
+    assert mock_repo.delete_documents.call_count == 3
+    assert watcher.flush() is None
+
+
+def test_max_delay_bounds_continuous_bursts(indexed_vault):
+    """Test that continuous activity is flushed after the maximum delay."""
+    watcher = _watcher(indexed_vault)
+    watcher.record(indexed_vault.vault_path / "note1.md")
+    start = time.monotonic()
+    
+    watcher._last_event = start + 4.9
+    assert not watcher.is_due(now=start + 4.95)
+    assert watcher.is_due(now=start + 5.1)
+
+
+def test_rename_is_detected(indexed_vault, mock_repo):
+    """Test that a moved file is migrated instead of re-embedded."""
+    watcher = _watcher(indexed_vault)
+    vault = indexed_vault.vault_path
+    old_id = indexed_vault._generate_document_id(vault / "note1.md")
+    new_id = indexed_vault._generate_document_id(vault / "folder" / "moved.md")
+    os.rename(vault / "note1.md", vault / "folder" / "moved.md")
+    
+    watcher.poll()
+    counts = watcher.flush()
+    
+    assert counts == {"upserted": 0, "deleted": 0, "renamed": 1, "unchanged": 0}
+    moves = mock_repo.move_documents.call_args[0][0]
+    assert [(old, doc.id) for old, doc in moves] == [(f"{old_id}-0", f"{new_id}-0")]
+    assert moves[0][1].metadata["path"] == "folder/moved.md"
+    assert moves[0][1].metadata["filename"] == "moved.md"
+    assert mock_repo.upsert_documents.call_args[0][0] == []
+    assert "folder/moved.md" in indexed_vault.manifest
+    assert "note1.md" not in indexed_vault.manifest
+
+
+def test_directory_events_are_expanded(indexed_vault, mock_repo):
+    """Test that directory moves cover every file inside them."""
+    watcher = VaultWatcher(indexed_vault, debounce=0.0, use_native=False)
+    vault = indexed_vault.vault_path
+    shutil.move(str(vault / "folder"), str(vault / "archive"))
+    
+    watcher.record(vault / "folder")
+    watcher.record(vault / "archive")
+    counts = watcher.flush()
+    
+    assert counts["upserted"] == 0
+    assert counts["deleted"] == 0
+    assert counts["renamed"] == 2
+    assert len(mock_repo.move_documents.call_args[0][0]) == 2
+
+
+def test_failed_flush_keeps_changes_pending(indexed_vault, mock_repo):
+    """Test that changes are retried after a repository failure."""
+    watcher = VaultWatcher(indexed_vault, debounce=0.0, use_native=False)
+    (indexed_vault.vault_path / "note1.md").write_text("# Note 1\nChanged.")
+    watcher.record(indexed_vault.vault_path / "note1.md")
+    
+    mock_repo.upsert_documents.side_effect = Exception("Chroma unavailable")
+    assert watcher.flush() is None
+    
+    mock_repo.upsert_documents.side_effect = None
+    assert watcher.flush()["upserted"] == 1
+
+
+def test_write_lock_defers_flush(indexed_vault, mock_repo, tmp_path):
+    """Test that changes wait while another writer holds the write lock."""
+    write_lock = threading.Lock()
+    watcher = VaultWatcher(indexed_vault, debounce=0.0, use_native=False, write_lock=write_lock)
+    (indexed_vault.vault_path / "note1.md").write_text("# Note 1\nChanged.")
+    (indexed_vault.vault_path / "note2.md").write_text("# Note 2")
+    watcher.record(indexed_vault.vault_path / "note1.md")
+    watcher.record(indexed_vault.vault_path / "note2.md")
+    
+    with write_lock:
+        assert watcher.flush() is None
+        # Another writer indexes one of the changes and saves the manifest
+        other = VaultIndexer(
+            str(indexed_vault.vault_path),
+            mock_repo,
+            manifest_path=str(tmp_path / "manifest.json")
+        )
+        other.apply_changes([indexed_vault.vault_path / "note1.md"], [])
+    mock_repo.reset_mock()
+    
+    # The watcher picks up the other writer's manifest before flushing
+    counts = watcher.flush()
+    assert counts["upserted"] == 1
+    assert counts["unchanged"] == 1
+    assert not write_lock.locked()
+
+
+def test_background_polling(indexed_vault, mock_repo):
+    """Test the polling watcher running on a background thread."""
+    watcher = VaultWatcher(indexed_vault, debounce=0.1, poll_interval=0.05, use_native=False)
+    watcher.start()
+    try:
+        time.sleep(0.2)
+        (indexed_vault.vault_path / "late.md").write_text("# Late note")
+        deadline = time.monotonic() + 5
+        while not mock_repo.upsert_documents.called and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        watcher.stop(timeout=5)
+    
+    docs = mock_repo.upsert_documents.call_args[0][0]
+    assert [doc.metadata["path"] for doc in docs] == ["late.md"]
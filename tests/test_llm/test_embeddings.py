@@ -0,0 +1,87 @@
+"""
+Tests for the Ollama embedding function.
+"""
+
+import json
+import threading
+import time
+
+import httpx
+import pytest
+
+from obsidian_concierge.llm.embeddings import OllamaEmbeddingFunction
+
+
+class FakeOllama:
+    """Transport handler answering /api/embed with one vector per input."""
+    
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+    
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        with self._lock:
+            self.requests.append(payload)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        assert request.url.path == "/api/embed"
+        return httpx.Response(
+            200,
+            json={"embeddings": [[float(len(text)), 1.0] for text in payload["input"]]}
+        )
+
+
+def test_split_bounds_count_and_size():
+    """Test that sub-batches respect both limits and keep input order."""
+    fn = OllamaEmbeddingFunction(max_batch_size=2, max_batch_chars=5)
+    
+    assert fn.split(["a", "b", "c"]) == [["a", "b"], ["c"]]
+    assert fn.split(["abc", "de", "f"]) == [["abc", "de"], ["f"]]
+    # An oversized text is sent on its own
+    assert fn.split(["abcdefgh", "a"]) == [["abcdefgh"], ["a"]]
+    assert fn.split([]) == []
+
+
+def test_embeds_batches_concurrently_in_order():
+    """Test that sub-batches run concurrently and results keep input order."""
+    ollama = FakeOllama(delay=0.05)
+    fn = OllamaEmbeddingFunction(
+        model_name="test-model",
+        max_batch_size=2,
+        concurrency=3,
+        transport=httpx.MockTransport(ollama)
+    )
+    texts = ["x" * n for n in range(1, 11)]
+    
+    embeddings = fn(texts)
+    fn.close()
+    
+    assert [vector[0] for vector in embeddings] == [float(len(text)) for text in texts]
+    assert len(ollama.requests) == 5
+    assert all(request["model"] == "test-model" for request in ollama.requests)
+    assert 1 < ollama.max_in_flight <= 3
+
+
+def test_mismatched_response_raises():
+    """Test that a response with the wrong number of vectors is rejected."""
+    fn = OllamaEmbeddingFunction(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, json={"embeddings": []}))
+    )
+    with pytest.raises(ValueError):
+        fn(["text"])
+
+
+def test_config_round_trip():
+    """Test that the function can be rebuilt from its persisted config."""
+    fn = OllamaEmbeddingFunction(url="http://ollama:11434/", model_name="m", concurrency=8)
+    
+    rebuilt = OllamaEmbeddingFunction.build_from_config(fn.get_config())
+    assert rebuilt.get_config() == {"url": "http://ollama:11434", "model_name": "m"}
+    assert not fn.is_legacy()
@@ -0,0 +1,117 @@
+"""
+Tests for background index jobs.
+"""
+
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from obsidian_concierge.repository.chroma import ChromaRepository
+from obsidian_concierge.indexer.vault_indexer import VaultIndexer
+from obsidian_concierge.services.indexing import (IndexJobManager, JobConflictError,
+                                                  JobStatus)
+
+
+@pytest.fixture
+def mock_repo():
+    """Fixture for mock ChromaRepository."""
+    return Mock(spec=ChromaRepository)
+
+
+@pytest.fixture
+def manager(tmp_path, mock_repo):
+    """Fixture for a job manager indexing a small temporary vault."""
+    vault_dir = tmp_path / "vault"
+    vault_dir.mkdir()
+    for i in range(5):
+        (vault_dir / f"note{i}.md").write_text(f"# Note {i}\nContent of note {i}.")
+    
+    def create_indexer() -> VaultIndexer:
+        return VaultIndexer(
+            str(vault_dir),
+            mock_repo,
+            manifest_path=str(tmp_path / "manifest.json"),
+            checkpoint_path=str(tmp_path / "checkpoint.jsonl")
+        )
+    
+    # Write one document per batch so that jobs can be interrupted mid-run
+    return IndexJobManager(create_indexer, batch_size=1)
+
+
+def test_job_completes(manager):
+    """Test that a job runs in the background and reports its results."""
+    job = manager.start(full=True)
+    assert manager.get(job.id) is job
+    
+    job = manager.wait(job.id, timeout=10)
+    assert job.status == JobStatus.COMPLETED
+    assert job.counts["added"] == 5
+    
+    result = job.to_dict()
+    assert result["status"] == "completed"
+    assert result["progress"]["files_scanned"] == 5
+    assert result["progress"]["files_written"] == 5
+    assert result["progress"]["scan_complete"]
+    assert manager.active_job is None
+    
+    # A second incremental run finds nothing to do
+    job = manager.wait(manager.start().id, timeout=10)
+    assert job.counts["unchanged"] == 5
+
+
+def test_concurrent_job_is_rejected(manager, mock_repo):
+    """Test that a second job is rejected while one is running."""
+    release = threading.Event()
+    mock_repo.upsert_documents.side_effect = lambda docs, **kwargs: release.wait(10)
+    
+    job = manager.start(full=True)
+    with pytest.raises(JobConflictError) as excinfo:
+        manager.start(full=True)
+    assert excinfo.value.job is job
+    
+    release.set()
+    assert manager.wait(job.id, timeout=10).status == JobStatus.COMPLETED
+
+
+def test_job_cancellation(manager, mock_repo):
+    """Test that a cancelled job stops and keeps its checkpoint."""
+    writing = threading.Event()
+    release = threading.Event()
+    
+    def slow_upsert(docs, **kwargs):
+        writing.set()
+        release.wait(10)
+    
+    mock_repo.upsert_documents.side_effect = slow_upsert
+    job = manager.start(full=True)
+    assert writing.wait(10)
+    manager.cancel(job.id)
+    release.set()
+    
+    job = manager.wait(job.id, timeout=10)
+    assert job.status == JobStatus.CANCELLED
+    assert job.to_dict()["progress"]["eta_seconds"] is None
+    assert job.indexer.checkpoint.exists()
+    
+    with pytest.raises(KeyError):
+        manager.cancel("unknown")
+
+
+def test_failed_job(manager, mock_repo):
+    """Test that repository errors mark the job as failed."""
+    mock_repo.upsert_documents.side_effect = Exception("Chroma unavailable")
+    job = manager.wait(manager.start(full=True).id, timeout=10)
+    assert job.status == JobStatus.FAILED
+    assert "Chroma unavailable" in job.error
+
+
+def test_job_waits_for_write_lock(manager, mock_repo):
+    """Test that a job does not write while another writer holds the lock."""
+    with manager.write_lock:
+        job = manager.start(full=True)
+        assert manager.wait(job.id, timeout=0.2).active
+        mock_repo.upsert_documents.assert_not_called()
+    
+    assert manager.wait(job.id, timeout=10).status == JobStatus.COMPLETED
+    assert job.counts["added"] == 5
@@ -0,0 +1,110 @@
+"""
+Tests for the related notes service.
+"""
+
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from obsidian_concierge.repository.chroma import ChromaRepository, Document
+from obsidian_concierge.services.related import RelatedNotesService
+from obsidian_concierge.services.search import SearchService
+
+from ..test_db.test_chroma import FakeEmbeddingFunction
+
+
+def _note(note_id: str, texts):
+    return [
+        Document(
+            id=f"{note_id}-{index}",
+            content=text,
+            metadata={"parent_id": note_id, "chunk_index": index, "path": f"{note_id}.md"}
+        )
+        for index, text in enumerate(texts)
+    ]
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """Fixture for a repository with a few chunked notes."""
+    repo = ChromaRepository(
+        collection_name="test_collection",
+        persist_directory=str(tmp_path / "chroma"),
+        embedding_function=FakeEmbeddingFunction()
+    )
+    repo.upsert_documents(
+        _note("a", ["Alpha", "Alpha again"]) + _note("b", ["Beta notes"]) + _note("c", ["Gamma"])
+    )
+    return repo
+
+
+def test_sync_builds_and_updates_incrementally(repo, tmp_path):
+    """Test that syncs only recompute what changed and persist the graph."""
+    service = RelatedNotesService(repo, graph_path=str(tmp_path / "related.npz"), k=2)
+    assert service.stale
+    first = service.sync()
+    assert first["added"] == 3 and first["notes"] == 3
+    assert not service.stale
+    assert {note_id for note_id, _ in service.related("a")} == {"b", "c"}
+    
+    repo.upsert_documents(_note("b", ["Beta notes, edited"]) + _note("d", ["Delta"]))
+    repo.delete_documents(where={"parent_id": "c"})
+    assert service.stale
+    second = service.sync()
+    assert (second["added"], second["changed"], second["removed"]) == (1, 1, 1)
+    assert {note_id for note_id, _ in service.related("a")} == {"b", "d"}
+    
+    reloaded = RelatedNotesService(repo, graph_path=str(tmp_path / "related.npz"), k=2)
+    assert reloaded.graph.get("a") == service.graph.get("a")
+    assert reloaded.sync()["recomputed"] == 0
+
+
+def test_sync_reads_only_changed_notes(repo):
+    """Test that incremental syncs only read the notes written to since the last one."""
+    service = RelatedNotesService(repo, k=2)
+    service.sync()
+    
+    repo.upsert_documents(_note("b", ["Beta notes, edited"]) + _note("d", ["Delta"]))
+    repo.delete_documents(where={"parent_id": "c"})
+    with patch.object(repo, "note_signatures", wraps=repo.note_signatures) as note_signatures:
+        counts = service.sync()
+    note_signatures.assert_called_once_with(["b", "c", "d"])
+    assert (counts["added"], counts["changed"], counts["removed"]) == (1, 1, 1)
+    assert {note_id for note_id, _ in service.related("a")} == {"b", "d"}
+    
+    # Unknown changes fall back to comparing every note
+    repo.bump_generation()
+    with patch.object(repo, "note_signatures", wraps=repo.note_signatures) as note_signatures:
+        assert service.sync()["recomputed"] == 0
+    note_signatures.assert_called_once_with()
+
+
+@pytest.mark.asyncio
+async def test_similar_documents_served_from_graph(repo):
+    """Test that related notes come from the graph without a vector query."""
+    related = RelatedNotesService(repo, k=2)
+    related.sync()
+    service = SearchService(repo, related=related)
+    
+    with patch.object(repo, "find_similar") as find_similar:
+        results = await service.get_similar_documents("a", limit=2)
+    find_similar.assert_not_called()
+    assert {result["metadata"]["parent_id"] for result in results} == {"b", "c"}
+    assert all(result["metadata"]["chunk_index"] == 0 for result in results)
+
+
+@pytest.mark.asyncio
+async def test_similar_documents_fallback_uses_cosine_distance(repo):
+    """Test that the vector query fallback scores by cosine distance, like the graph."""
+    service = SearchService(repo, related=RelatedNotesService(repo, k=2))
+    
+    results = await service.get_similar_documents("b", limit=2)
+    hit_ids = [f"{result['metadata']['parent_id']}-{result['metadata']['chunk_index']}" for result in results]
+    stored = repo.collection.get(ids=["b-0"] + hit_ids, include=["embeddings"])
+    vectors = dict(zip(stored["ids"], np.asarray(stored["embeddings"], dtype=np.float32)))
+    source = vectors["b-0"]
+    for hit_id, result in zip(hit_ids, results):
+        vector = vectors[hit_id]
+        cosine = vector @ source / (np.linalg.norm(vector) * np.linalg.norm(source))
+        assert result["score"] == pytest.approx(1 - cosine, abs=1e-5)
@@ -0,0 +1,180 @@
+"""
+Tests for the search service and its result cache.
+"""
+
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from obsidian_concierge.repository.chroma import ChromaRepository
+from obsidian_concierge.repository.chroma import Document, SearchQuery
+from obsidian_concierge.repository.executor import RepositoryExecutor
+from obsidian_concierge.repository.lexical_index import LexicalIndex
+from obsidian_concierge.services.search import (SearchResultCache, SearchService,
+                                                reciprocal_rank_fusion)
+
+
+def _hit(doc_id: str) -> dict:
+    return {"id": doc_id, "text": doc_id, "metadata": {"path": f"{doc_id}.md"}, "score": 0.1}
+
+
+@pytest.fixture
+def repo():
+    """Fixture for a mock repository at generation 0."""
+    repo = Mock(spec=ChromaRepository)
+    repo.generation = 0
+    repo.search = AsyncMock(return_value=[_hit("a"), _hit("b")])
+    repo.search_batch = AsyncMock(
+        side_effect=lambda queries: [[_hit(query.query)] for query in queries]
+    )
+    return repo
+
+
+@pytest.mark.asyncio
+async def test_search_results_are_cached_until_the_generation_changes(repo):
+    """Test that repeated searches are served from memory until a write."""
+    cache = SearchResultCache()
+    service = SearchService(repo, result_cache=cache)
+    
+    first = await service.search("project  plans", limit=2, filters={"b": 1, "a": 2})
+    second = await service.search("project plans", limit=2, filters={"a": 2, "b": 1})
+    assert first == second
+    assert repo.search.await_count == 1
+    
+    await service.search("project plans", limit=5)
+    assert repo.search.await_count == 2
+    
+    repo.generation = 1
+    await service.search("project plans", limit=2, filters={"a": 2, "b": 1})
+    assert repo.search.await_count == 3
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_search_batch_only_queries_cache_misses(repo):
+    """Test that cached queries of a batch do not reach the repository."""
+    service = SearchService(repo, result_cache=SearchResultCache())
+    await service.search_batch([SearchQuery(query="a", limit=1)])
+    
+    results = await service.search_batch([
+        SearchQuery(query="a", limit=1),
+        SearchQuery(query="b", limit=1)
+    ])
+    assert [[hit["id"] for hit in hits] for hits in results] == [["a"], ["b"]]
+    sent = repo.search_batch.await_args_list[-1][0][0]
+    assert [query.query for query in sent] == ["b"]
+
+
+def test_result_cache_lru():
+    """Test that the least recently used results are evicted."""
+    cache = SearchResultCache(max_entries=2)
+    keys = [cache.key(query, 10, None) for query in "abc"]
+    cache.put(keys[0], 0, [_hit("a")])
+    cache.put(keys[1], 0, [_hit("b")])
+    assert cache.get(keys[0], 0) is not None
+    cache.put(keys[2], 0, [_hit("c")])
+    assert cache.get(keys[1], 0) is None
+    assert cache.stats()["entries"] == 2
+
+
+@pytest.fixture
+def lexical_repo(repo):
+    """Fixture for a mock repository whose documents are in a lexical index."""
+    repo.executor = RepositoryExecutor(max_workers=1)
+    repo.afetch_results = AsyncMock(side_effect=lambda ids, where=None, include_content=True: {
+        doc_id: {**_hit(doc_id), "score": None}
+        for doc_id in ids
+        if where is None or doc_id != "c"
+    })
+    index = LexicalIndex()
+    index.add_documents([
+        Document(id="a", content="meeting notes", metadata={}),
+        Document(id="b", content="exact term zx81 in a long note about computers", metadata={}),
+        Document(id="c", content="zx81", metadata={}),
+    ])
+    return repo, index
+
+
+@pytest.mark.asyncio
+async def test_lexical_search_skips_embedding(lexical_repo):
+    """Test that lexical mode answers from the inverted index alone."""
+    repo, index = lexical_repo
+    service = SearchService(repo, lexical=index)
+
+    results = await service.search("ZX81", limit=5, mode="lexical")
+    assert [hit["id"] for hit in results] == ["c", "b"]
+    assert results[0]["score"] > results[1]["score"] > 0
+    repo.search.assert_not_called()
+
+    filtered = await service.search("zx81", limit=5, filters={"tags": {"$contains": "x"}}, mode="lexical")
+    assert [hit["id"] for hit in filtered] == ["b"]
+
+    with pytest.raises(ValueError):
+        await SearchService(repo).search("zx81", mode="lexical")
+    with pytest.raises(ValueError):
+        await service.search("zx81", mode="fuzzy")
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_fuses_ranks(lexical_repo):
+    """Test that hybrid mode ranks notes found by both searches first."""
+    repo, index = lexical_repo
+    cache = SearchResultCache()
+    service = SearchService(repo, result_cache=cache, lexical=index, rrf_k=60)
+
+    results = await service.search("zx81", limit=3, mode="hybrid")
+    # Vector ranking: a, b; lexical ranking: c, b
+    assert [hit["id"] for hit in results] == ["b", "a", "c"]
+    assert results[0]["score"] == pytest.approx(1 / 62 + 1 / 62)
+    assert results[1]["score"] == pytest.approx(1 / 61)
+
+    # Cached until the lexical index changes
+    await service.search("zx81", limit=3, mode="hybrid")
+    assert repo.search.await_count == 1
+    index.remove(["c"])
+    results = await service.search("zx81", limit=3, mode="hybrid")
+    assert repo.search.await_count == 2
+    assert [hit["id"] for hit in results] == ["b", "a"]
+
+
+@pytest.mark.asyncio
+async def test_search_batch_honours_modes(lexical_repo):
+    """Test that batch queries are ranked in their own mode."""
+    repo, index = lexical_repo
+    repo.search_batch = AsyncMock(
+        side_effect=lambda queries: [[_hit("a"), _hit("b")] for _ in queries]
+    )
+    service = SearchService(repo, result_cache=SearchResultCache(), lexical=index, rrf_k=60)
+
+    vector, lexical, hybrid = await service.search_batch([
+        SearchQuery(query="zx81", limit=3),
+        SearchQuery(query="zx81", limit=3, mode="lexical"),
+        SearchQuery(query="zx81", limit=3, mode="hybrid"),
+    ])
+    assert [hit["id"] for hit in vector] == ["a", "b"]
+    assert [hit["id"] for hit in lexical] == ["c", "b"]
+    assert [hit["id"] for hit in hybrid] == ["b", "a", "c"]
+    # One vector batch for the vector and hybrid queries
+    repo.search_batch.assert_awaited_once()
+    assert len(repo.search_batch.await_args[0][0]) == 2
+
+    # Each mode is cached separately
+    cached = await service.search_batch([SearchQuery(query="zx81", limit=3, mode="lexical")])
+    assert cached == [lexical]
+    repo.search_batch.assert_awaited_once()
+
+    with pytest.raises(ValueError):
+        await SearchService(repo).search_batch([SearchQuery(query="zx81", mode="hybrid")])
+
+
+def test_reciprocal_rank_fusion_collapses_notes():
+    """Test that chunks of one note are fused into one result."""
+    def chunk(doc_id: str, note: str) -> dict:
+        return {"id": doc_id, "text": None, "metadata": {"parent_id": note}, "score": 0.0}
+
+    fused = reciprocal_rank_fusion(
+        [[chunk("x#0", "x"), chunk("y#0", "y")], [chunk("y#2", "y")]],
+        k=1,
+        limit=1
+    )
+    assert fused == [{**chunk("y#0", "y"), "score": pytest.approx(1 / 3 + 1 / 2)}]
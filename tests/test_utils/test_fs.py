@@ -9,8 +9,9 @@ from tempfile import NamedTemporaryFile, TemporaryDirectory
 import pytest
 
 from obsidian_concierge.utils.fs import (ensure_dir, get_file_extension,
-                                        get_file_size, is_text_file, list_files,
-                                        safe_remove)
+                                        get_file_size, is_ignored, is_text_file,
+                                        list_files, read_text_file, safe_remove,
+                                        walk_files)
 
 
 def test_ensure_dir():
@@ -49,6 +50,55 @@ def test_list_files():
         assert all(f.suffix == ".txt" for f in files)
 
 
+def test_walk_files():
+    """Test streaming directory walk with ignore rules."""
+    with TemporaryDirectory() as temp_dir:
+        dir_path = Path(temp_dir)
+        for rel_path in [
+            "note.md", "Upper.MD", "image.png",
+            "nested/deep/note.md", "templates/daily.md",
+            ".obsidian/workspace.md", ".trash/old.md", "nested/draft.excalidraw.md"
+        ]:
+            path = dir_path / rel_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("content")
+            
+        entries = walk_files(
+            dir_path,
+            suffixes=[".md"],
+            ignore_patterns=["templates/", "*.excalidraw.md"]
+        )
+        found = {os.path.relpath(entry.path, dir_path) for entry in entries}
+        assert found == {"note.md", "Upper.MD", os.path.join("nested", "deep", "note.md")}
+        
+        with pytest.raises(FileNotFoundError):
+            list(walk_files(dir_path / "missing"))
+
+
+def test_walk_files_symlink_loop():
+    """Test that symlink loops are visited only once."""
+    with TemporaryDirectory() as temp_dir:
+        dir_path = Path(temp_dir)
+        (dir_path / "a").mkdir()
+        (dir_path / "a" / "note.md").write_text("content")
+        os.symlink(dir_path / "a", dir_path / "a" / "loop")
+        os.symlink(dir_path, dir_path / "a" / "root")
+        
+        found = [entry.name for entry in walk_files(dir_path, suffixes=[".md"])]
+        assert found == ["note.md"]
+
+
+def test_is_ignored():
+    """Test ignore rule matching on relative paths."""
+    assert is_ignored(".obsidian/app.json")
+    assert is_ignored("folder/.git/config")
+    assert not is_ignored("folder/note.md")
+    assert is_ignored("templates/daily.md", ignore_patterns=["templates"])
+    assert is_ignored("a/b/c.md", ignore_patterns=["a/b"])
+    assert is_ignored("a/draft.excalidraw.md", ignore_patterns=["*.excalidraw.md"])
+    assert not is_ignored("a/note.md", ignore_patterns=["templates"])
+
+
 def test_safe_remove():
     """Test safe file and directory removal."""
     with TemporaryDirectory() as temp_dir:
@@ -94,6 +144,48 @@ def test_is_text_file():
         assert not is_text_file(binary_file)
 
 
+def test_is_text_file_non_ascii():
+    """Test that UTF-8 text outside ASCII is detected as text."""
+    with TemporaryDirectory() as temp_dir:
+        text_file = Path(temp_dir) / "note.md"
+        text_file.write_text("日本語のノート 🚀\n", encoding="utf-8")
+        assert is_text_file(text_file)
+        
+        # A check window ending inside a multi-byte character is still text
+        assert is_text_file(text_file, max_check_size=2)
+        
+        latin1_file = Path(temp_dir) / "latin1.md"
+        latin1_file.write_bytes("caf\xe9 cr\xe8me".encode("latin-1"))
+        assert not is_text_file(latin1_file)
+
+
+def test_read_text_file():
+    """Test single-pass reading with binary detection."""
+    with TemporaryDirectory() as temp_dir:
+        text_file = Path(temp_dir) / "note.md"
+        text_file.write_bytes("\ufeff# 見出し\r\nline 🚀\r\n".encode("utf-8"))
+        assert read_text_file(text_file) == "# 見出し\nline 🚀\n"
+        
+        # Memory-mapped path
+        assert read_text_file(text_file, mmap_threshold=1) == "# 見出し\nline 🚀\n"
+        
+        binary_file = Path(temp_dir) / "image.md"
+        binary_file.write_bytes(b"PNG\0\x01\x02")
+        assert read_text_file(binary_file) is None
+        assert read_text_file(binary_file, mmap_threshold=1) is None
+        
+        invalid_file = Path(temp_dir) / "invalid.md"
+        invalid_file.write_bytes(b"\xff\xfe\xfa")
+        assert read_text_file(invalid_file) is None
+        
+        empty_file = Path(temp_dir) / "empty.md"
+        empty_file.touch()
+        assert read_text_file(empty_file, mmap_threshold=0) == ""
+        
+        with pytest.raises(OSError):
+            read_text_file(Path(temp_dir) / "missing.md")
+
+
 def test_get_file_size():
     """Test file size calculation."""
     with NamedTemporaryFile() as temp_file: